@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the VCF readers and the CLIs, on synthetic data (see synthvcf).
+
+    python bench.py run                 # time everything, store results for HEAD
+    python bench.py run -k get_rows     # only benchmarks matching a substring
+    python bench.py compare abc123 def456
+
+Every benchmark runs in a fresh interpreter so its peak RSS is its own.
+Results go to .bench/results/<commit>.json ("-dirty" for uncommitted trees).
+"""
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from typing import Callable
+
+import click
+import prettytable
+
+import synthvcf
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".bench")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+REGION_QUERIES = 200
+REGION_SIZE = 100_000
+
+BENCHMARKS: dict[str, Callable[[str], None]] = {}
+
+
+def benchmark(function: Callable[[str], None]) -> Callable[[str], None]:
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+@click.group(help="Benchmark suite")
+def cli():
+    pass
+
+
+@cli.command(help="Run benchmarks and store the results")
+@click.option("--records", "-n", default=200_000, show_default=True, type=int)
+@click.option("--csq-fields", default=40, show_default=True, type=int)
+@click.option("--repeat", "-r", default=3, show_default=True, type=click.IntRange(min=1))
+@click.option("--select", "-k", default=None, help="Only benchmarks with this in their name.")
+@click.option("--no-save", is_flag=True, default=False, help="Don't store the results.")
+def run(records, csq_fields, repeat, select, no_save):
+    prefix = dataset(records, csq_fields)
+    names = [name for name in BENCHMARKS if select is None or select in name]
+
+    results = {}
+    for name in names:
+        runs = [run_isolated(name, prefix) for _ in range(repeat)]
+        results[name] = {
+            "seconds": min(r["seconds"] for r in runs),
+            "runs": [r["seconds"] for r in runs],
+            "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+        }
+        click.echo(
+            f"{name:<28} {results[name]['seconds']:8.3f} s {results[name]['peak_rss_mb']:8.1f} MB",
+            err=True,
+        )
+
+    commit, dirty = _git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "params": {"records": records, "csq_fields": csq_fields, "repeat": repeat},
+        "results": results,
+    }
+
+    if not no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+        with open(path, "w") as results_file:
+            json.dump(report, results_file, indent=2)
+        click.echo(f"Saved {path}", err=True)
+
+
+@cli.command(help="Compare two stored runs (commit prefixes or result file paths)")
+@click.argument("base")
+@click.argument("head", required=False)
+def compare(base, head):
+    base_report = _load_report(base)
+    head_report = _load_report(head) if head else _load_report(None)
+
+    table = prettytable.PrettyTable(
+        ["benchmark", "base s", "head s", "change", "base MB", "head MB"]
+    )
+    table.align = "r"
+    table.align["benchmark"] = "l"
+
+    for name, head_result in head_report["results"].items():
+        base_result = base_report["results"].get(name)
+
+        if base_result is None:
+            table.add_row([name, "-", f"{head_result['seconds']:.3f}", "new", "-", "-"])
+            continue
+
+        change = head_result["seconds"] / base_result["seconds"] - 1
+        table.add_row(
+            [
+                name,
+                f"{base_result['seconds']:.3f}",
+                f"{head_result['seconds']:.3f}",
+                f"{change:+.1%}",
+                f"{base_result['peak_rss_mb']:.1f}",
+                f"{head_result['peak_rss_mb']:.1f}",
+            ]
+        )
+
+    print(f"base: {base_report['commit']}  head: {head_report['commit']}")
+    print(table)
+
+
+@cli.command("_one", hidden=True)
+@click.argument("name")
+@click.argument("prefix")
+def run_one(name, prefix):
+    """
+    Run one benchmark in this process, print {"seconds", "peak_rss_mb"} on stdout
+    """
+    # Benchmarked commands print a lot, send stdout to /dev/null (stderr is
+    # captured by run_isolated, shown if the benchmark fails)
+    result_fd = os.dup(sys.stdout.fileno())
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+
+    start = time.perf_counter()
+    BENCHMARKS[name](prefix)
+    seconds = time.perf_counter() - start
+
+    sys.stdout.flush()
+    os.write(result_fd, json.dumps({"seconds": seconds, "peak_rss_mb": _peak_rss_mb()}).encode())
+
+
+def run_isolated(name: str, prefix: str) -> dict:
+    process = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "_one", name, prefix],
+        capture_output=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+
+    if process.returncode != 0:
+        stderr = process.stderr.decode(errors="replace").strip().splitlines()
+        raise click.ClickException(f"{name} failed:\n" + "\n".join(stderr[-20:]))
+
+    return json.loads(process.stdout)
+
+
+def dataset(records: int, csq_fields: int) -> str:
+    """
+    Path prefix of the synthetic dataset for these parameters, generated once
+    """
+    prefix = os.path.join(BENCH_DIR, "data", f"synth_{records}_{csq_fields}")
+
+    if not os.path.exists(f"{prefix}.vcf.gz.tbi"):
+        os.makedirs(os.path.dirname(prefix), exist_ok=True)
+        click.echo(f"Generating {prefix}.vcf(.gz)", err=True)
+        synthvcf.generate(prefix, records=records, csq_fields=csq_fields, extra_info=5)
+
+    return prefix
+
+
+@benchmark
+def get_rows_plain(prefix: str) -> None:
+    from vcffile import VCF
+
+    for _ in VCF(f"{prefix}.vcf").get_rows(_skip_progress=True):
+        pass
+
+
+@benchmark
+def get_rows_bgzip(prefix: str) -> None:
+    from vcffile import VCF
+
+    for _ in VCF(f"{prefix}.vcf.gz").get_rows(_skip_progress=True):
+        pass
+
+
+@benchmark
+def get_rows_bgzip_threads(prefix: str) -> None:
+    from vcffile import VCF
+
+    for _ in VCF(f"{prefix}.vcf.gz", threads=2).get_rows(_skip_progress=True):
+        pass
+
+
+@benchmark
+def get_rows_workers(prefix: str) -> None:
+    from vcffile import VCF
+
+    vcf = VCF(f"{prefix}.vcf.gz")
+    vcf.add_filter("CLNSIG==Pathogenic")
+
+    for _ in vcf.get_rows(_skip_progress=True, workers=2):
+        pass
+
+
+@benchmark
+def get_rows_filter_expression(prefix: str) -> None:
+    from vcffile import VCF
+
+    vcf = VCF(f"{prefix}.vcf.gz")
+    vcf.add_filter("CLNSIG==Pathogenic && CADD>=20 && GNOMADAF<0.01")
+
+    for _ in vcf.get_rows(_skip_progress=True):
+        pass
+
+
+@benchmark
+def get_range_indexed(prefix: str) -> None:
+    from vcffile import VCF
+
+    vcf = VCF(f"{prefix}.vcf.gz")
+
+    for chrom, start, end in _random_regions(vcf):
+        for _ in vcf.get_range(chrom, start, end):
+            pass
+
+
+@benchmark
+def get_range_scan(prefix: str) -> None:
+    from vcffile import VCF
+
+    vcf = VCF(f"{prefix}.vcf")
+
+    for chrom, start, end in _random_regions(vcf)[:3]:
+        for _ in vcf.get_range(chrom, start, end, _skip_progress=True):
+            pass
+
+
+@benchmark
+def get_range_line_index(prefix: str) -> None:
+    from vcffile import VCF
+
+    vcf = VCF(f"{prefix}.vcf")
+    # Built in memory, a stored index would turn get_range_scan into this
+    vcf.build_line_index(write=False)
+
+    for chrom, start, end in _random_regions(vcf):
+        for _ in vcf.get_range(chrom, start, end):
+            pass
+
+
+@benchmark
+def nbr_variants_filtered(prefix: str) -> None:
+    from vcffile import VCF
+
+    vcf = VCF(f"{prefix}.vcf.gz")
+    vcf.add_filter("CADD>=10")
+    vcf.nbr_variants()
+
+
+@benchmark
+def to_arrays(prefix: str) -> None:
+    from vcffile import VCF
+
+    fields = ["CHROM", "POS", "RankScore", "RankResult", "CADD", "GNOMADAF", "CLNSIG"]
+    for _ in VCF(f"{prefix}.vcf.gz").to_arrays(fields):
+        pass
+
+
+@benchmark
+def to_genotypes(prefix: str) -> None:
+    from vcffile import VCF
+
+    for _ in VCF(f"{prefix}.vcf.gz").to_genotypes(["GT", "AD", "DP", "GQ"]):
+        pass
+
+
+@benchmark
+def cli_healthcheck(prefix: str) -> None:
+    from healthcheck import check_vcf
+
+    check_vcf.main([f"{prefix}.vcf.gz", "--per-chromosome"], standalone_mode=False)
+
+
+@benchmark
+def cli_rankscore_compare(prefix: str) -> None:
+    from rankscore import rankscore
+
+    rankscore.main([f"{prefix}.vcf.gz", f"{prefix}.vcf"], standalone_mode=False)
+
+
+@benchmark
+def cli_vcfdiff(prefix: str) -> None:
+    from vcfdiff import vcfdiff
+
+    vcfdiff.main([f"{prefix}.vcf.gz", f"{prefix}.vcf", "--summary"], standalone_mode=False)
+
+
+@benchmark
+def cli_rankresult(prefix: str) -> None:
+    from rankresult import parse_rank_result
+
+    parse_rank_result.main([f"{prefix}.vcf.gz"], standalone_mode=False)
+
+
+@benchmark
+def cli_infofield_regions(prefix: str) -> None:
+    from infofield import get_info_fields
+    from vcffile import VCF
+
+    regions = [f"{c}:{s}-{e}" for c, s, e in _random_regions(VCF(f"{prefix}.vcf.gz"))]
+    get_info_fields.main([f"{prefix}.vcf.gz", *regions, "CADD"], standalone_mode=False)
+
+
+@benchmark
+def cli_csq_most_severe(prefix: str) -> None:
+    from vcf import cli as vcf_cli
+
+    vcf_cli.main(
+        ["csq", f"{prefix}.vcf.gz", "--most-severe", "-f", "SYMBOL,Consequence,Feature"],
+        standalone_mode=False,
+    )
+
+
+def _peak_rss_mb() -> float:
+    """
+    Peak RSS of this process. ru_maxrss survives fork + exec, so it can be the
+    parent's peak instead: prefer VmHWM, which is reset on exec, where there is one.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _random_regions(vcf) -> list[tuple[str, int, int]]:
+    """
+    Same REGION_QUERIES regions every run
+    """
+    rng = random.Random(0)
+    contigs = vcf.header.contig_lengths()
+    names = [name for name, length in contigs.items() if length and length > REGION_SIZE]
+
+    regions = []
+    for _ in range(REGION_QUERIES):
+        chrom = rng.choice(names)
+        start = rng.randint(1, contigs[chrom] - REGION_SIZE)
+        regions.append((chrom, start, start + REGION_SIZE))
+
+    return regions
+
+
+def _git_commit() -> tuple[str, bool]:
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=cwd,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=cwd,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", True
+
+    return commit, bool(status.strip())
+
+
+def _load_report(ref: str | None) -> dict:
+    """
+    Stored results by path, or commit prefix (None = latest)
+    """
+    if ref is not None and os.path.isfile(ref):
+        path = ref
+    else:
+        if not os.path.isdir(RESULTS_DIR):
+            raise click.ClickException(f"No stored results in {RESULTS_DIR}")
+
+        candidates = [
+            os.path.join(RESULTS_DIR, name)
+            for name in os.listdir(RESULTS_DIR)
+            if ref is None or name.startswith(ref)
+        ]
+
+        if not candidates:
+            raise click.ClickException(f"No stored results for {ref}")
+
+        path = max(candidates, key=os.path.getmtime)
+
+    with open(path) as results_file:
+        return json.load(results_file)
+
+
+if __name__ == "__main__":
+    cli()
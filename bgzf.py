@@ -0,0 +1,404 @@
+import io
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator
+
+BGZF_MAGIC = b"\x1f\x8b\x08\x04"
+BGZF_FIXED_HEADER_LEN = 12
+BLOCKS_IN_FLIGHT_PER_THREAD = 4
+# Max inflated bytes per written block, as in htslib, so blocks never exceed 64 KiB
+BGZF_MAX_BLOCK_DATA = 0xFF00
+BGZF_EOF_BLOCK = bytes.fromhex("1f8b08040000000000ff0600424302001b0003000000000000000000")
+# zlib window bits of a gzip member (header and trailer included)
+GZIP_WBITS = 31
+GZIP_READ_SIZE = 256 * 1024
+
+
+class BgzfError(Exception):
+    pass
+
+
+def is_bgzf(path: str) -> bool:
+    """
+    True if path starts with a BGZF block (gzip member w/ a "BC" extra subfield)
+    """
+    with open(path, "rb") as handle:
+        header = handle.read(BGZF_FIXED_HEADER_LEN + 6)
+
+    if len(header) < BGZF_FIXED_HEADER_LEN + 6 or not header.startswith(BGZF_MAGIC):
+        return False
+
+    return header[12:14] == b"BC"
+
+
+def read_raw_block(handle) -> bytes | None:
+    """
+    Read one complete compressed BGZF block from handle.
+
+    Returns None at end of file.
+    """
+    header = handle.read(BGZF_FIXED_HEADER_LEN)
+
+    if not header:
+        return None
+
+    if len(header) < BGZF_FIXED_HEADER_LEN or not header.startswith(BGZF_MAGIC):
+        raise BgzfError(f"Not a BGZF block at offset {handle.tell() - len(header)}")
+
+    (xlen,) = struct.unpack_from("<H", header, 10)
+    extra = handle.read(xlen)
+    block_size = _block_size(extra)
+
+    rest = handle.read(block_size - BGZF_FIXED_HEADER_LEN - xlen)
+    return header + extra + rest
+
+
+def iter_block_sizes(path: str) -> Generator[tuple[int, int], None, None]:
+    """
+    (compressed offset, inflated size) of every block, read from block headers only
+    """
+    with open(path, "rb") as handle:
+        offset = 0
+        while header := handle.read(BGZF_FIXED_HEADER_LEN):
+            if not header.startswith(BGZF_MAGIC):
+                raise BgzfError(f"Not a BGZF block at offset {offset}")
+
+            (xlen,) = struct.unpack_from("<H", header, 10)
+            block_size = _block_size(handle.read(xlen))
+
+            handle.seek(offset + block_size - 4)
+            (inflated_size,) = struct.unpack("<I", handle.read(4))
+
+            yield offset, inflated_size
+            offset += block_size
+
+
+def inflate_block(raw_block: bytes) -> bytes:
+    (xlen,) = struct.unpack_from("<H", raw_block, 10)
+    cdata = raw_block[BGZF_FIXED_HEADER_LEN + xlen : -8]
+    return zlib.decompress(cdata, -15)
+
+
+def deflate_block(data: bytes, level: int = 6) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    cdata = compressor.compress(data) + compressor.flush()
+
+    header = struct.pack(
+        "<4sIBBH2sHH", BGZF_MAGIC, 0, 0, 0xFF, 6, b"BC", 2, len(cdata) + BGZF_FIXED_HEADER_LEN + 13
+    )
+    trailer = struct.pack("<II", zlib.crc32(data), len(data))
+
+    return header + cdata + trailer
+
+
+def _block_size(extra: bytes) -> int:
+    idx = 0
+    while idx + 4 <= len(extra):
+        sub_id = extra[idx : idx + 2]
+        (sub_len,) = struct.unpack_from("<H", extra, idx + 2)
+
+        if sub_id == b"BC" and sub_len == 2:
+            (bsize,) = struct.unpack_from("<H", extra, idx + 4)
+            return bsize + 1
+
+        idx += 4 + sub_len
+
+    raise BgzfError("Missing BC subfield, not BGZF compressed?")
+
+
+class BgzfReader:
+    """
+    Binary line reader for BGZF files supporting seek/tell on virtual offsets.
+
+    Virtual offset = (compressed block offset << 16) | offset within inflated block
+
+    With a block_cache (lrucache.LRUCache, may be shared between readers and
+    threads), inflated blocks are kept and reused across seeks and readers.
+    """
+
+    def __init__(self, path: str, block_cache=None):
+        self.path = path
+        self._handle = open(path, "rb")
+        self._block_cache = block_cache
+
+        self._block_offset = 0
+        self._next_block_offset = 0
+        self._buffer = b""
+        self._within_block = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self._handle.close()
+
+    def _load_block(self, block_offset: int) -> bool:
+        cache_key = ("bgzf_block", self.path, block_offset)
+        cached = None if self._block_cache is None else self._block_cache.get(cache_key)
+
+        if cached is not None:
+            self._buffer, self._next_block_offset = cached
+        else:
+            self._handle.seek(block_offset)
+            raw_block = read_raw_block(self._handle)
+
+            if raw_block is None:
+                return False
+
+            self._next_block_offset = block_offset + len(raw_block)
+            self._buffer = inflate_block(raw_block)
+
+            if self._block_cache is not None:
+                self._block_cache.put(
+                    cache_key, (self._buffer, self._next_block_offset), len(self._buffer)
+                )
+
+        self._block_offset = block_offset
+        self._within_block = 0
+
+        return True
+
+    def seek(self, virtual_offset: int) -> None:
+        block_offset = virtual_offset >> 16
+        within_block = virtual_offset & 0xFFFF
+
+        if block_offset != self._block_offset or not self._buffer:
+            if not self._load_block(block_offset):
+                raise BgzfError(f"Cannot seek past end of file: {virtual_offset}")
+
+        self._within_block = within_block
+
+    def tell(self) -> int:
+        if self._within_block >= len(self._buffer):
+            return self._next_block_offset << 16
+
+        return (self._block_offset << 16) | self._within_block
+
+    def readline(self) -> bytes:
+        parts = []
+
+        while True:
+            if self._within_block >= len(self._buffer):
+                if not self._load_block(self._next_block_offset):
+                    break
+                continue
+
+            newline = self._buffer.find(b"\n", self._within_block)
+
+            if newline < 0:
+                parts.append(self._buffer[self._within_block :])
+                self._within_block = len(self._buffer)
+                continue
+
+            parts.append(self._buffer[self._within_block : newline + 1])
+            self._within_block = newline + 1
+            break
+
+        return b"".join(parts)
+
+    def __iter__(self):
+        while line := self.readline():
+            yield line
+
+
+class ThreadedBgzfReader:
+    """
+    Sequential line reader inflating BGZF blocks ahead of the consumer.
+
+    Blocks are independent deflate streams, so they are inflated on a thread
+    pool (zlib releases the GIL) and handed back in file order. mode "rt"
+    yields str lines, "rb" bytes lines.
+    """
+
+    def __init__(self, path: str, mode: str = "rt", threads: int = 2):
+        self.path = path
+        self.threads = threads
+        self.compressed_offset = 0
+        # Time spent waiting for inflated blocks
+        self.inflate_seconds = 0.0
+
+        self._text = "b" not in mode
+        self._handle = open(path, "rb")
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._handle.close()
+
+    def _inflated_blocks(self) -> Generator[bytes, None, None]:
+        pending = deque()
+        max_pending = self.threads * BLOCKS_IN_FLIGHT_PER_THREAD
+        eof = False
+
+        while True:
+            while not eof and len(pending) < max_pending:
+                raw_block = read_raw_block(self._handle)
+
+                if raw_block is None:
+                    eof = True
+                    break
+
+                inflated = self._executor.submit(inflate_block, raw_block)
+                pending.append((self._handle.tell(), inflated))
+
+            if not pending:
+                return
+
+            block_end, inflated = pending.popleft()
+            self.compressed_offset = block_end
+
+            before = time.perf_counter()
+            data = inflated.result()
+            self.inflate_seconds += time.perf_counter() - before
+
+            yield data
+
+    def _split_lines(self, data: bytes):
+        if self._text:
+            return io.StringIO(data.decode())
+
+        return io.BytesIO(data)
+
+    def __iter__(self):
+        partial = b""
+
+        for block in self._inflated_blocks():
+            data = partial + block if partial else block
+            end = data.rfind(b"\n") + 1
+            partial = data[end:]
+
+            if end:
+                yield from self._split_lines(data[:end])
+
+        if partial:
+            yield from self._split_lines(partial)
+
+
+class TimedGzipReader(io.RawIOBase):
+    """
+    Raw reader of a gzip file of any number of members (e.g. BGZF), timing
+    only the inflating, into inflate_seconds
+    """
+
+    def __init__(self, path: str):
+        self.fileobj = open(path, "rb")
+        self.inflate_seconds = 0.0
+
+        self._inflater = zlib.decompressobj(GZIP_WBITS)
+        self._in_member = False
+        self._data = memoryview(b"")
+        self._offset = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._data):
+            if not self._inflate_more():
+                return 0
+
+        n = min(len(buffer), len(self._data) - self._offset)
+        buffer[:n] = self._data[self._offset : self._offset + n]
+        self._offset += n
+
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self.fileobj.close()
+        super().close()
+
+    def _inflate_more(self) -> bool:
+        compressed = b""
+        if self._inflater.eof:
+            # Next member, possibly already read
+            compressed = self._inflater.unused_data
+            self._inflater = zlib.decompressobj(GZIP_WBITS)
+            self._in_member = False
+
+        if not compressed:
+            compressed = self.fileobj.read(GZIP_READ_SIZE)
+            if not compressed:
+                if self._in_member:
+                    raise EOFError("Compressed file ended before the end-of-stream marker")
+                return False
+
+        before = time.perf_counter()
+        self._data = memoryview(self._inflater.decompress(compressed))
+        self.inflate_seconds += time.perf_counter() - before
+
+        self._in_member = True
+        self._offset = 0
+
+        return True
+
+
+def open_timed_gzip(path: str, mode: str = "rt"):
+    """
+    gzip.open(path, mode) for reading, through a TimedGzipReader
+    """
+    handle = io.BufferedReader(TimedGzipReader(path))
+    return handle if "b" in mode else io.TextIOWrapper(handle)
+
+
+class BgzfWriter(io.RawIOBase):
+    """
+    Binary writer producing BGZF blocks (readable by gzip, indexable by tabix).
+
+    Closing writes the EOF marker block; handle itself is left open.
+    tell() gives the virtual offset of the next byte written, for indexing.
+    """
+
+    def __init__(self, handle, level: int = 6):
+        self._handle = handle
+        self._level = level
+        self._buffer = bytearray()
+        self._compressed_offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+
+        while len(self._buffer) >= BGZF_MAX_BLOCK_DATA:
+            self._write_block(bytes(self._buffer[:BGZF_MAX_BLOCK_DATA]))
+            del self._buffer[:BGZF_MAX_BLOCK_DATA]
+
+        return len(data)
+
+    def flush(self) -> None:
+        if self._buffer and not self.closed:
+            self._write_block(bytes(self._buffer))
+            self._buffer.clear()
+
+        self._handle.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.flush()
+        self._handle.write(BGZF_EOF_BLOCK)
+        self._handle.flush()
+        super().close()
+
+    def tell(self) -> int:
+        return (self._compressed_offset << 16) | len(self._buffer)
+
+    def _write_block(self, data: bytes) -> None:
+        block = deflate_block(data, self._level)
+        self._handle.write(block)
+        self._compressed_offset += len(block)
@@ -0,0 +1,108 @@
+"""
+Split a VCF into independently readable chunks for parallel processing.
+
+A line belongs to the chunk its first byte falls in. Readers seek to the
+byte just before the chunk, throw away the rest of that line, and stop at
+the first line starting at or after the chunk end.
+
+BGZF files are split on block boundaries (offsets are virtual offsets),
+plain text files on byte offsets (on record starts, if they have a line
+index) and read through mmap. Plain gzip can't be split: one chunk.
+"""
+
+import gzip
+import os
+from typing import Generator, NamedTuple
+
+from bgzf import BgzfReader, is_bgzf, iter_block_sizes
+from lineindex import LineIndex, MmapReader
+
+
+class Chunk(NamedTuple):
+    start: int
+    end: int
+    skip_partial_line: bool
+
+
+WHOLE_FILE = Chunk(0, -1, False)
+
+
+def plan_chunks(path: str, n_chunks: int, line_index: LineIndex | None = None) -> list[Chunk]:
+    """
+    With a line index, plain files are split on record boundaries into chunks
+    of about equally many records
+    """
+    if n_chunks <= 1:
+        return [WHOLE_FILE]
+
+    if path.endswith(".gz"):
+        if not is_bgzf(path):
+            return [WHOLE_FILE]
+        return _plan_bgzf_chunks(path, n_chunks)
+
+    if line_index is not None:
+        return [Chunk(start, end, False) for start, end in line_index.split(n_chunks)]
+
+    return _plan_plain_chunks(os.path.getsize(path), n_chunks)
+
+
+def _plan_plain_chunks(file_size: int, n_chunks: int) -> list[Chunk]:
+    bounds = sorted({file_size * i // n_chunks for i in range(n_chunks)} | {file_size})
+    chunks = []
+
+    for start, end in zip(bounds, bounds[1:]):
+        chunks.append(Chunk(max(start - 1, 0), end, start > 0))
+
+    return chunks
+
+
+def _plan_bgzf_chunks(path: str, n_chunks: int) -> list[Chunk]:
+    blocks = [(offset, size) for offset, size in iter_block_sizes(path) if size > 0]
+
+    if not blocks:
+        return [WHOLE_FILE]
+
+    compressed_size = os.path.getsize(path)
+    chunks = []
+    chunk_start, skip_partial_line = 0, False
+    next_target = compressed_size // n_chunks
+
+    for (prev_offset, prev_size), (offset, _) in zip(blocks, blocks[1:]):
+        if offset < next_target:
+            continue
+
+        chunks.append(Chunk(chunk_start, offset << 16, skip_partial_line))
+        # last byte of the previous block, the reader drops the line it is in
+        chunk_start, skip_partial_line = (prev_offset << 16) | (prev_size - 1), True
+        next_target = offset + compressed_size // n_chunks
+
+    chunks.append(Chunk(chunk_start, -1, skip_partial_line))
+    return chunks
+
+
+def read_chunk(
+    path: str, chunk: Chunk, as_bytes: bool = False
+) -> Generator[str | bytes, None, None]:
+    """
+    Lines (header lines included) that start within chunk, undecoded with as_bytes
+    """
+    if chunk == WHOLE_FILE:
+        open_func = gzip.open if path.endswith(".gz") else open
+        with open_func(path, "rb" if as_bytes else "rt") as handle:
+            yield from handle
+        return
+
+    open_func = BgzfReader if path.endswith(".gz") else MmapReader
+    with open_func(path) as handle:
+        handle.seek(chunk.start)
+
+        if chunk.skip_partial_line:
+            handle.readline()
+
+        while chunk.end < 0 or handle.tell() < chunk.end:
+            line = handle.readline()
+
+            if not line:
+                break
+
+            yield line if as_bytes else line.decode()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Client for server.py.
+
+    python client.py range sample.vcf.gz 1:100000-200000 --info CADD,RankScore
+    python client.py --socket /tmp/vcf.sock position sample.vcf.gz 1 123456
+
+Or from Python, one VCFClient per thread:
+
+    client = VCFClient("http://127.0.0.1:8765")
+    client.range("sample.vcf.gz", "1:100000-200000", info=["CADD"])
+"""
+import http.client
+import json
+import socket
+from urllib.parse import urlencode, urlsplit
+
+import click
+
+from output import open_output, tsv_writer
+from server import DEFAULT_PORT
+
+DEFAULT_URL = f"http://127.0.0.1:{DEFAULT_PORT}"
+
+
+class ServerError(Exception):
+    pass
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float | None = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class VCFClient:
+    """
+    Keeps one connection to the server open. Not thread-safe.
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, socket_path: str | None = None, timeout: float = 60):
+        if socket_path is not None:
+            self._connection = UnixHTTPConnection(socket_path, timeout)
+        else:
+            address = urlsplit(url)
+            self._connection = http.client.HTTPConnection(
+                address.hostname, address.port or DEFAULT_PORT, timeout=timeout
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def files(self) -> dict:
+        return self._get("/files")["files"]
+
+    def stats(self) -> dict:
+        return self._get("/stats")
+
+    def range(
+        self, file: str, region: str, info: list[str] | None = None, filter: str | None = None
+    ) -> list[dict]:
+        """
+        Records in region ("chrom:start-end"), with the INFO keys in info (["*"] = all)
+        """
+        params = {"file": file, "region": region}
+        return self._get("/range", _with_options(params, info, filter))["records"]
+
+    def position(
+        self,
+        file: str,
+        chrom: str,
+        pos: int,
+        info: list[str] | None = None,
+        filter: str | None = None,
+    ) -> list[dict]:
+        params = {"file": file, "chrom": chrom, "pos": pos}
+        return self._get("/position", _with_options(params, info, filter))["records"]
+
+    def _get(self, path: str, params: dict | None = None) -> dict:
+        if params:
+            path = f"{path}?{urlencode(params)}"
+
+        try:
+            self._connection.request("GET", path)
+            response = self._connection.getresponse()
+            body = json.loads(response.read())
+        except (OSError, http.client.HTTPException):
+            # Server closed the kept-alive connection, retry once on a new one
+            self._connection.close()
+            self._connection.request("GET", path)
+            response = self._connection.getresponse()
+            body = json.loads(response.read())
+
+        if response.status != 200:
+            raise ServerError(f"{response.status}: {body.get('error')}")
+
+        return body
+
+
+@click.group(help="Query a running server.py")
+@click.option("--url", default=DEFAULT_URL, show_default=True, help="Server address.")
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Server Unix socket, instead of --url.",
+)
+@click.pass_context
+def cli(ctx, url, socket_path):
+    ctx.obj = ctx.with_resource(VCFClient(url, socket_path))
+
+
+@cli.command(help="List served files")
+@click.pass_obj
+def files(client):
+    for name, meta in _call(client.files).items():
+        click.echo(f"{name}\t{meta['path']}\t{'indexed' if meta['indexed'] else 'not indexed'}")
+
+
+@cli.command(help="Server request and cache statistics")
+@click.pass_obj
+def stats(client):
+    click.echo(json.dumps(_call(client.stats), indent=2))
+
+
+@cli.command("range", help="Records in regions (chrom:start-end), as TSV")
+@click.argument("file")
+@click.argument("regions", nargs=-1, required=True)
+@click.option("--info", "-i", default=None, help="Comma separated INFO keys to output.")
+@click.option("--filter", "expression", default=None, help="Only records matching expression.")
+@click.pass_obj
+def range_command(client, file, regions, info, expression):
+    keys = info.split(",") if info else []
+
+    with open_output() as out:
+        writer = tsv_writer(out)
+        writer.writerow(["REGION", "CHROM", "POS", "REF", "ALT"] + keys)
+
+        for region in regions:
+            for record in _call(client.range, file, region, keys, expression):
+                writer.writerow([region] + _record_row(record, keys))
+
+
+@cli.command(help="Records at a position, as TSV")
+@click.argument("file")
+@click.argument("chrom")
+@click.argument("pos", type=int)
+@click.option("--info", "-i", default=None, help="Comma separated INFO keys to output.")
+@click.pass_obj
+def position(client, file, chrom, pos, info):
+    keys = info.split(",") if info else []
+    records = _call(client.position, file, chrom, pos, keys)
+
+    with open_output() as out:
+        writer = tsv_writer(out)
+        writer.writerow(["CHROM", "POS", "REF", "ALT"] + keys)
+        writer.writerows(_record_row(record, keys) for record in records)
+
+
+def _with_options(params: dict, info: list[str] | None, filter: str | None) -> dict:
+    if info:
+        params["info"] = ",".join(info)
+    if filter:
+        params["filter"] = filter
+
+    return params
+
+
+def _record_row(record: dict, keys: list[str]) -> list:
+    row = [record["chrom"], record["pos"], record["ref"], record["alt"]]
+    info = record.get("info", {})
+
+    for key in keys:
+        value = info.get(key)
+        row.append("" if value is None else value)
+
+    return row
+
+
+def _call(method, *args):
+    try:
+        return method(*args)
+    except ServerError as e:
+        raise click.ClickException(str(e))
+    except OSError as e:
+        raise click.ClickException(f"Can't reach server: {e}")
+
+
+if __name__ == "__main__":
+    cli()
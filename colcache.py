@@ -0,0 +1,215 @@
+"""
+Persistent cache of extracted VCF columns.
+
+Every entry is a directory of one .npy file per field, keyed on the VCF's
+path, size, mtime, active filters (their expressions or code and
+parameters), the field list and CACHE_VERSION. Numeric and short string
+columns without missing values are memory-mapped on load; string columns
+with missing values keep them as None. Entries are evicted least
+recently used first once the cache grows past max_size.
+
+The cache lives in $VCF_CACHE_DIR, ~/.cache/vcf by default.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from functools import partial
+from typing import Callable
+
+import numpy as np
+
+from columns import concat_arrays, iter_arrays
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "VCF_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "vcf")
+)
+DEFAULT_MAX_CACHE_SIZE = 10 * 1024**3
+MAX_FIXED_STR_WIDTH = 64
+META_FILE = "meta.json"
+TMP_PREFIX = ".tmp"
+# Entries still being written are younger, older ones were interrupted
+STALE_TMP_SECONDS = 3600
+# Bump when extracted columns change, to invalidate existing entries
+CACHE_VERSION = 2
+
+
+def load_columns(
+    vcf,
+    fields: list[str],
+    cache_dir: str | None = None,
+    max_size: int = DEFAULT_MAX_CACHE_SIZE,
+) -> dict[str, np.ndarray]:
+    """
+    Whole-file columns for fields, from the cache if present, else extracted and stored.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    entry = os.path.join(cache_dir, cache_key(vcf, fields))
+
+    columns = _read_entry(entry, fields)
+    if columns is not None:
+        LOG.info("Loaded cached columns from %s", entry)
+        return columns
+
+    columns = concat_arrays(iter_arrays(vcf, fields), fields)
+    columns = {field: _storable(column) for field, column in columns.items()}
+
+    try:
+        _write_entry(cache_dir, entry, columns)
+        evict(cache_dir, max_size, keep=entry)
+    except OSError as e:
+        LOG.warning("Could not write column cache %s: %s", entry, e)
+
+    return columns
+
+
+def cache_key(vcf, fields: list[str]) -> str:
+    stat = os.stat(vcf.vcf_file)
+    filters = [filter_id(f) for f in vcf.active_filters()]
+    key = [
+        CACHE_VERSION,
+        os.path.abspath(vcf.vcf_file),
+        stat.st_size,
+        stat.st_mtime_ns,
+        filters,
+        fields,
+    ]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+
+def filter_id(filter_function: Callable) -> str:
+    """
+    What a filter does, as far as can be told: the expression of compiled
+    filters, else the code, bound arguments, closure and defaults of functions
+    """
+    if isinstance(filter_function, partial):
+        return (
+            f"partial({filter_id(filter_function.func)}, {filter_function.args!r}, "
+            f"{sorted(filter_function.keywords.items())!r})"
+        )
+
+    code = getattr(filter_function, "__code__", None)
+    if code is None:
+        # CompiledFilter repr holds the expression. Other objects without a
+        # repr of their own include their address, and never hit the cache.
+        return repr(filter_function)
+
+    closure = [cell.cell_contents for cell in filter_function.__closure__ or ()]
+    return (
+        f"{filter_function.__module__}.{filter_function.__qualname__}"
+        f":{_code_id(code)}:{closure!r}:{filter_function.__defaults__!r}"
+    )
+
+
+def _code_id(code) -> str:
+    # Nested code objects (lambdas in the filter) by content, not address
+    consts = [_code_id(const) if hasattr(const, "co_code") else const for const in code.co_consts]
+    return hashlib.sha1(code.co_code + repr(consts).encode()).hexdigest()
+
+
+def evict(cache_dir: str, max_size: int, keep: str | None = None) -> None:
+    entries = []
+
+    for name in os.listdir(cache_dir):
+        entry = os.path.join(cache_dir, name)
+        meta = os.path.join(entry, META_FILE)
+
+        try:
+            if name.startswith(TMP_PREFIX):
+                if time.time() - os.path.getmtime(entry) > STALE_TMP_SECONDS:
+                    LOG.info("Removing interrupted cache write %s", entry)
+                    shutil.rmtree(entry, ignore_errors=True)
+                continue
+
+            if not os.path.isfile(meta):
+                continue
+
+            size = sum(f.stat().st_size for f in os.scandir(entry) if f.is_file())
+            entries.append((os.path.getmtime(meta), size, entry))
+        except FileNotFoundError:
+            # Evicted or renamed by another process meanwhile
+            continue
+
+    total_size = sum(size for _, size, _ in entries)
+
+    for _, size, entry in sorted(entries):
+        if total_size <= max_size:
+            break
+
+        if entry == keep:
+            continue
+
+        LOG.info("Evicting cached columns %s", entry)
+        shutil.rmtree(entry, ignore_errors=True)
+        total_size -= size
+
+
+def _read_entry(entry: str, fields: list[str]) -> dict[str, np.ndarray] | None:
+    meta_path = os.path.join(entry, META_FILE)
+
+    try:
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+    except (OSError, ValueError):
+        return None
+
+    columns = {}
+    try:
+        for idx, field in enumerate(fields):
+            path = os.path.join(entry, f"{idx}.npy")
+
+            if meta["mmap"][idx]:
+                columns[field] = np.load(path, mmap_mode="r")
+            else:
+                columns[field] = np.load(path, allow_pickle=True)
+
+        # Mark as recently used, for eviction
+        os.utime(meta_path)
+    except FileNotFoundError:
+        # Evicted by another process while reading, a miss
+        LOG.info("Cached columns %s disappeared while reading", entry)
+        return None
+
+    return columns
+
+
+def _write_entry(cache_dir: str, entry: str, columns: dict[str, np.ndarray]) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_entry = tempfile.mkdtemp(dir=cache_dir, prefix=TMP_PREFIX)
+
+    mmap = []
+    for idx, column in enumerate(columns.values()):
+        mmap.append(column.dtype != object)
+        np.save(os.path.join(tmp_entry, f"{idx}.npy"), column, allow_pickle=True)
+
+    with open(os.path.join(tmp_entry, META_FILE), "w") as meta_file:
+        json.dump({"fields": list(columns), "mmap": mmap}, meta_file)
+
+    try:
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # Someone else cached the same columns meanwhile
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+
+
+def _storable(column: np.ndarray) -> np.ndarray:
+    """
+    Short string columns -> fixed width str so they can be memory-mapped.
+
+    Columns with missing (None) values stay object arrays, fixed width str
+    has no missing value.
+    """
+    if column.dtype != object:
+        return column
+
+    if all(isinstance(value, str) for value in column):
+        width = max((len(value) for value in column), default=0)
+        if width <= MAX_FIXED_STR_WIDTH:
+            return np.array(column.tolist(), dtype=f"U{max(width, 1)}")
+
+    return column
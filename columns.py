@@ -0,0 +1,158 @@
+"""
+Batched extraction of VCF fields into typed NumPy columns.
+
+Integer columns use MISSING_INT for missing values, float columns NaN.
+RankResult is a 2D (records x components) int32 array, components named by
+rank_keys(). Any other INFO key is typed from its header Type, and
+defined_field(key) gives a bool column of whether key is set at all.
+"""
+from itertools import islice
+from typing import Callable, Generator, Iterable
+
+import numpy as np
+
+from constants import INFO_FIELDS, VCF_FIELDS
+from variants import Info
+
+DEFAULT_CHUNK_SIZE = 100_000
+MISSING_INT = np.iinfo(np.int32).min
+DEFINED_SUFFIX = "?"
+
+FIXED_STR_FIELDS = {
+    "CHROM": VCF_FIELDS.CHROM,
+    "ID": VCF_FIELDS.ID,
+    "REF": VCF_FIELDS.REF,
+    "ALT": VCF_FIELDS.ALT,
+}
+
+
+def rank_keys(vcf) -> list[str]:
+    meta = vcf.header.info[INFO_FIELDS.RANK_RESULT]
+    return meta["Description"].split("|")
+
+
+def defined_field(info_key: str) -> str:
+    return f"{info_key}{DEFINED_SUFFIX}"
+
+
+def iter_arrays(
+    vcf, fields: list[str], chunk_size: int = DEFAULT_CHUNK_SIZE, variants: Iterable | None = None
+) -> Generator[dict[str, np.ndarray], None, None]:
+    """
+    Yield {field: column} for every chunk_size records of vcf (or of variants)
+    """
+    builders = {field: column_builder(vcf, field) for field in fields}
+    info_types = vcf.get_info_types()
+
+    if variants is None:
+        variants = vcf.variants(_skip_progress=True)
+
+    variants = iter(variants)
+
+    while batch := list(islice(variants, chunk_size)):
+        columns = [variant.split("\t", VCF_FIELDS.INFO + 1) for variant in batch]
+        infos = [Info(c[VCF_FIELDS.INFO].rstrip("\n"), info_types) for c in columns]
+
+        yield {field: build(columns, infos) for field, build in builders.items()}
+
+
+def concat_arrays(chunks: Iterable[dict[str, np.ndarray]], fields: list[str]) -> dict:
+    chunks = list(chunks)
+
+    if not chunks:
+        return {field: np.array([]) for field in fields}
+
+    return {field: np.concatenate([chunk[field] for chunk in chunks]) for field in fields}
+
+
+def column_builder(vcf, field: str) -> Callable:
+    """
+    Function making field's column from (tab split lines, their Info) of a batch
+    """
+    if field in FIXED_STR_FIELDS:
+        idx = FIXED_STR_FIELDS[field]
+        return lambda columns, infos: np.array([c[idx] for c in columns], dtype=object)
+
+    if field == "POS":
+        return lambda columns, infos: np.array([c[VCF_FIELDS.POS] for c in columns], dtype=np.int64)
+
+    if field.endswith(DEFINED_SUFFIX):
+        info_key = field.removesuffix(DEFINED_SUFFIX)
+        return lambda columns, infos: np.array([info_key in info for info in infos], dtype=bool)
+
+    if field == INFO_FIELDS.RANK_SCORE:
+        return lambda columns, infos: _int_column(
+            [_rank_score_value(info.get(field)) for info in infos]
+        )
+
+    if field == INFO_FIELDS.RANK_RESULT:
+        n_components = len(rank_keys(vcf))
+        return lambda columns, infos: _rank_result_column(
+            [info.get(field) for info in infos], n_components
+        )
+
+    _, info_type = vcf.get_info_types().get(field, ("1", "String"))
+
+    if info_type == "Flag":
+        return lambda columns, infos: np.array([field in info for info in infos], dtype=bool)
+
+    if info_type == "Integer":
+        return lambda columns, infos: _int_column([_first_value(info.get(field)) for info in infos])
+
+    if info_type == "Float":
+        return lambda columns, infos: _float_column(
+            [_first_value(info.get(field)) for info in infos]
+        )
+
+    return lambda columns, infos: np.array([info.get(field) for info in infos], dtype=object)
+
+
+def _first_value(value: str | None) -> str | None:
+    if value is None or value is True:
+        return None
+
+    value = value.split(",", 1)[0]
+    return None if value == "." else value
+
+
+def _rank_score_value(value: str | None) -> str | None:
+    """
+    family_id:rank_score, first family only
+    """
+    value = _first_value(value)
+
+    if value is None:
+        return None
+
+    return value.rsplit(":", 1)[-1]
+
+
+def _int_column(values: list[str | None]) -> np.ndarray:
+    return np.array(
+        [str(MISSING_INT) if value is None else value for value in values], dtype=np.int64
+    ).astype(np.int32)
+
+
+def _float_column(values: list[str | None]) -> np.ndarray:
+    return np.array(["nan" if value is None else value for value in values], dtype=np.float64)
+
+
+def _rank_result_column(values: list[str | None], n_components: int) -> np.ndarray:
+    result = np.full((len(values), n_components), MISSING_INT, dtype=np.int32)
+
+    present = [idx for idx, value in enumerate(values) if value is not None]
+    if not present:
+        return result
+
+    separators = n_components - 1
+    if all(values[idx].count("|") == separators for idx in present):
+        components = "|".join(values[idx] for idx in present).split("|")
+        result[present] = np.array(components, dtype=np.int64).reshape(-1, n_components)
+        return result
+
+    # Component count differs from the header for some record, go row by row
+    for idx in present:
+        row = values[idx].split("|")[:n_components]
+        result[idx, : len(row)] = np.array(row, dtype=np.int64)
+
+    return result
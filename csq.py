@@ -0,0 +1,235 @@
+"""
+Streaming parser for VEP CSQ annotations.
+
+The subfield layout comes from the header's CSQ Description
+("... Format: Allele|Consequence|IMPACT|SYMBOL|..."). Records are only
+split as far as needed: the CSQ value is located in the INFO column without
+splitting the other INFO entries, and each transcript is split on "|" only
+up to the last requested subfield.
+"""
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from columns import DEFAULT_CHUNK_SIZE
+from constants import VCF_FIELDS
+from header import Header
+from variants import find_info_value, raw_info_column
+
+CSQ_KEY = "CSQ"
+CONSEQUENCE = "Consequence"
+GENE_FIELDS = ("Gene", "SYMBOL")
+
+# Ensembl's consequence terms, most severe first
+CONSEQUENCE_SEVERITY = [
+    "transcript_ablation",
+    "splice_acceptor_variant",
+    "splice_donor_variant",
+    "stop_gained",
+    "frameshift_variant",
+    "stop_lost",
+    "start_lost",
+    "transcript_amplification",
+    "feature_elongation",
+    "feature_truncation",
+    "inframe_insertion",
+    "inframe_deletion",
+    "missense_variant",
+    "protein_altering_variant",
+    "splice_donor_5th_base_variant",
+    "splice_region_variant",
+    "splice_donor_region_variant",
+    "splice_polypyrimidine_tract_variant",
+    "incomplete_terminal_codon_variant",
+    "start_retained_variant",
+    "stop_retained_variant",
+    "synonymous_variant",
+    "coding_sequence_variant",
+    "mature_miRNA_variant",
+    "5_prime_UTR_variant",
+    "3_prime_UTR_variant",
+    "non_coding_transcript_exon_variant",
+    "intron_variant",
+    "NMD_transcript_variant",
+    "non_coding_transcript_variant",
+    "coding_transcript_variant",
+    "upstream_gene_variant",
+    "downstream_gene_variant",
+    "TFBS_ablation",
+    "TFBS_amplification",
+    "TF_binding_site_variant",
+    "regulatory_region_ablation",
+    "regulatory_region_amplification",
+    "regulatory_region_variant",
+    "intergenic_variant",
+    "sequence_variant",
+]
+SEVERITY_RANK = {term: rank for rank, term in enumerate(CONSEQUENCE_SEVERITY)}
+UNKNOWN_SEVERITY = len(CONSEQUENCE_SEVERITY)
+
+
+def csq_fields(header: Header, key: str = CSQ_KEY) -> list[str]:
+    """
+    CSQ subfield names, from the header's INFO Description
+    """
+    if key not in header.info:
+        raise ValueError(f"No {key} INFO field in header")
+
+    description = header.info[key]["Description"]
+    return description.split("Format: ")[-1].split("|")
+
+
+def severity(consequence: str) -> int:
+    """
+    Rank of the most severe of "&" joined consequence terms, 0 = most severe
+    """
+    return min(SEVERITY_RANK.get(term, UNKNOWN_SEVERITY) for term in consequence.split("&"))
+
+
+def csq_value(variant: str | bytes, key: str = CSQ_KEY) -> str | None:
+    """
+    Raw CSQ value of a VCF record, found without parsing the rest of INFO
+    """
+    return find_info_value(raw_info_column(variant), key)
+
+
+class CsqParser:
+    """
+    Extract selected CSQ subfields, one tuple per transcript
+    """
+
+    def __init__(self, all_fields: list[str], fields: list[str] | None = None):
+        fields = fields or all_fields
+
+        missing = [field for field in fields if field not in all_fields]
+        if missing:
+            raise ValueError(f"Not CSQ subfields: {', '.join(missing)}")
+
+        self.all_fields = all_fields
+        self.fields = fields
+        self.gene_field = next((f for f in GENE_FIELDS if f in all_fields), None)
+
+        # Also pick what most_severe_per_gene needs, even if not requested
+        needed = [CONSEQUENCE, self.gene_field]
+        self._picked = fields + [f for f in needed if f in all_fields and f not in fields]
+        self._hidden = len(self._picked) > len(fields)
+
+        indices = [all_fields.index(field) for field in self._picked]
+        self._maxsplit = max(indices) + 1
+        self._width = len(all_fields)
+        self._pick = _tuple_getter(indices)
+
+    @classmethod
+    def from_header(cls, header: Header, fields: list[str] | None = None) -> "CsqParser":
+        return cls(csq_fields(header), fields)
+
+    def _split(self, value: str | None) -> list[tuple[str, ...]]:
+        if not value:
+            return []
+
+        transcripts = []
+        for transcript in value.split(","):
+            subfields = transcript.split("|", self._maxsplit)
+
+            if len(subfields) < self._maxsplit:
+                # Truncated entry, pad missing trailing subfields
+                subfields += [""] * (self._width - len(subfields))
+
+            transcripts.append(self._pick(subfields))
+
+        return transcripts
+
+    def transcripts(self, value: str | None) -> list[tuple[str, ...]]:
+        transcripts = self._split(value)
+
+        if self._hidden:
+            n_fields = len(self.fields)
+            return [transcript[:n_fields] for transcript in transcripts]
+
+        return transcripts
+
+    def most_severe_per_gene(self, value: str | None) -> list[tuple[str, ...]]:
+        """
+        Most severe transcript for every gene, genes in order of appearance
+        """
+        if CONSEQUENCE not in self._picked or self.gene_field is None:
+            raise ValueError(f"CSQ needs {CONSEQUENCE} and one of {GENE_FIELDS} subfields")
+
+        consequence_idx = self._picked.index(CONSEQUENCE)
+        gene_idx = self._picked.index(self.gene_field)
+        n_fields = len(self.fields)
+
+        genes = {}
+        for transcript in self._split(value):
+            rank = severity(transcript[consequence_idx])
+            gene = transcript[gene_idx]
+
+            if gene not in genes or rank < genes[gene][0]:
+                genes[gene] = (rank, transcript[:n_fields])
+
+        return [transcript for _, transcript in genes.values()]
+
+
+def iter_csq_rows(
+    variants: Iterable[str], parser: CsqParser, most_severe: bool = False
+) -> Iterator[list[str]]:
+    """
+    [CHROM, POS, REF, ALT, *subfields] per transcript (or per gene w/ most_severe)
+    """
+    extract = parser.most_severe_per_gene if most_severe else parser.transcripts
+
+    for variant in variants:
+        fields = variant.split("\t", VCF_FIELDS.ALT + 1)
+        record_id = [fields[VCF_FIELDS.CHROM], fields[VCF_FIELDS.POS]]
+        record_id += [fields[VCF_FIELDS.REF], fields[VCF_FIELDS.ALT]]
+
+        for transcript in extract(csq_value(variant)):
+            yield record_id + list(transcript)
+
+
+def csq_arrays(
+    rows: Iterable[list[str]], fields: list[str], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> dict[str, np.ndarray]:
+    """
+    CHROM/POS/REF/ALT + CSQ subfield columns from iter_csq_rows output.
+
+    Rows are converted chunk_size at a time, so only one chunk of them is
+    held as Python strings.
+    """
+    columns = ["CHROM", "POS", "REF", "ALT"] + fields
+    dtypes = {name: np.int64 if name == "POS" else str for name in columns}
+    parts = {name: [] for name in columns}
+
+    rows = iter(rows)
+    while batch := list(islice(rows, chunk_size)):
+        for name, column in zip(columns, zip(*batch)):
+            parts[name].append(np.array(column, dtype=dtypes[name]))
+
+    return {
+        name: np.concatenate(parts[name]) if parts[name] else np.array([], dtype=dtypes[name])
+        for name in columns
+    }
+
+
+def split_header(lines: Iterator[str]) -> tuple[Header, Iterator[str]]:
+    """
+    Read header lines off a line stream, returns (Header, remaining record lines)
+    """
+    header_lines = []
+
+    for line in lines:
+        if not line.startswith("#"):
+            return Header(header_lines), chain([line], lines)
+        header_lines.append(line)
+
+    return Header(header_lines), iter(())
+
+
+def _tuple_getter(indices: list[int]):
+    if len(indices) == 1:
+        getter = itemgetter(indices[0])
+        return lambda subfields: (getter(subfields),)
+
+    return itemgetter(*indices)
@@ -0,0 +1,181 @@
+"""
+Binned density of score pairs, for comparing scores of millions of variants.
+
+Pairs are buffered in small batches and binned into a fixed 2D histogram and
+a histogram of their differences, so memory and drawing time don't depend
+on the number of pairs. Scores outside the range go into the edge bins.
+"""
+import numpy as np
+from uniplot import plot
+
+BATCH_SIZE = 65536
+# Lightest to darkest, for log scaled counts
+SHADES = " .:-=+*#%@"
+
+
+class ScorePairDensity:
+    """
+    2D histogram of (score1, score2) in bins x rows cells over low..high,
+    and counts of integer differences score2 - score1
+    """
+
+    def __init__(self, low: int, high: int, bins: int, rows: int | None = None):
+        if high <= low:
+            raise ValueError(f"Empty score range: {low}-{high}")
+
+        self.low = low
+        self.high = high
+        self.x_edges = np.linspace(low, high, bins + 1)
+        self.y_edges = np.linspace(low, high, (rows or max(bins // 2, 1)) + 1)
+        self.counts = np.zeros((len(self.y_edges) - 1, bins), dtype=np.int64)
+
+        # Integer score differences, one bin each
+        span = high - low
+        self.diff_edges = np.arange(-span - 0.5, span + 1.5)
+        self.diff_counts = np.zeros(len(self.diff_edges) - 1, dtype=np.int64)
+
+        self.n_pairs = 0
+        self.n_identical = 0
+        self.n_clipped = 0
+        self.n_missing = [0, 0]
+
+        self._batch = np.empty((BATCH_SIZE, 2), dtype=np.float64)
+        self._batch_size = 0
+
+    def add(self, score1, score2) -> None:
+        """
+        Count one pair. "NA"/None scores are counted as missing from that file
+        """
+        missing1 = score1 is None or score1 == "NA"
+        missing2 = score2 is None or score2 == "NA"
+
+        if missing1 or missing2:
+            self.n_missing[0] += missing1
+            self.n_missing[1] += missing2
+            return
+
+        self._batch[self._batch_size] = (score1, score2)
+        self._batch_size += 1
+
+        if self._batch_size == BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._batch_size:
+            return
+
+        x, y = self._batch[: self._batch_size].T
+        diff = y - x
+
+        in_range = (x >= self.low) & (x <= self.high) & (y >= self.low) & (y <= self.high)
+        self.n_clipped += int(np.count_nonzero(~in_range))
+        self.n_identical += int(np.count_nonzero(diff == 0))
+        self.n_pairs += self._batch_size
+
+        x = np.clip(x, self.low, self.high)
+        y = np.clip(y, self.low, self.high)
+        counts, _, _ = np.histogram2d(y, x, bins=[self.y_edges, self.x_edges])
+        self.counts += counts.astype(np.int64)
+
+        diff = np.clip(diff, self.diff_edges[0], self.diff_edges[-1])
+        self.diff_counts += np.histogram(diff, bins=self.diff_edges)[0]
+
+        self._batch_size = 0
+
+    def render(self, title: str, x_label: str, y_label: str, mark: int | None = None) -> str:
+        """
+        Text heatmap, score1 on x and score2 on y, darker = more pairs (log scaled)
+        """
+        self.flush()
+
+        n_rows, n_columns = self.counts.shape
+        max_count = self.counts.max()
+        levels = np.zeros(self.counts.shape, dtype=np.int64)
+
+        if max_count:
+            scaled = np.log1p(self.counts) / np.log1p(max_count)
+            levels = np.ceil(scaled * (len(SHADES) - 1)).astype(np.int64)
+
+        mark_column = _bin_index(self.x_edges, mark)
+        mark_row = _bin_index(self.y_edges, mark)
+        label_width = max(len(str(self.low)), len(str(self.high)))
+
+        lines = [title, f"{y_label} (y) vs {x_label} (x)", ""]
+
+        for row in range(n_rows - 1, -1, -1):
+            cells = []
+            for column in range(n_columns):
+                shade = SHADES[levels[row, column]]
+
+                if shade == " " and column == mark_column:
+                    shade = "|"
+                elif shade == " " and row == mark_row:
+                    shade = "-"
+
+                cells.append(shade)
+
+            if row == n_rows - 1:
+                label = str(self.high)
+            elif row == 0:
+                label = str(self.low)
+            else:
+                label = ""
+
+            lines.append(f"{label:>{label_width}} │{''.join(cells)}")
+
+        lines.append(" " * label_width + " └" + "─" * n_columns)
+        axis = f"{self.low}".ljust(n_columns - len(str(self.high))) + f"{self.high}"
+        lines.append(" " * (label_width + 2) + axis)
+        lines.append(f"shades: '{SHADES}' = 0 .. {max_count} pairs per cell (log scale)")
+
+        return "\n".join(lines)
+
+    def plot_differences(self, title: str, width: int = 100, height: int = 15) -> None:
+        """
+        Histogram of score2 - score1, drawn from the bin counts
+        """
+        self.flush()
+
+        # Only the span holding differences, with a bin of margin
+        nonzero = np.flatnonzero(self.diff_counts)
+        if not len(nonzero):
+            return
+
+        first, last = max(nonzero[0] - 1, 0), min(nonzero[-1] + 1, len(self.diff_counts) - 1)
+        edges = self.diff_edges[first : last + 2]
+        counts = self.diff_counts[first : last + 1]
+
+        # Steps, like uniplot.histogram draws them
+        xs = np.repeat(edges, 2)[1:-1]
+        ys = np.repeat(counts, 2)
+
+        plot(
+            xs=xs,
+            ys=ys,
+            title=title,
+            lines=True,
+            x_gridlines=[0],
+            width=width,
+            height=height,
+        )
+
+    def summary(self) -> list[str]:
+        self.flush()
+
+        return [
+            f"Pairs scored in both files: {self.n_pairs}",
+            f"Identical scores: {self.n_identical} ({_pct(self.n_identical, self.n_pairs)})",
+            f"Outside {self.low}..{self.high}, drawn at the edges: {self.n_clipped}",
+            f"No score in file 1: {self.n_missing[0]}, in file 2: {self.n_missing[1]}",
+        ]
+
+
+def _bin_index(edges: np.ndarray, value: int | None) -> int | None:
+    if value is None or not edges[0] <= value <= edges[-1]:
+        return None
+
+    return min(int(np.searchsorted(edges, value, side="right")) - 1, len(edges) - 2)
+
+
+def _pct(count: int, total: int) -> str:
+    return f"{count / total:.1%}" if total else "NA"
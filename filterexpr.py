@@ -0,0 +1,206 @@
+"""
+Compiled INFO filter expressions, e.g.
+
+    CLNSIG==Pathogenic && RankScore>=17 && GNOMADAF<0.01
+
+Clauses are KEY OP VALUE (OP one of == != >= <= > <), KEY (is set) or !KEY
+(is not set), joined by &&. A clause that can't hold unless some substring is
+in the raw line (KEY==VALUE needs "KEY=VALUE") rejects on a plain substring
+check, before INFO is looked at. Clauses are reordered at runtime to run
+the ones rejecting the most rows first.
+
+== and != compare numbers when VALUE is a number, so RankScore==17 holds
+for RankScore=fam1:17 and CADD==20 for CADD=20.0.
+"""
+import operator
+import re
+from typing import Callable
+
+from variants import RawInfo, raw_info_column
+
+REORDER_INTERVAL = 4096
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+}
+
+CLAUSE_PATTERN = re.compile(
+    r"^\s*(?P<negate>!?)\s*(?P<key>[A-Za-z_][\w.]*)\s*"
+    r"(?:(?P<op>==|!=|>=|<=|>|<)\s*(?P<value>.+?))?\s*$"
+)
+
+
+class FilterExpressionError(ValueError):
+    pass
+
+
+class Clause:
+    __slots__ = ("key", "op", "value", "number", "needle", "needle_bytes", "checked", "rejected")
+
+    def __init__(self, key: str, op: str | None, value: str | None):
+        self.key = key
+        self.op = op
+        self.value = value
+        self.number = _as_number(value) if op not in (None, "!") else None
+
+        if op in (">=", "<=", ">", "<") and self.number is None:
+            raise FilterExpressionError(f"{key}{op}{value}: not a number")
+
+        # Substring that has to be in the line for the clause to possibly hold
+        if op == "==" and self.number is None:
+            self.needle = f"{key}={value}"
+        elif op == "==":
+            # Numbers may be written differently (20 vs 20.0, fam1:17)
+            self.needle = f"{key}="
+        elif op is None:
+            self.needle = key
+        elif op in (">=", "<=", ">", "<"):
+            self.needle = f"{key}="
+        else:
+            self.needle = None
+
+        self.needle_bytes = self.needle.encode() if self.needle else None
+        self.checked = 0
+        self.rejected = 0
+
+    def __repr__(self) -> str:
+        if self.op is None:
+            return self.key
+        if self.op == "!":
+            return f"!{self.key}"
+        return f"{self.key}{self.op}{self.value}"
+
+    def prefilter(self, row: str | bytes) -> bool:
+        if self.needle is None:
+            return True
+
+        needle = self.needle_bytes if isinstance(row, bytes) else self.needle
+        return needle in row
+
+    def matches(self, info: RawInfo) -> bool:
+        value = info.get(self.key)
+
+        if self.op is None:
+            return value is not None
+
+        if self.op == "!":
+            return value is None
+
+        if self.op == "!=":
+            if self.number is None or value is None or value is True:
+                return value != self.value
+            return _as_number(value) != self.number
+
+        if value is None or value is True:
+            return False
+
+        if self.op == "==" and self.number is None:
+            return value == self.value
+
+        number = _as_number(value)
+        return number is not None and OPERATORS[self.op](number, self.number)
+
+
+class CompiledFilter:
+    """
+    Predicate on raw VCF rows (str or bytes), usable with VCF.add_filter
+    """
+
+    accepts_bytes = True
+
+    def __init__(self, expression: str, clauses: list[Clause]):
+        self.expression = expression
+        self.clauses = clauses
+        self._calls = 0
+
+    def __repr__(self) -> str:
+        return f"CompiledFilter({self.expression!r})"
+
+    def __call__(self, row: str | bytes) -> bool:
+        self._calls += 1
+        if self._calls % REORDER_INTERVAL == 0:
+            self.reorder()
+
+        for clause in self.clauses:
+            clause.checked += 1
+            if not clause.prefilter(row):
+                clause.rejected += 1
+                return False
+
+        # Only the clauses' own keys are looked up (and decoded), INFO isn't split
+        info = RawInfo(raw_info_column(row))
+
+        for clause in self.clauses:
+            if not clause.matches(info):
+                clause.rejected += 1
+                return False
+
+        return True
+
+    def reorder(self) -> None:
+        """
+        Most rejecting clauses first, judged by the rows seen so far
+        """
+        self.clauses.sort(key=lambda clause: clause.rejected / max(clause.checked, 1), reverse=True)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            repr(clause): {"checked": clause.checked, "rejected": clause.rejected}
+            for clause in self.clauses
+        }
+
+
+def accepts_bytes(filter_function: Callable) -> Callable:
+    """
+    Mark a row predicate as also taking bytes rows (VCF.get_rows(as_bytes=True)).
+
+    Unmarked predicates are handed decoded rows in bytes mode.
+    """
+    filter_function.accepts_bytes = True
+    return filter_function
+
+
+def compile_filter(expression: str) -> CompiledFilter:
+    clauses = [_parse_clause(clause) for clause in expression.split("&&")]
+    return CompiledFilter(expression, clauses)
+
+
+def _parse_clause(clause: str) -> Clause:
+    match = CLAUSE_PATTERN.match(clause)
+
+    if match is None:
+        raise FilterExpressionError(f"Can't parse filter clause: {clause.strip()!r}")
+
+    key, op, value = match.group("key", "op", "value")
+
+    if match.group("negate"):
+        if op is not None:
+            raise FilterExpressionError(f"! only negates a bare key: {clause.strip()!r}")
+        op = "!"
+
+    if value is not None:
+        value = value.strip("\"'")
+
+    return Clause(key, op, value)
+
+
+def _as_number(value: str | None) -> float | None:
+    """
+    First value of a (possibly multi valued) INFO field as a number.
+
+    family_id:score values (RankScore) give the score.
+    """
+    if value is None:
+        return None
+
+    value = value.split(",", 1)[0].rsplit(":", 1)[-1]
+
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -1,12 +1,30 @@
 import logging
 
+import click
+
 from constants import CLNSIG, INFO_FIELDS
-from variants import get_info_field
+from filterexpr import (
+    CompiledFilter,
+    FilterExpressionError,
+    accepts_bytes,
+    compile_filter,
+)
 
 LOG = logging.getLogger(__name__)
 
+_CLNSIG_PATHOGENIC = compile_filter(f"{INFO_FIELDS.CLINVAR_SIGNIFICANCE}=={CLNSIG.PATHOGENIC}")
+
+
+@accepts_bytes
+def only_clnsg_pathogenic(vcf_row: str | bytes) -> bool:
+    return _CLNSIG_PATHOGENIC(vcf_row)
 
-def only_clnsg_pathogenic(vcf_row: str) -> bool:
-    clnsg = get_info_field(vcf_row, INFO_FIELDS.CLINVAR_SIGNIFICANCE)
 
-    return clnsg == CLNSIG.PATHOGENIC
+def filter_expressions_option(ctx, param, value: tuple[str, ...]) -> list[CompiledFilter]:
+    """
+    click callback compiling repeated --filter expressions
+    """
+    try:
+        return [compile_filter(expression) for expression in value]
+    except FilterExpressionError as e:
+        raise click.BadParameter(str(e)) from e
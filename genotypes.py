@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Batched extraction of FORMAT keys of the sample columns into NumPy arrays.
+
+Arrays are records x samples, with a third axis of values per sample for
+keys with more than one value (e.g. AD). Only the requested keys (and
+samples) are parsed.
+
+GT becomes int8 codes, the number of non-reference alleles (0/0 = 0,
+0/1 = 1, 1/1 and 1/2 = 2, haploid 1 = 1), MISSING_GT if any allele is
+missing. Integer keys are int32 with MISSING_INT for missing values, Float
+keys float32 with NaN and other keys object arrays of strings.
+
+Keys with Number=R/A/G get max_alleles (REF + ALTs) values per sample:
+extra values of multiallelic records are dropped, missing ones padded.
+Number=. keys keep their first value.
+
+    for chunk in vcf.to_genotypes(["GT", "DP"], fields=["POS"]):
+        de_novo = (chunk["GT"][:, child] == 1) & (chunk["GT"][:, parents] == 0).all(axis=1)
+"""
+from itertools import islice
+from typing import Callable, Generator, Iterable
+
+import click
+import numpy as np
+import prettytable
+
+from columns import DEFAULT_CHUNK_SIZE, MISSING_INT, column_builder
+from constants import VCF_FIELDS
+from variants import Info
+from vcffile import VCF
+
+GENOTYPE = "GT"
+MISSING_GT = -1
+DEFAULT_MAX_ALLELES = 2
+QC_KEYS = [GENOTYPE, "DP", "GQ"]
+# Lines are split from the right, into site columns, FORMAT and samples
+SITE_COLUMNS = 0
+FORMAT_COLUMN = 1
+N_SITE_COLUMNS = 8
+
+
+def iter_genotypes(
+    vcf,
+    keys: list[str],
+    samples: list[str] | None = None,
+    fields: list[str] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_alleles: int = DEFAULT_MAX_ALLELES,
+    variants: Iterable | None = None,
+) -> Generator[dict[str, np.ndarray], None, None]:
+    """
+    Yield {key: array} for every chunk_size records of vcf (or of variants).
+
+    samples selects and orders sample columns (default: all), fields adds
+    columns.py columns of the same records.
+    """
+    n_samples = len(vcf.header.samples)
+    sample_columns = _sample_columns(vcf.header.samples, samples)
+    converters = {key: _converter(vcf, key, max_alleles) for key in keys}
+    builders = {field: column_builder(vcf, field) for field in fields or []}
+    info_types = vcf.get_info_types()
+    layouts = {}
+
+    if variants is None:
+        variants = vcf.variants(_skip_progress=True)
+
+    variants = iter(variants)
+
+    while batch := list(islice(variants, chunk_size)):
+        # Long INFO columns aren't split unless fields need them
+        if n_samples:
+            records = [variant.rstrip("\n").rsplit("\t", n_samples + 1) for variant in batch]
+            # Lines missing trailing sample columns would split off site columns
+            for idx, variant in enumerate(batch):
+                if variant.count("\t") < n_samples + N_SITE_COLUMNS:
+                    records[idx] = _short_record(variant)
+        else:
+            # Sites only, a FORMAT split would take INFO instead
+            records = [[variant.rstrip("\n")] for variant in batch]
+        values = _same_format_values(records, sample_columns, keys)
+
+        if values is None:
+            values = _record_values(records, sample_columns, keys, layouts)
+
+        shape = (len(batch), len(sample_columns))
+        chunk = {key: convert(values[key], shape) for key, convert in converters.items()}
+
+        if builders:
+            columns = [record[SITE_COLUMNS].split("\t") for record in records]
+            infos = [Info(c[VCF_FIELDS.INFO], info_types) for c in columns]
+            chunk.update({field: build(columns, infos) for field, build in builders.items()})
+
+        yield chunk
+
+
+def _same_format_values(
+    records: list[list[str]], sample_columns: list[int], keys: list[str]
+) -> dict[str, list[str]] | None:
+    """
+    {key: values} when all records share a FORMAT and no sample drops
+    trailing keys (the usual case), else None
+    """
+    if not sample_columns:
+        return {key: [] for key in keys}
+
+    formats = {record[FORMAT_COLUMN] for record in records if len(record) > FORMAT_COLUMN}
+    if len(formats) != 1 or min(map(len, records)) <= max(sample_columns):
+        return None
+
+    format_keys = formats.pop().split(":")
+    n_keys = len(format_keys)
+
+    # All sample columns split at once, n_keys values each
+    parts = ":".join(record[column] for record in records for column in sample_columns).split(":")
+    if len(parts) != len(records) * len(sample_columns) * n_keys:
+        return None
+
+    values = {}
+    for key in keys:
+        if key in format_keys:
+            values[key] = parts[format_keys.index(key) :: n_keys]
+        else:
+            values[key] = ["."] * (len(records) * len(sample_columns))
+
+    return values
+
+
+def _record_values(
+    records: list[list[str]], sample_columns: list[int], keys: list[str], layouts: dict
+) -> dict[str, list[str]]:
+    """
+    {key: values}, splitting sample columns record by record
+    """
+    values = {key: [] for key in keys}
+
+    for record in records:
+        format_keys = record[FORMAT_COLUMN] if len(record) > FORMAT_COLUMN else ""
+
+        layout = layouts.get(format_keys)
+        if layout is None:
+            layout = layouts[format_keys] = _layout(format_keys, keys)
+
+        key_indexes, maxsplit = layout
+
+        for column in sample_columns:
+            parts = record[column].split(":", maxsplit) if column < len(record) else []
+            n_parts = len(parts)
+
+            for key, idx in key_indexes:
+                values[key].append(parts[idx] if idx < n_parts else ".")
+
+    return values
+
+
+def _short_record(variant: str) -> list[str]:
+    """
+    A line with fewer sample columns than the header split like full ones,
+    the missing columns left out
+    """
+    columns = variant.rstrip("\n").split("\t")
+    return ["\t".join(columns[:N_SITE_COLUMNS])] + columns[N_SITE_COLUMNS:]
+
+
+def _sample_columns(header_samples: list[str], samples: list[str] | None) -> list[int]:
+    if samples is None:
+        return list(range(FORMAT_COLUMN + 1, FORMAT_COLUMN + 1 + len(header_samples)))
+
+    missing = [sample for sample in samples if sample not in header_samples]
+    if missing:
+        raise ValueError(f"No such sample(s): {', '.join(missing)}")
+
+    return [FORMAT_COLUMN + 1 + header_samples.index(sample) for sample in samples]
+
+
+def _layout(format_keys: str, keys: list[str]) -> tuple[list[tuple[str, int]], int]:
+    """
+    (key, index in FORMAT) of keys, and how far sample columns need splitting
+    """
+    format_keys = format_keys.split(":")
+    # Keys not in FORMAT get an index past any split, i.e. missing
+    key_indexes = [
+        (key, format_keys.index(key) if key in format_keys else len(format_keys) + 1)
+        for key in keys
+    ]
+    maxsplit = max((idx for _, idx in key_indexes if idx < len(format_keys)), default=-1) + 1
+
+    return key_indexes, maxsplit
+
+
+def _converter(vcf, key: str, max_alleles: int) -> Callable:
+    if key == GENOTYPE:
+        return _genotype_array
+
+    meta = vcf.header.format.get(key, {})
+    width = _values_per_sample(meta.get("Number", "."), max_alleles)
+    format_type = meta.get("Type", "String")
+
+    if format_type == "Integer":
+        return lambda values, shape: _number_array(values, shape, width, np.int32)
+
+    if format_type == "Float":
+        return lambda values, shape: _number_array(values, shape, width, np.float32)
+
+    if width == 1:
+        return lambda values, shape: np.array(values, dtype=object).reshape(shape)
+
+    return lambda values, shape: np.array(
+        [_padded(value.split(","), width) for value in values], dtype=object
+    ).reshape(shape + (width,))
+
+
+def _values_per_sample(number: str, max_alleles: int) -> int:
+    if number == "R":
+        return max_alleles
+    if number == "A":
+        return max(max_alleles - 1, 1)
+    if number == "G":
+        return max_alleles * (max_alleles + 1) // 2
+    if number.isdigit() and int(number) > 0:
+        return int(number)
+
+    return 1
+
+
+def _genotype_array(values: list[str], shape: tuple[int, int]) -> np.ndarray:
+    # Few distinct genotype strings, code each once
+    genotypes, inverse = np.unique(np.array(values), return_inverse=True)
+    codes = np.array([_genotype_code(genotype) for genotype in genotypes], dtype=np.int8)
+    return codes[inverse].reshape(shape)
+
+
+def _genotype_code(genotype: str) -> int:
+    alleles = genotype.replace("|", "/").split("/")
+
+    if "." in alleles or "" in alleles:
+        return MISSING_GT
+
+    return sum(allele != "0" for allele in alleles)
+
+
+def _number_array(values: list[str], shape: tuple[int, int], width: int, dtype: type) -> np.ndarray:
+    if width == 1:
+        # Number=1, or only the first value
+        if "," in "".join(values):
+            values = [value.split(",", 1)[0] for value in values]
+        return _typed(values, dtype).reshape(shape)
+
+    items = ",".join(values).split(",")
+    if len(items) != len(values) * width:
+        # Some samples with fewer or more values than width
+        items = [item for value in values for item in _padded(value.split(","), width)]
+
+    return _typed(items, dtype).reshape(shape + (width,))
+
+
+def _typed(values: list[str], dtype: type) -> np.ndarray:
+    """
+    Strings to dtype, "." and "" to MISSING_INT/NaN
+    """
+    missing = str(MISSING_INT) if dtype is np.int32 else "nan"
+
+    if "." in values or "" in values:
+        values = [missing if value in (".", "") else value for value in values]
+
+    if dtype is np.int32:
+        return np.array(values, dtype=np.int64).astype(np.int32)
+
+    return np.array(values, dtype=np.float64).astype(dtype)
+
+
+def _padded(values: list[str], width: int) -> list[str]:
+    if len(values) >= width:
+        return values[:width]
+
+    return values + ["."] * (width - len(values))
+
+
+class SampleQC:
+    """
+    Per sample genotype and depth counters over GT/DP/GQ chunks
+    """
+
+    def __init__(self, n_samples: int):
+        self.records = 0
+        self.called = np.zeros(n_samples, dtype=np.int64)
+        self.genotypes = np.zeros((n_samples, 3), dtype=np.int64)
+        self.dp_sum = np.zeros(n_samples, dtype=np.int64)
+        self.dp_n = np.zeros(n_samples, dtype=np.int64)
+        self.gq_sum = np.zeros(n_samples, dtype=np.int64)
+        self.gq_n = np.zeros(n_samples, dtype=np.int64)
+
+    def add(self, chunk: dict[str, np.ndarray], min_gq: int = 0) -> None:
+        genotypes, dp, gq = chunk[GENOTYPE], chunk["DP"], chunk["GQ"]
+        has_dp, has_gq = dp != MISSING_INT, gq != MISSING_INT
+
+        called = genotypes != MISSING_GT
+        if min_gq:
+            called &= has_gq & (gq >= min_gq)
+
+        self.records += len(genotypes)
+        self.called += called.sum(axis=0)
+        for code in range(3):
+            self.genotypes[:, code] += (called & (genotypes == code)).sum(axis=0)
+
+        self.dp_sum += np.where(has_dp, dp, 0).sum(axis=0, dtype=np.int64)
+        self.dp_n += has_dp.sum(axis=0)
+        self.gq_sum += np.where(has_gq, gq, 0).sum(axis=0, dtype=np.int64)
+        self.gq_n += has_gq.sum(axis=0)
+
+    def get_table(self, samples: list[str]):
+        table = prettytable.PrettyTable(
+            ["sample", "records", "call_rate", "hom_ref", "het", "hom_alt", "het/hom_alt"]
+            + ["mean_DP", "mean_GQ"]
+        )
+        table.align = "r"
+        table.align["sample"] = "l"
+
+        for idx, sample in enumerate(samples):
+            hom_ref, het, hom_alt = self.genotypes[idx].tolist()
+            table.add_row(
+                [
+                    sample,
+                    self.records,
+                    _pct(int(self.called[idx]), self.records),
+                    hom_ref,
+                    het,
+                    hom_alt,
+                    f"{het / hom_alt:.2f}" if hom_alt else "NA",
+                    _mean(int(self.dp_sum[idx]), int(self.dp_n[idx])),
+                    _mean(int(self.gq_sum[idx]), int(self.gq_n[idx])),
+                ]
+            )
+
+        return table
+
+
+@click.command(help="Per sample genotype QC: call rate, genotype counts, mean DP and GQ")
+@click.argument("vcf_file", type=click.Path(exists=True))
+@click.option(
+    "--samples",
+    "-s",
+    default=None,
+    help="Comma separated samples (default: all).",
+)
+@click.option(
+    "--min-gq",
+    default=0,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Count genotypes with a lower GQ as missing.",
+)
+def sample_qc(vcf_file: str, samples: str | None, min_gq: int):
+    vcf = VCF(vcf_file)
+    if not vcf.header.samples:
+        raise click.ClickException(f"{vcf_file} has no sample columns")
+
+    samples = samples.split(",") if samples else vcf.header.samples
+    qc = SampleQC(len(samples))
+
+    try:
+        for chunk in vcf.to_genotypes(QC_KEYS, samples):
+            qc.add(chunk, min_gq)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    print(qc.get_table(samples))
+
+
+def _mean(total: int, n: int) -> str:
+    return f"{total / n:.1f}" if n else "NA"
+
+
+def _pct(count: int, total: int) -> str:
+    return f"{count / total:.1%}" if total else "NA"
+
+
+if __name__ == "__main__":
+    sample_qc()
@@ -0,0 +1,92 @@
+"""
+Parsed VCF header.
+
+Structured meta lines (##INFO=<...>, ##FORMAT=<...>, ##FILTER=<...>,
+##contig=<...>) are split on commas outside quoted values, so Descriptions
+may contain both "," and "=".
+"""
+
+
+class Header:
+    def __init__(self, lines: list[str]):
+        self.lines = lines
+
+        self.info: dict[str, dict[str, str]] = {}
+        self.format: dict[str, dict[str, str]] = {}
+        self.filter: dict[str, dict[str, str]] = {}
+        self.contigs: dict[str, dict[str, str]] = {}
+        self.meta: dict[str, list[str]] = {}
+        self.samples: list[str] = []
+
+        sections = {
+            "INFO": self.info,
+            "FORMAT": self.format,
+            "FILTER": self.filter,
+            "contig": self.contigs,
+        }
+
+        for line in lines:
+            line = line.rstrip("\n")
+
+            if line.startswith("#CHROM"):
+                self.samples = line.split("\t")[9:]
+                continue
+
+            key, _, value = line.removeprefix("##").partition("=")
+
+            if key in sections and value.startswith("<"):
+                fields = parse_structured_value(value)
+                sections[key][fields.get("ID", "")] = fields
+                continue
+
+            self.meta.setdefault(key, []).append(value)
+
+    def info_types(self) -> dict[str, tuple[str, str]]:
+        return {
+            info_id: (meta.get("Number", "."), meta.get("Type", "String"))
+            for info_id, meta in self.info.items()
+        }
+
+    def contig_lengths(self) -> dict[str, int | None]:
+        return {
+            contig: int(meta["length"]) if "length" in meta else None
+            for contig, meta in self.contigs.items()
+        }
+
+
+def parse_structured_value(value: str) -> dict[str, str]:
+    """
+    <ID=X,Number=1,Description="a, b=c"> -> {"ID": "X", "Number": "1", "Description": "a, b=c"}
+    """
+    value = value.strip()
+    value = value.removeprefix("<").removesuffix(">")
+
+    fields = {}
+    key = []
+    current = []
+    in_quotes = False
+    escaped = False
+    in_key = True
+
+    for char in value:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif in_quotes and char == "\\":
+            escaped = True
+        elif char == '"':
+            in_quotes = not in_quotes
+        elif in_quotes:
+            current.append(char)
+        elif in_key and char == "=":
+            key, current, in_key = current, [], False
+        elif char == ",":
+            fields["".join(key)] = "".join(current)
+            key, current, in_key = [], [], True
+        else:
+            current.append(char)
+
+    if key or current:
+        fields["".join(key)] = "".join(current)
+
+    return fields
@@ -2,67 +2,267 @@
 
 import logging
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 
 import click
+import numpy as np
 import prettytable
 
-from util import print_percent_done
-from variants import get_info_field
+from chunks import Chunk
+from columns import defined_field
+from util import expand_vcf_paths, print_percent_done
+from variants import info_keys
 from vcffile import VCF
 
 logging.basicConfig(level=logging.INFO, format="[%(asctime)s][%(levelname)s]: %(message)s")
 
 LOG = logging.getLogger(__name__)
 
+CHUNKS_PER_WORKER = 8
+
 
 @click.command(help="Checks if INFO fields are defined in variants")
-@click.argument("vcf_file", type=click.Path(exists=True))
-def check_vcf(vcf_file):
-    LOG.info("HELLO.")
-    LOG.info("Checking: %s", vcf_file)
-    vcf = VCF(vcf_file)
+@click.argument("vcf_files", nargs=-1, type=str)
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="File listing VCF paths, one per line.",
+)
+@click.option(
+    "--workers",
+    "-j",
+    default=1,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Number of processes counting chunks of the file(s).",
+)
+@click.option(
+    "--per-chromosome",
+    is_flag=True,
+    default=False,
+    help="Also print completeness per chromosome.",
+)
+@click.option(
+    "--cache",
+    is_flag=True,
+    default=False,
+    help="Cache which INFO fields are defined per variant on disk, reuse on later runs.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Column cache directory (default: $VCF_CACHE_DIR or ~/.cache/vcf).",
+)
+def check_vcf(vcf_files, manifest, workers, per_chromosome, cache, cache_dir):
+    """
+    Print INFO field completeness for one or more VCF files (paths or glob patterns).
+
+    Chunks of all files are counted on one shared pool of workers.
+    """
+    try:
+        vcf_files = expand_vcf_paths(vcf_files, manifest)
+    except FileNotFoundError as e:
+        raise click.BadParameter(str(e), param_hint="VCF_FILES") from e
 
-    LOG.info("Calculating nbr variants.")
-    n_variants = vcf.nbr_variants(skip_mito=True)
+    if not vcf_files:
+        raise click.UsageError("Give at least one VCF file or --manifest")
+
+    LOG.info("HELLO.")
+    LOG.info("Checking: %s", ", ".join(vcf_files))
+    vcfs = [VCF(vcf_file) for vcf_file in vcf_files]
 
-    LOG.info("Processing %s variants", n_variants)
     LOG.warning("Skipping mito variants!")
 
-    table = get_completeness_table()
+    info_fields = [list(vcf.header.info) for vcf in vcfs]
 
-    header = vcf.get_header()
-    header = [row for row in header if row.startswith("##INFO")]
+    if cache:
+        counts = [
+            count_cached_info_fields(vcf, fields, cache_dir)
+            for vcf, fields in zip(vcfs, info_fields)
+        ]
+    else:
+        counts = count_info_fields_many(vcfs, info_fields, workers)
 
-    info_fields = [x.split("=")[2].split(",")[0] for x in header]
-    counter = Counter()
+    multiple_files = len(vcfs) > 1
+    table = get_completeness_table(multiple_files)
+    chromosome_tables = []
 
-    for info_key in info_fields:
-        counter.setdefault(info_key, 0)
+    for vcf, fields, (variant_counts, key_counts) in zip(vcfs, info_fields, counts):
+        n_variants = sum(variant_counts.values())
 
-    for idx, variant in enumerate(vcf.get_rows(skip_mito=True)):
-        print_percent_done(idx, n_variants - 1)
+        LOG.info("Processed %s variants in %s", n_variants, vcf.vcf_file)
 
-        for key in info_fields:
-            counter[key] += info_field_defined_in_variant(variant, key)
+        counter = Counter()
 
-    for k, v in counter.items():
-        table.add_row([k, v, f"{v/n_variants * 100:.1f}%"])
+        for info_key in fields:
+            counter.setdefault(info_key, 0)
+
+        for (_, info_key), count in key_counts.items():
+            counter[info_key] += count
+
+        rows = [[k, v, _pct(v, n_variants)] for k, v in counter.items()]
+
+        if multiple_files:
+            # Ordered by file, then count, instead of sorting the whole table
+            rows.sort(key=lambda row: row[1], reverse=True)
+            rows = [[vcf.vcf_file] + row for row in rows]
+
+        table.add_rows(rows)
+
+        if per_chromosome:
+            chromosome_tables.append(get_chromosome_table(fields, variant_counts, key_counts))
 
     print(table)
 
+    for vcf, chromosome_table in zip(vcfs, chromosome_tables):
+        if multiple_files:
+            print(vcf.vcf_file)
+        print(chromosome_table)
+
+
+def count_info_fields(
+    vcf: VCF, info_fields: list[str], workers: int = 1
+) -> tuple[Counter, Counter]:
+    """
+    Single pass over vcf, counted in chunks by a pool of workers processes.
+
+    Returns records per chromosome and defined INFO keys per (chromosome, key).
+    """
+    return count_info_fields_many([vcf], [info_fields], workers)[0]
+
+
+def count_info_fields_many(
+    vcfs: list[VCF], info_fields: list[list[str]], workers: int = 1
+) -> list[tuple[Counter, Counter]]:
+    """
+    count_info_fields for several files, chunks of all files sharing one pool.
+
+    Files are split so there are about workers * CHUNKS_PER_WORKER chunks in total.
+    """
+    chunks_per_file = max(1, -(-workers * CHUNKS_PER_WORKER // len(vcfs)))
+
+    vcf_files = []
+    chunks = []
+    fields_per_chunk = []
+    file_idxs = []
+
+    for file_idx, (vcf, fields) in enumerate(zip(vcfs, info_fields)):
+        file_chunks = vcf.plan_chunks(chunks_per_file)
+        vcf_files += [vcf.vcf_file] * len(file_chunks)
+        chunks += file_chunks
+        fields_per_chunk += [fields] * len(file_chunks)
+        file_idxs += [file_idx] * len(file_chunks)
+
+    counts = [(Counter(), Counter()) for _ in vcfs]
+
+    def _merge(chunk_results):
+        for idx, (chunk_variant_counts, chunk_key_counts) in enumerate(chunk_results):
+            print_percent_done(idx, len(chunks), title="Counting chunks")
+            variant_counts, key_counts = counts[file_idxs[idx]]
+            variant_counts.update(chunk_variant_counts)
+            key_counts.update(chunk_key_counts)
+
+    if workers == 1:
+        _merge(map(count_chunk, vcf_files, chunks, fields_per_chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            _merge(executor.map(count_chunk, vcf_files, chunks, fields_per_chunk))
+
+    return counts
+
 
-def get_completeness_table():
-    table = prettytable.PrettyTable(["info_field", "count", "pct_complete"])
+def count_cached_info_fields(
+    vcf: VCF, info_fields: list[str], cache_dir: str | None = None
+) -> tuple[Counter, Counter]:
+    """
+    Same counts as count_info_fields, from cached "is defined" columns
+    """
+    fields = ["CHROM"] + [defined_field(info_key) for info_key in info_fields]
+    columns = vcf.load_arrays(fields, cache_dir)
+
+    chroms = np.asarray(columns["CHROM"], dtype=str)
+    not_mito = ~np.char.startswith(chroms, "M")
+    chrom_names, first_seen, chrom_idx = np.unique(
+        chroms[not_mito], return_index=True, return_inverse=True
+    )
+    chrom_order = np.argsort(first_seen)
+
+    variant_counts = Counter()
+    key_counts = Counter()
+
+    per_chrom = np.bincount(chrom_idx, minlength=len(chrom_names))
+    for idx in chrom_order:
+        variant_counts[str(chrom_names[idx])] = int(per_chrom[idx])
+
+    for info_key in info_fields:
+        defined = np.asarray(columns[defined_field(info_key)])[not_mito]
+        per_chrom = np.bincount(chrom_idx, weights=defined, minlength=len(chrom_names))
+        for idx in chrom_order:
+            if per_chrom[idx]:
+                key_counts[(str(chrom_names[idx]), info_key)] = int(per_chrom[idx])
+
+    return variant_counts, key_counts
+
+
+def count_chunk(vcf_file: str, chunk: Chunk, info_fields: list[str]) -> tuple[Counter, Counter]:
+    vcf = VCF(vcf_file)
+    declared = {info_key.encode() for info_key in info_fields}
+
+    variant_counts = Counter()
+    key_counts = Counter()
+
+    # Counted on undecoded lines, only the (few distinct) keys are decoded
+    for variant in vcf.get_chunk_rows(chunk, skip_mito=True, as_bytes=True):
+        chrom = variant[: variant.find(b"\t")]
+        variant_counts[chrom] += 1
+        key_counts.update((chrom, key) for key in info_keys(variant) if key in declared)
+
+    variant_counts = Counter({chrom.decode(): n for chrom, n in variant_counts.items()})
+    key_counts = Counter(
+        {(chrom.decode(), key.decode()): n for (chrom, key), n in key_counts.items()}
+    )
+
+    return variant_counts, key_counts
+
+
+def get_completeness_table(multiple_files: bool = False):
+    if multiple_files:
+        table = prettytable.PrettyTable(["file", "info_field", "count", "pct_complete"])
+        table.align["file"] = "l"
+    else:
+        table = prettytable.PrettyTable(["info_field", "count", "pct_complete"])
+        table.sortby = "count"
+        table.reversesort = True
+
+    table.align["info_field"] = "l"
+    table.align["count"] = "r"
+    table.align["pct_complete"] = "r"
+    return table
+
+
+def get_chromosome_table(info_fields: list[str], variant_counts: Counter, key_counts: Counter):
+    table = prettytable.PrettyTable(["chrom", "variants", "info_field", "count", "pct_complete"])
+    table.align["chrom"] = "l"
     table.align["info_field"] = "l"
+    table.align["variants"] = "r"
     table.align["count"] = "r"
     table.align["pct_complete"] = "r"
-    table.sortby = "count"
-    table.reversesort = True
+
+    for chrom, n_variants in variant_counts.items():
+        for info_key in info_fields:
+            count = key_counts[(chrom, info_key)]
+            table.add_row([chrom, n_variants, info_key, count, _pct(count, n_variants)])
+
     return table
 
 
-def info_field_defined_in_variant(variant: str, info_key: str) -> bool:
-    return get_info_field(variant, info_key) is not None
+def _pct(count: int, total: int) -> str:
+    if not total:
+        return "NA"
+
+    return f"{count/total * 100:.1f}%"
 
 
 if __name__ == "__main__":
@@ -1,54 +1,174 @@
 #!/usr/bin/env python3
 
-import csv
-import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 import click
 
-from variants import get_info_field
+from filters import filter_expressions_option
+from output import COMPRESSIONS, open_output, tsv_writer
+from regions import Region, merge_regions, parse_region, read_bed
+from util import expand_vcf_paths
+from variants import Variant
 from vcffile import VCF
 
 
-@click.command(help="Get INFO field for specific variant")
-@click.argument("vcf_file", type=click.Path(exists=True))
-@click.argument("chrom_range", type=str)
+@click.command(help="Get INFO field for variants in one or more regions")
+@click.argument("vcf_file", type=str)
+@click.argument("chrom_ranges", nargs=-1, type=str)
 @click.argument("info_key", type=str)
-def get_info_fields(vcf_file, chrom_range, info_key):
+@click.option(
+    "--vcf",
+    "extra_vcf_files",
+    multiple=True,
+    type=str,
+    help="More VCF files (or quoted glob patterns) to query. Can be repeated.",
+)
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="File listing more VCF paths, one per line.",
+)
+@click.option(
+    "--workers",
+    "-j",
+    default=1,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Number of processes querying files concurrently.",
+)
+@click.option(
+    "--bed",
+    "bed_files",
+    multiple=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="BED file with regions, name column used as REGION. Can be repeated.",
+)
+@click.option(
+    "--filter",
+    "filter_expressions",
+    multiple=True,
+    callback=filter_expressions_option,
+    help='Only records matching an INFO expression, e.g. "RankScore>=17 && GNOMADAF<0.01".',
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    default="-",
+    help="Output file (default: stdout). Paths ending in .gz are BGZF compressed.",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(COMPRESSIONS),
+    default=None,
+    help="Output compression (default: from the output file name).",
+)
+def get_info_fields(
+    vcf_file,
+    chrom_ranges,
+    info_key,
+    extra_vcf_files,
+    manifest,
+    workers,
+    bed_files,
+    filter_expressions,
+    output,
+    compression,
+):
     """
-    Process VCF files with a given chromosomal range.
+    Print an INFO field for all variants in the given regions.
 
     Args:
-    vcf_files: A list of VCF file paths
-    chrom_range: A string specifying the chromosomal range in the format 'chrom:start-end'
+    vcf_file: VCF file path, or quoted glob pattern
+    chrom_ranges: Regions in the format 'chrom:start-end'
+    info_key: INFO field to print
+
+    Overlapping regions are merged and answered in one pass over the file,
+    or one index seek per merged region. Rows are tagged with the name(s)
+    of the region(s) they fall in.
+
+    With several files, they are queried concurrently by workers processes
+    and output in the order given.
     """
+    try:
+        vcf_files = expand_vcf_paths([vcf_file, *extra_vcf_files], manifest)
+    except FileNotFoundError as e:
+        raise click.BadParameter(str(e), param_hint="VCF_FILE") from e
+
+    try:
+        regions = [parse_region(chrom_range) for chrom_range in chrom_ranges]
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="CHROM_RANGES") from e
+
+    for bed_file in bed_files:
+        regions += read_bed(bed_file)
+
+    if not regions:
+        raise click.UsageError("Give at least one region or --bed file")
+
+    with open_output(output, compression) as out:
+        writer = tsv_writer(out)
+        writer.writerow(["FILE", "REGION", "CHROM", "POS", "REF", "ALT", info_key])
+
+        if workers == 1 or len(vcf_files) == 1:
+            for path in vcf_files:
+                write_info_rows(writer, path, regions, info_key, filter_expressions)
+            return
+
+        with tempfile.TemporaryDirectory() as tmp_dir, ProcessPoolExecutor(
+            max_workers=min(workers, len(vcf_files))
+        ) as executor:
+            tmp_files = [os.path.join(tmp_dir, f"{idx}.tsv") for idx in range(len(vcf_files))]
+            results = executor.map(
+                partial(_info_rows_to_file, regions, info_key, filter_expressions),
+                vcf_files,
+                tmp_files,
+            )
+
+            # Copy each file's rows as soon as it and all files before it are done
+            for tmp_file in results:
+                out.flush()
+                with open(tmp_file) as rows:
+                    shutil.copyfileobj(rows, out)
+                os.remove(tmp_file)
 
+
+def write_info_rows(
+    writer, vcf_file: str, regions: list[Region], info_key: str, filters: list | None = None
+) -> None:
     vcf = VCF(vcf_file)
+    for filter_function in filters or []:
+        vcf.add_filter(filter_function)
+
+    merged_regions = merge_regions(regions, list(vcf.header.contigs))
+
+    info_types = vcf.get_info_types()
+
+    for region, record in vcf.get_regions(merged_regions, _skip_progress=True):
+        variant = Variant(record, info_types)
+        region_names = ",".join(region.names_at(variant.pos))
+        chrom, pos, ref, alt = variant.id_fields
+
+        value = variant.info.get(info_key)
+        if value is True or not value:
+            # Flags and empty values (KEY=) are NA, as absent keys
+            value = "NA"
+
+        writer.writerow([vcf_file, region_names, chrom, pos, ref, alt, value])
+
+
+def _info_rows_to_file(
+    regions: list[Region], info_key: str, filters: list, vcf_file: str, tmp_file: str
+) -> str:
+    with open(tmp_file, "w", newline="") as out:
+        write_info_rows(tsv_writer(out), vcf_file, regions, info_key, filters)
 
-    # Example of how to split the chromosomal range
-    chrom, range_part = chrom_range.split(":")
-    start, end = range_part.split("-")
-
-    records = vcf.get_range(chrom, int(start), int(end), _skip_progress=True)
-    stdout = io.StringIO()
-
-    fieldnames = ["FILE", "CHROM", "POS", "REF", "ALT", info_key]
-
-    tsv_writer = csv.DictWriter(stdout, delimiter="\t", fieldnames=fieldnames)
-    tsv_writer.writeheader()
-    for record in records:
-        info_val = get_info_field(record, info_key) or "NA"
-        record = record.split("\t")
-        row = {
-            "FILE": vcf_file,
-            "CHROM": record[0],
-            "POS": record[1],
-            "REF": record[3],
-            "ALT": record[4],
-        }
-        row[info_key] = info_val
-        tsv_writer.writerow(row)
-
-    print(stdout.getvalue())
+    return tmp_file
 
 
 if __name__ == "__main__":
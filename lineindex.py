@@ -0,0 +1,274 @@
+"""
+Memory-mapped reading and a persisted record offset index for plain .vcf files.
+
+The index (<vcf>.lidx) holds the byte offset of every record, every record's
+POS and the record range of every contig. For coordinate sorted files a
+region is found by binary search on POS, then read straight from the map.
+Unsorted files still get offsets, e.g. for splitting them between workers.
+
+Layout, little endian: magic, header (records, contigs, sorted flag, VCF
+size and mtime_ns), NUL separated contig names, per contig its first and
+end record, then n_records + 1 uint64 offsets (the last one is where the
+final record ends) and n_records int32 positions.
+"""
+import io
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+LINE_INDEX_MAGIC = b"VLI\x01"
+LINE_INDEX_SUFFIX = ".lidx"
+
+_HEADER = struct.Struct("<4sqi?qq")
+
+
+class MmapReader:
+    """
+    Binary line reader over a memory-mapped file, with byte offset seek/tell
+    like BgzfReader's virtual offsets
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._handle = open(path, "rb")
+
+        if os.fstat(self._handle.fileno()).st_size:
+            self._map = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # Empty files can't be mapped
+            self._map = io.BytesIO()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._handle.close()
+
+    def seek(self, offset: int) -> None:
+        self._map.seek(offset)
+
+    def tell(self) -> int:
+        return self._map.tell()
+
+    def readline(self) -> bytes:
+        return self._map.readline()
+
+    def __iter__(self):
+        while line := self._map.readline():
+            yield line
+
+    def lines(self, start: int, end: int):
+        """
+        Lines starting within [start, end), start being the start of a line
+        """
+        mapped = self._map
+        mapped.seek(start)
+
+        while mapped.tell() < end:
+            line = mapped.readline()
+
+            if not line:
+                return
+
+            yield line
+
+
+class LineIndex:
+    """
+    Record byte offsets, positions and per-contig record ranges of a plain VCF.
+
+    stamp is the (size, mtime_ns) of the VCF when it was indexed.
+    """
+
+    def __init__(
+        self,
+        offsets: array,
+        positions: array,
+        contigs: dict[str, tuple[int, int]],
+        is_sorted: bool,
+        stamp: tuple[int, int] = (0, 0),
+    ):
+        self.offsets = offsets
+        self.positions = positions
+        self.contigs = contigs
+        self.is_sorted = is_sorted
+        self.stamp = stamp
+
+    @property
+    def n_records(self) -> int:
+        return len(self.positions)
+
+    @classmethod
+    def build(cls, path: str) -> "LineIndex":
+        """
+        Index a plain VCF, in one pass over its mapped lines
+        """
+        offsets = array("Q")
+        positions = array("i")
+        contigs = {}
+        is_sorted = True
+
+        chrom, first, previous_pos = None, 0, 0
+
+        with MmapReader(path) as reader:
+            offset = 0
+
+            for line in reader:
+                if line.startswith(b"#") or line.isspace():
+                    # Headers, and blank lines between records
+                    offset += len(line)
+                    continue
+
+                line_chrom, line_pos, _ = line.split(b"\t", 2)
+                pos = int(line_pos)
+
+                if line_chrom != chrom:
+                    if chrom is not None:
+                        contigs[chrom.decode()] = (first, len(positions))
+
+                    if line_chrom.decode() in contigs:
+                        is_sorted = False
+
+                    chrom, first = line_chrom, len(positions)
+
+                elif pos < previous_pos:
+                    is_sorted = False
+
+                offsets.append(offset)
+                positions.append(pos)
+                offset += len(line)
+                previous_pos = pos
+
+        if chrom is not None:
+            contigs[chrom.decode()] = (first, len(positions))
+
+        # End of the last record
+        offsets.append(offset)
+        stat = os.stat(path)
+
+        return cls(offsets, positions, contigs, is_sorted, (stat.st_size, stat.st_mtime_ns))
+
+    @classmethod
+    def from_file(cls, path: str) -> "LineIndex":
+        with open(path, "rb") as index_file:
+            data = index_file.read()
+
+        magic, n_records, n_contigs, is_sorted, size, mtime_ns = _HEADER.unpack_from(data)
+        if magic != LINE_INDEX_MAGIC:
+            raise ValueError(f"Not a line index: {path}")
+
+        offset = _HEADER.size
+        (names_length,) = struct.unpack_from("<i", data, offset)
+        offset += 4
+        names = data[offset : offset + names_length].decode().split("\0")[:n_contigs]
+        offset += names_length
+
+        ranges = struct.unpack_from(f"<{2 * n_contigs}q", data, offset)
+        offset += 16 * n_contigs
+        contigs = {name: (ranges[2 * i], ranges[2 * i + 1]) for i, name in enumerate(names)}
+
+        offsets = _read_array("Q", data, offset, n_records + 1)
+        offset += 8 * (n_records + 1)
+        positions = _read_array("i", data, offset, n_records)
+
+        return cls(offsets, positions, contigs, is_sorted, (size, mtime_ns))
+
+    def to_bytes(self) -> bytes:
+        names = "\0".join(self.contigs).encode() + b"\0"
+        ranges = [idx for first_end in self.contigs.values() for idx in first_end]
+
+        data = [
+            _HEADER.pack(
+                LINE_INDEX_MAGIC,
+                self.n_records,
+                len(self.contigs),
+                self.is_sorted,
+                *self.stamp,
+            ),
+            struct.pack("<i", len(names)),
+            names,
+            struct.pack(f"<{len(ranges)}q", *ranges),
+            _array_bytes(self.offsets),
+            _array_bytes(self.positions),
+        ]
+        return b"".join(data)
+
+    def write(self, path: str) -> None:
+        with open(path, "wb") as index_file:
+            index_file.write(self.to_bytes())
+
+    def is_current(self, vcf_path: str) -> bool:
+        """
+        Whether the indexed file is unchanged since indexing
+        """
+        stat = os.stat(vcf_path)
+        return self.stamp == (stat.st_size, stat.st_mtime_ns)
+
+    def record_range(self, chromosome: str, start: int, end: int) -> tuple[int, int]:
+        """
+        [first, end) record numbers of chromosome:start-end (1-based, inclusive)
+        """
+        if not self.is_sorted:
+            raise ValueError("Region queries need a coordinate sorted VCF")
+
+        first, last = self.contigs.get(chromosome, (0, 0))
+        lo = bisect_left(self.positions, start, first, last)
+        hi = bisect_right(self.positions, end, lo, last)
+
+        return lo, hi
+
+    def byte_range(self, chromosome: str, start: int, end: int) -> tuple[int, int]:
+        first, last = self.record_range(chromosome, start, end)
+        return self.offsets[first], self.offsets[last]
+
+    def record_counts(self) -> dict[str, int] | None:
+        if not self.is_sorted:
+            return None
+
+        return {name: last - first for name, (first, last) in self.contigs.items()}
+
+    def split(self, n_chunks: int) -> list[tuple[int, int]]:
+        """
+        Byte ranges of about n_records / n_chunks records, on record boundaries
+        """
+        n_chunks = max(min(n_chunks, self.n_records), 1)
+        bounds = [self.n_records * i // n_chunks for i in range(n_chunks + 1)]
+
+        return [(self.offsets[lo], self.offsets[hi]) for lo, hi in zip(bounds, bounds[1:])]
+
+
+def line_index_path(path_to_vcf: str) -> str:
+    return f"{path_to_vcf}{LINE_INDEX_SUFFIX}"
+
+
+def find_line_index(path_to_vcf: str) -> str | None:
+    """
+    Path of the VCF's line index, if there is one
+    """
+    index_path = line_index_path(path_to_vcf)
+    return index_path if os.path.isfile(index_path) else None
+
+
+def _read_array(typecode: str, data: bytes, offset: int, length: int) -> array:
+    values = array(typecode)
+    values.frombytes(data[offset : offset + values.itemsize * length])
+
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    return values
+
+
+def _array_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+
+    return values.tobytes()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Load test for a running server.py: concurrent random region queries on all
+served files, reporting throughput, latency percentiles and cache hit rates.
+
+    python server.py cohort/*.vcf.gz &
+    python loadtest.py -n 5000 -c 16 --repeat-fraction 0.5 --info CADD
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import prettytable
+
+from client import DEFAULT_URL, ServerError, VCFClient
+
+
+@click.command(help="Load test a running server.py")
+@click.option("--url", default=DEFAULT_URL, show_default=True, help="Server address.")
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Server Unix socket, instead of --url.",
+)
+@click.option("--requests", "-n", "n_requests", default=1000, show_default=True, type=int)
+@click.option("--concurrency", "-c", default=8, show_default=True, type=click.IntRange(min=1))
+@click.option("--region-size", default=100_000, show_default=True, type=click.IntRange(min=1))
+@click.option(
+    "--repeat-fraction",
+    default=0.0,
+    show_default=True,
+    type=click.FloatRange(0, 1),
+    help="Fraction of queries repeating an earlier region (result cache hits).",
+)
+@click.option("--info", "-i", default=None, help="Comma separated INFO keys to request.")
+@click.option("--seed", default=0, show_default=True, type=int)
+def loadtest(url, socket_path, n_requests, concurrency, region_size, repeat_fraction, info, seed):
+    with VCFClient(url, socket_path) as client:
+        try:
+            files = client.files()
+            stats_before = client.stats()
+        except (OSError, ServerError) as e:
+            raise click.ClickException(f"Can't reach server: {e}")
+
+    queries = plan_queries(files, n_requests, region_size, repeat_fraction, seed)
+    if not queries:
+        raise click.ClickException("No contigs with a length in the served files' headers")
+
+    info_keys = info.split(",") if info else None
+    clients = threading.local()
+    opened = []
+    opened_lock = threading.Lock()
+
+    def _query(query: tuple[str, str]) -> tuple[float, int, bool]:
+        if not hasattr(clients, "client"):
+            clients.client = VCFClient(url, socket_path)
+            with opened_lock:
+                opened.append(clients.client)
+
+        start = time.perf_counter()
+        try:
+            records = clients.client.range(*query, info=info_keys)
+        except (OSError, ServerError):
+            return time.perf_counter() - start, 0, False
+
+        return time.perf_counter() - start, len(records), True
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(_query, queries))
+    seconds = time.perf_counter() - start
+
+    for client in opened:
+        client.close()
+
+    with VCFClient(url, socket_path) as client:
+        stats_after = client.stats()
+
+    print(get_report_table(results, seconds, concurrency, stats_before, stats_after))
+
+
+def plan_queries(
+    files: dict, n_requests: int, region_size: int, repeat_fraction: float, seed: int
+) -> list[tuple[str, str]]:
+    """
+    (file, "chrom:start-end") for random regions, some repeating earlier ones
+    """
+    rng = random.Random(seed)
+    targets = [
+        (name, chrom, length)
+        for name, meta in files.items()
+        for chrom, length in meta["contigs"].items()
+        if length
+    ]
+
+    if not targets:
+        return []
+
+    queries = []
+    for _ in range(n_requests):
+        if queries and rng.random() < repeat_fraction:
+            queries.append(rng.choice(queries))
+            continue
+
+        name, chrom, length = rng.choice(targets)
+        start = rng.randint(1, max(length - region_size, 1))
+        queries.append((name, f"{chrom}:{start}-{start + region_size}"))
+
+    return queries
+
+
+def get_report_table(
+    results: list[tuple[float, int, bool]],
+    seconds: float,
+    concurrency: int,
+    stats_before: dict,
+    stats_after: dict,
+):
+    latencies = sorted(latency for latency, _, _ in results)
+    cache_before, cache_after = stats_before["cache"], stats_after["cache"]
+    hits = cache_after["hits"] - cache_before["hits"]
+    lookups = hits + cache_after["misses"] - cache_before["misses"]
+
+    table = prettytable.PrettyTable(["metric", "value"])
+    table.align["metric"] = "l"
+    table.align["value"] = "r"
+    table.add_rows(
+        [
+            ["requests", len(results)],
+            ["errors", sum(1 for _, _, ok in results if not ok)],
+            ["concurrency", concurrency],
+            ["seconds", f"{seconds:.2f}"],
+            ["requests/s", f"{len(results) / seconds:.1f}" if seconds else "NA"],
+            ["records returned", sum(n_records for _, n_records, _ in results)],
+            ["latency p50 ms", _ms(_percentile(latencies, 50))],
+            ["latency p90 ms", _ms(_percentile(latencies, 90))],
+            ["latency p99 ms", _ms(_percentile(latencies, 99))],
+            ["latency max ms", _ms(latencies[-1] if latencies else None)],
+            ["cache hit rate", f"{hits / lookups:.1%}" if lookups else "NA"],
+            ["cache MB", f"{cache_after['bytes'] / 1024**2:.1f}"],
+            ["cache evictions", cache_after["evictions"] - cache_before["evictions"]],
+        ]
+    )
+    return table
+
+
+def _percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def _ms(seconds: float | None) -> str:
+    return "NA" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+if __name__ == "__main__":
+    loadtest()
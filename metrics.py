@@ -0,0 +1,235 @@
+"""
+Throughput metrics for VCF reads, and rate-limited progress display.
+
+Set VCF_METRICS to a file path (or "-" for stderr) to time every read pass
+and get a JSON summary of all passes when the process exits:
+
+    VCF_METRICS=metrics.json python rankresult.py sample.vcf.gz
+
+Per pass: records read/yielded, compressed and decompressed bytes (and
+MB/s), time spent inflating (gzip/BGZF; waiting for inflated blocks with
+threads), splitting lines, in filters and downstream (the caller's own
+processing), and pass/reject counts per filter, keyed by position and
+expression (e.g. "1:RankScore>=5"). Without VCF_METRICS nothing is timed.
+"""
+import atexit
+import json
+import os
+import sys
+import time
+from typing import Callable, Iterable, Iterator
+
+from util import print_percent_done
+
+METRICS_ENV = "VCF_METRICS"
+PROGRESS_INTERVAL = 0.5
+# Records between checks of the clock for progress updates
+PROGRESS_CHECK_EVERY = 4096
+
+_runs: list["ReadMetrics"] = []
+_summary_path: str | None = None
+
+
+def enable(path: str = "-") -> None:
+    """
+    Collect metrics for all following reads, written to path ("-" = stderr) at exit
+    """
+    global _summary_path
+
+    if _summary_path is None:
+        atexit.register(write_summary)
+
+    _summary_path = path
+
+
+def enabled() -> bool:
+    return _summary_path is not None
+
+
+def start_read(path: str, kind: str = "sequential") -> "ReadMetrics | None":
+    if not enabled():
+        return None
+
+    metrics = ReadMetrics(path, kind)
+    _runs.append(metrics)
+    return metrics
+
+
+class ReadMetrics:
+    """
+    Counters and timers of one read pass over a VCF
+    """
+
+    def __init__(self, path: str, kind: str):
+        self.path = path
+        self.kind = kind
+        self.records_read = 0
+        self.records_yielded = 0
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        # read_seconds includes inflate_seconds, reported apart
+        self.read_seconds = 0.0
+        self.inflate_seconds = 0.0
+        self.filter_seconds = 0.0
+        self.filters: dict[str, dict[str, int]] = {}
+        self.filter_details: dict[str, dict] = {}
+
+        self._started = time.perf_counter()
+        self._wall_seconds = None
+        self._filter_functions = []
+
+    def timed_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Pass lines through, timing how long each takes to read
+        """
+        lines = iter(lines)
+        clock = time.perf_counter
+
+        while True:
+            before = clock()
+            line = next(lines, None)
+            self.read_seconds += clock() - before
+
+            if line is None:
+                return
+
+            self.decompressed_bytes += len(line)
+            yield line
+
+    def filter_checker(self, filters: list[Callable]) -> Callable[[str], bool]:
+        """
+        Equivalent of VCF._passes_filters, counting and timing every filter
+        """
+        counts = []
+        for position, filter_function in enumerate(filters, 1):
+            name = _filter_name(position, filter_function)
+            counts.append(self.filters.setdefault(name, {"passed": 0, "rejected": 0}))
+
+        self._filter_functions = filters
+        checks = list(zip(filters, counts))
+        clock = time.perf_counter
+
+        def _passes(row: str) -> bool:
+            self.records_read += 1
+            before = clock()
+
+            try:
+                for filter_function, count in checks:
+                    if not filter_function(row):
+                        count["rejected"] += 1
+                        return False
+                    count["passed"] += 1
+
+                return True
+            finally:
+                self.filter_seconds += clock() - before
+
+        return _passes
+
+    def finish(self, compressed_bytes: int, inflate_seconds: float = 0.0) -> None:
+        self.compressed_bytes = compressed_bytes
+        self.inflate_seconds = inflate_seconds
+        self._wall_seconds = time.perf_counter() - self._started
+
+        for position, filter_function in enumerate(self._filter_functions, 1):
+            if hasattr(filter_function, "stats"):
+                name = _filter_name(position, filter_function)
+                self.filter_details[name] = filter_function.stats()
+
+    def summary(self) -> dict:
+        wall_seconds = self._wall_seconds
+        if wall_seconds is None:
+            wall_seconds = time.perf_counter() - self._started
+
+        return {
+            "path": self.path,
+            "kind": self.kind,
+            "finished": self._wall_seconds is not None,
+            "records_read": self.records_read,
+            "records_yielded": self.records_yielded,
+            "compressed_bytes": self.compressed_bytes,
+            "decompressed_bytes": self.decompressed_bytes,
+            "wall_seconds": round(wall_seconds, 6),
+            "inflate_seconds": round(self.inflate_seconds, 6),
+            "read_seconds": round(max(self.read_seconds - self.inflate_seconds, 0.0), 6),
+            "filter_seconds": round(self.filter_seconds, 6),
+            "downstream_seconds": round(
+                max(wall_seconds - self.read_seconds - self.filter_seconds, 0.0), 6
+            ),
+            "records_per_second": _rate(self.records_read, wall_seconds),
+            "compressed_mb_per_second": _rate(self.compressed_bytes / 1e6, wall_seconds),
+            "decompressed_mb_per_second": _rate(self.decompressed_bytes / 1e6, wall_seconds),
+            "filters": self.filters,
+            "filter_details": self.filter_details,
+        }
+
+
+class Progress:
+    """
+    print_percent_done, but at most every PROGRESS_INTERVAL seconds
+    """
+
+    def __init__(self, total: int, title: str, interval: float = PROGRESS_INTERVAL):
+        self.total = max(total, 1)
+        self.title = title
+        self.interval = interval
+        self._last = 0.0
+
+    def update(self, done: int) -> None:
+        now = time.monotonic()
+
+        if now - self._last < self.interval:
+            return
+
+        self._last = now
+        print_percent_done(min(done, self.total) - 1, self.total, title=self.title)
+
+    def finish(self) -> None:
+        print_percent_done(self.total - 1, self.total, title=self.title)
+        print(file=sys.stderr)
+
+
+def write_summary() -> None:
+    if _summary_path is None or not _runs:
+        return
+
+    runs = [run.summary() for run in _runs]
+    totals = {
+        key: round(sum(run[key] for run in runs), 6)
+        for key in (
+            "records_read",
+            "records_yielded",
+            "compressed_bytes",
+            "decompressed_bytes",
+            "inflate_seconds",
+            "read_seconds",
+            "filter_seconds",
+        )
+    }
+    summary = json.dumps({"runs": runs, "totals": totals}, indent=2)
+
+    if _summary_path == "-":
+        print(summary, file=sys.stderr)
+        return
+
+    with open(_summary_path, "w") as summary_file:
+        summary_file.write(summary + "\n")
+
+
+def _filter_name(position: int, filter_function: Callable) -> str:
+    """
+    Position among the filters, and expression (or function name), so equal names don't share counts
+    """
+    name = getattr(filter_function, "expression", None)
+    if name is None:
+        name = getattr(filter_function, "__qualname__", None) or repr(filter_function)
+
+    return f"{position}:{name}"
+
+
+def _rate(amount: float, seconds: float) -> float | None:
+    return round(amount / seconds, 3) if seconds > 0 else None
+
+
+if os.environ.get(METRICS_ENV):
+    enable(os.environ[METRICS_ENV])
@@ -0,0 +1,61 @@
+"""
+Streaming TSV output for the CLIs.
+
+Rows go through a buffered text writer to stdout or a file, optionally
+gzip or BGZF compressed, so nothing is held in memory and downstream
+consumers start reading right away.
+"""
+import csv
+import gzip
+import io
+import os
+import sys
+from contextlib import ExitStack, contextmanager
+from typing import Iterator, TextIO
+
+from bgzf import BgzfWriter
+
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+COMPRESSIONS = ["none", "gzip", "bgzf"]
+
+
+@contextmanager
+def open_output(path: str | None = None, compression: str | None = None) -> Iterator[TextIO]:
+    """
+    Text handle writing to path, or stdout for None/"-".
+
+    compression defaults to bgzf for paths ending in .gz/.bgz, else none.
+    """
+    to_stdout = path in (None, "-")
+
+    if compression is None:
+        compression = "bgzf" if not to_stdout and path.endswith((".gz", ".bgz")) else "none"
+
+    with ExitStack() as stack:
+        if to_stdout:
+            sys.stdout.flush()
+            handle = sys.stdout.buffer
+        else:
+            handle = stack.enter_context(open(path, "wb", buffering=OUTPUT_BUFFER_SIZE))
+
+        if compression == "gzip":
+            handle = stack.enter_context(gzip.GzipFile(fileobj=handle, mode="wb"))
+        elif compression == "bgzf":
+            handle = stack.enter_context(BgzfWriter(handle))
+
+        output = io.TextIOWrapper(handle, encoding="utf-8", newline="", write_through=False)
+
+        try:
+            yield output
+            output.flush()
+        except BrokenPipeError:
+            if not to_stdout:
+                raise
+            # Consumer (head etc.) went away, stop quietly
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        finally:
+            output.detach()
+
+
+def tsv_writer(output: TextIO):
+    return csv.writer(output, delimiter="\t", lineterminator="\n")
@@ -1,21 +1,22 @@
 #!/usr/bin/env python3
-import csv
 import io
 import logging
-import re
 
 import click
+import numpy as np
 
+from columns import MISSING_INT, rank_keys
 from constants import INFO_FIELDS
-from rankscore import _rankscore
-from variants import get_info_field
+from filters import filter_expressions_option
+from output import COMPRESSIONS, open_output, tsv_writer
+from ranksummary import RankResultSummary
+from variants import Info
 from vcffile import VCF
 
 logging.basicConfig(level=logging.DEBUG)
 
 RANK_SCORE_COL_NAME = "info_field_rank_score"
 RANK_RESULT_SUM_COL_NAME = "rank_result_sum"
-RANK_RESULT_PATTERN = rf"{INFO_FIELDS.RANK_RESULT}=([-\d|\|]+)"
 # REVEL_SCORE_COL_NAME= "REVEL_rankscore"
 # REVEL_RANK_SCORE_COL_NAME= "REVEL_score"
 CLINSIG = "CLNSIG"
@@ -24,6 +25,51 @@ CLINSIG_MOD = "CLNSIG_MOD"
 
 @click.command(help="Output rankresults in TSV")
 @click.argument("vcf_file1", type=click.Path(exists=True))
+@click.option(
+    "--filter",
+    "filter_expressions",
+    multiple=True,
+    callback=filter_expressions_option,
+    help='Only records matching an INFO expression, e.g. "RankScore>=17 && GNOMADAF<0.01".',
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    default="-",
+    help="Output file (default: stdout). Paths ending in .gz are BGZF compressed.",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(COMPRESSIONS),
+    default=None,
+    help="Output compression (default: from the output file name).",
+)
+@click.option(
+    "--cache",
+    is_flag=True,
+    default=False,
+    help="Cache extracted columns on disk and reuse them on later runs.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Column cache directory (default: $VCF_CACHE_DIR or ~/.cache/vcf).",
+)
+@click.option(
+    "--summary",
+    type=click.Choice(["table", "json"]),
+    default=None,
+    help="Output summary statistics per RankResult component instead of rows. "
+    "JSON summaries can be merged with ranksummary.py.",
+)
+@click.option(
+    "--by-clnsig",
+    is_flag=True,
+    default=False,
+    help="Also summarize per CLNSIG value.",
+)
 # @click.option(
 #     "--positions_file",
 #     "-f",
@@ -39,18 +85,25 @@ CLINSIG_MOD = "CLNSIG_MOD"
 #     help="chrname:start-end",
 # )
 def parse_rank_result(
-    vcf_file1: str, positions_file: io.TextIOBase | None = None, position: str | None = None
+    vcf_file1: str,
+    filter_expressions: list | None = None,
+    output: str = "-",
+    compression: str | None = None,
+    cache: bool = False,
+    cache_dir: str | None = None,
+    summary: str | None = None,
+    by_clnsig: bool = False,
+    positions_file: io.TextIOBase | None = None,
+    position: str | None = None,
 ) -> None:
     logging.debug("opening %s", vcf_file1)
     vcf = VCF(vcf_file1)
+    for filter_function in filter_expressions or []:
+        vcf.add_filter(filter_function)
+
     rank_score_components = rank_keys(vcf)
 
     logging.debug("expected rank score components: %s", rank_score_components)
-    output_header = rank_score_components.copy()
-    output_header.append(RANK_RESULT_SUM_COL_NAME)
-    output_header.append(RANK_SCORE_COL_NAME)
-
-    lines = []
 
     tsv_header = (
         ["CHROM", "POS", "REF", "ALT"]
@@ -59,38 +112,67 @@ def parse_rank_result(
         + [RANK_RESULT_SUM_COL_NAME, RANK_SCORE_COL_NAME]
     )
 
-    for variant in vcf.variants(_skip_progress=True):
-        result = get_rankresult(variant)
-
-        if not result:
-            continue
-
-        total_score = sum(int(score) for score in result)
-
-        result.append(total_score)
-        result.append(_rankscore(variant))
-
-        result = dict(zip(output_header, result))
-
-        result[CLINSIG] = get_info_field(variant, CLINSIG)
-        result[CLINSIG_MOD] = get_info_field(variant, CLINSIG_MOD)
-
-        id = get_id_fields(variant)
-
-        id.update(result)
-        lines.append(id)
-
-    stdout = io.StringIO()
-    writer = csv.DictWriter(stdout, fieldnames=tsv_header, delimiter="\t")
-    writer.writeheader()
-    writer.writerows(lines)
-
-    print(stdout.getvalue())
-
+    if summary is not None:
+        rank_result_summary = RankResultSummary(rank_score_components, by_clnsig)
+        rank_result_summary.files.append(vcf_file1)
+        fields = rank_result_summary.fields
+    else:
+        fields = ["CHROM", "POS", "REF", "ALT", INFO_FIELDS.RANK_RESULT, INFO_FIELDS.RANK_SCORE]
+        fields += [CLINSIG, CLINSIG_MOD]
+
+    if cache:
+        chunks = [vcf.load_arrays(fields, cache_dir)]
+    else:
+        chunks = vcf.to_arrays(fields)
+
+    if summary is not None:
+        for chunk in chunks:
+            rank_result_summary.add_chunk(chunk)
+
+        with open_output(output, compression) as out:
+            if summary == "json":
+                rank_result_summary.write_json(out)
+            else:
+                rank_result_summary.write_report(out)
+        return
+
+    with open_output(output, compression) as out:
+        writer = tsv_writer(out)
+        writer.writerow(tsv_header)
+
+        for chunk in chunks:
+            writer.writerows(_rank_result_rows(chunk))
+
+
+def _rank_result_rows(chunk: dict[str, np.ndarray]):
+    """
+    Output rows (in tsv header order) for records w/ a RankResult
+    """
+    rank_results = chunk[INFO_FIELDS.RANK_RESULT]
+    missing = rank_results == MISSING_INT
+    has_rank_result = ~missing.all(axis=1)
+    # Components missing from short RankResults count as 0 and are written as NA
+    total_scores = np.where(missing, 0, rank_results).sum(axis=1, dtype="int64")
+    components = rank_results[has_rank_result].astype(object)
+    components[missing[has_rank_result]] = "NA"
+    rank_scores = chunk[INFO_FIELDS.RANK_SCORE]
+    rank_scores = np.where(rank_scores == MISSING_INT, None, rank_scores)
+
+    rows = zip(
+        chunk["CHROM"][has_rank_result],
+        chunk["POS"][has_rank_result].tolist(),
+        chunk["REF"][has_rank_result],
+        chunk["ALT"][has_rank_result],
+        components.tolist(),
+        total_scores[has_rank_result].tolist(),
+        rank_scores[has_rank_result],
+        chunk[CLINSIG][has_rank_result],
+        chunk[CLINSIG_MOD][has_rank_result],
+    )
 
-def get_id_fields(vcf_row: str) -> dict:
-    vcf_row = vcf_row.split("\t")
-    return dict(CHROM=vcf_row[0], POS=vcf_row[1], REF=vcf_row[3], ALT=vcf_row[4])
+    for chrom, pos, ref, alt, result, total_score, rank_score, clinsig, clinsig_mod in rows:
+        # most_severe_consequence isn't extracted, left empty
+        yield [chrom, pos, ref, alt, *result, clinsig, clinsig_mod, None, total_score, rank_score]
 
 
 def parse_range(chr_range: str):
@@ -104,21 +186,13 @@ def parse_range(chr_range: str):
     return chromosome, start, end
 
 
-def rank_keys(vcf):
-    meta = vcf.get_info_meta(INFO_FIELDS.RANK_RESULT)
-    desc = meta.get("Description")
-    desc = desc.strip('""')
-    return desc.split("|")
-
-
-def get_rankresult(variant: str) -> int | None:
-    match = re.search(RANK_RESULT_PATTERN, variant)
+def get_rankresult(info: Info) -> list[str] | None:
+    result = info.get(INFO_FIELDS.RANK_RESULT)
 
-    if match:
-        result = match.group(1)
-        result = result.split("|")
+    if result is None:
+        return None
 
-    return result
+    return result.split("|")
 
 
 if __name__ == "__main__":
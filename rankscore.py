@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
 
-import gzip
 from collections import defaultdict
 from typing import Callable, Generator
 
 import click
+import numpy as np
 from uniplot import plot
 
+from columns import MISSING_INT
 from constants import INFO_FIELDS
-from filters import only_clnsg_pathogenic
-from vcffile import VCF
+from density import ScorePairDensity
+from filters import filter_expressions_option, only_clnsg_pathogenic
+from vcffile import VCF, ContigOrder, UnsortedVCFError, merge_join_variants
 
-RANK_SCORE_KEY_LEN = len(INFO_FIELDS.RANK_SCORE)
+RANK_SCORE_COLUMNS = ["CHROM", "POS", "REF", "ALT", INFO_FIELDS.RANK_SCORE]
+RANK_SCORE_THRESHOLD = 17
+DEFAULT_DENSITY_RANGE = (-10, 40)
+DEFAULT_DENSITY_BINS = 80
 
 
 @click.command(help="Print nextflow_wgs rank scores for up to two VCF files")
@@ -38,8 +43,23 @@ RANK_SCORE_KEY_LEN = len(INFO_FIELDS.RANK_SCORE)
 @click.option(
     "--output-type",
     default="tsv",
-    type=str,
-    help="Only print variants where scores diff between compared files.",
+    type=click.Choice(["tsv", "plot", "density"]),
+    help="TSV rows, a scatter plot, or a binned density plot (any number of variants).",
+)
+@click.option(
+    "--density-range",
+    nargs=2,
+    type=int,
+    default=DEFAULT_DENSITY_RANGE,
+    show_default=True,
+    help="Score range of the density plot, scores outside are drawn at the edges.",
+)
+@click.option(
+    "--density-bins",
+    default=DEFAULT_DENSITY_BINS,
+    show_default=True,
+    type=click.IntRange(min=2),
+    help="Density plot columns (rows: half as many).",
 )
 @click.option(
     "--only-pathogenic",
@@ -47,6 +67,31 @@ RANK_SCORE_KEY_LEN = len(INFO_FIELDS.RANK_SCORE)
     default=False,
     help="Only pathogenic variants.",
 )
+@click.option(
+    "--filter",
+    "filter_expressions",
+    multiple=True,
+    callback=filter_expressions_option,
+    help='Only records matching an INFO expression, e.g. "RankScore>=17 && GNOMADAF<0.01".',
+)
+@click.option(
+    "--unsorted",
+    is_flag=True,
+    default=False,
+    help="Input is not coordinate sorted, compare in memory instead of streaming.",
+)
+@click.option(
+    "--cache",
+    is_flag=True,
+    default=False,
+    help="Cache extracted rank scores on disk and reuse them on later runs.",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Column cache directory (default: $VCF_CACHE_DIR or ~/.cache/vcf).",
+)
 def rankscore(
     vcf_file1: str,
     vcf_file2: str | None = None,
@@ -54,7 +99,13 @@ def rankscore(
     output_difference: bool = False,
     only_scores_above: int | None = None,
     output_type: str = "tsv",
+    density_range: tuple[int, int] = DEFAULT_DENSITY_RANGE,
+    density_bins: int = DEFAULT_DENSITY_BINS,
     only_pathogenic: bool = False,
+    filter_expressions: list | None = None,
+    unsorted: bool = False,
+    cache: bool = False,
+    cache_dir: str | None = None,
 ) -> None:
     """
     Print comparison of rank scores for two VCF files
@@ -67,63 +118,83 @@ def rankscore(
     if only_pathogenic:
         filters.append(only_clnsg_pathogenic)
 
+    filters += filter_expressions or []
+
     vcf = _setup_vcf(VCF(vcf_file1), filters)
 
     if vcf_file2 is not None:
         vcf2 = _setup_vcf(VCF(vcf_file2), filters)
-        rank_score_data = compare_rank_scores(vcf, vcf2)
 
-    unique_keys = sorted(rank_score_data.keys(), key=lambda x: (x[0], int(x[1]), x[2], x[3]))
+        if unsorted:
+            rank_score_data = compare_rank_scores(vcf, vcf2, cache, cache_dir)
+            rank_score_rows = _sorted_rank_score_rows(rank_score_data, vcf, vcf2)
+        else:
+            rank_score_rows = stream_rank_scores(vcf, vcf2, cache, cache_dir)
 
     files = [vcf.vcf_file, vcf2.vcf_file]
 
     header = ["CHROM", "POS", "REF", "ALT"]
     header += files
 
-    combined = rank_score_data
-
     if output_difference:
         header.append("diff_vcf1_to_vcf2")
         header.append("absolute_difference")
 
-    print("\t".join(header))
+    if output_type == "density":
+        try:
+            density = ScorePairDensity(*density_range, density_bins)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--density-range") from e
+    else:
+        print("\t".join(header))
+
     plot_data = defaultdict(list)
 
-    for key in unique_keys:
-        row = list(key)
+    try:
+        for key, score1, score2 in rank_score_rows:
+            row = list(key)
+
+            if skip_identical and (score1 == score2):
+                continue
 
-        score1 = combined[key].get(files[0], "NA")
-        score2 = combined[key].get(files[1], "NA")
+            if only_scores_above is not None and (
+                score1 < only_scores_above and score2 < only_scores_above
+            ):
+                continue
 
-        if skip_identical and (score1 == score2):
-            continue
+            if output_type == "density":
+                density.add(score1, score2)
+                continue
 
-        if only_scores_above is not None and (
-            score1 < only_scores_above and score2 < only_scores_above
-        ):
-            continue
+            if output_type == "plot":
+                plot_data["x"].append(score1)
+                plot_data["y"].append(score2)
+                continue
 
-        if output_type == "plot":
-            plot_data["x"].append(score1)
-            plot_data["y"].append(score2)
-            continue
+            row.append(score1)
+            row.append(score2)
 
-        row.append(score1)
-        row.append(score2)
+            if output_difference:
+                # TODO: convert back into ints? sure. for now.
 
-        if output_difference:
-            # TODO: convert back into ints? sure. for now.
+                if any(x == "NA" for x in (score1, score2)):
+                    row.append("NA")
+                    row.append("NA")
 
-            if any(x == "NA" for x in (score1, score2)):
-                row.append("NA")
-                row.append("NA")
+                else:
+                    diff = score2 - score1
+                    row.append(diff)
+                    row.append(str(diff).lstrip("-"))
 
-            else:
-                diff = score2 - score1
-                row.append(diff)
-                row.append(str(diff).lstrip("-"))
+            print("\t".join(str(x) for x in row))
+    except UnsortedVCFError as e:
+        raise click.ClickException(f"{e}. Rerun with --unsorted.")
 
-        print("\t".join(str(x) for x in row))
+    if output_type == "density":
+        print(density.render(" vs ".join(files), files[0], files[1], mark=RANK_SCORE_THRESHOLD))
+        print()
+        density.plot_differences(f"Rank score difference, {files[1]} - {files[0]}")
+        print("\n".join(density.summary()))
 
     if output_type == "plot":
         plot_data["x"] = [None if x == "NA" else x for x in plot_data["x"]]
@@ -135,74 +206,107 @@ def rankscore(
             title=files,
             lines=False,
             color=True,
-            x_gridlines=[17],
-            y_gridlines=[17],
+            x_gridlines=[RANK_SCORE_THRESHOLD],
+            y_gridlines=[RANK_SCORE_THRESHOLD],
             width=100,
             height=31,
         )
 
 
-def compare_rank_scores(vcf: VCF, vcf2: VCF) -> dict[tuple, dict[str, int | None]]:
+def compare_rank_scores(
+    vcf: VCF, vcf2: VCF, cache: bool = False, cache_dir: str | None = None
+) -> dict[tuple, dict[str, int | None]]:
     scores_side_by_side = defaultdict(dict)
 
     for curr_vcf in [vcf, vcf2]:
-        scores = reduce_vcf_to_rankscores(curr_vcf)
+        scores = reduce_vcf_to_rankscores(curr_vcf, cache, cache_dir)
         for variant_id, rank_score in scores.items():
             scores_side_by_side[variant_id][curr_vcf.vcf_file] = rank_score
 
     return scores_side_by_side
 
 
-def open_vcf(path_to_vcf: str) -> Generator:
+def stream_rank_scores(
+    vcf: VCF, vcf2: VCF, cache: bool = False, cache_dir: str | None = None
+) -> Generator:
     """
-    Open compressed/uncompressed vcf
+    Sort-merge join of two coordinate sorted VCFs, in constant memory.
+
+    Yields (CHROM, POS, REF, ALT), score1, score2 as soon as a variant is
+    known to be in one or both files. Scores of variants missing from a file are
+    "NA". Raises UnsortedVCFError if either file is not coordinate sorted.
     """
+    contig_order = ContigOrder(vcf.get_contigs() + vcf2.get_contigs())
 
-    def _vcf_file_generator():
-        open_func = gzip.open if path_to_vcf.endswith(".gz") else open
-        with open_func(path_to_vcf, "rt") as vcf_handle:
-            for line in vcf_handle:
-                yield line
+    def _keyed_scores(curr_vcf: VCF) -> Generator:
+        # Joined on position, records at one position need not be sorted on REF/ALT
+        for variant_id, rank_score in rank_score_records(curr_vcf, cache, cache_dir):
+            chrom, pos, ref, alt = variant_id
+            position = (contig_order.rank(chrom), int(pos))
+            yield position, (ref, alt), (variant_id, rank_score)
 
-    return _vcf_file_generator()
+    for left, right in merge_join_variants(_keyed_scores(vcf), _keyed_scores(vcf2)):
+        variant_id = (left or right)[0]
+        score1 = left[1] if left else "NA"
+        score2 = right[1] if right else "NA"
+        yield variant_id, score1, score2
 
 
-def get_id_fields(vcf_row: str) -> tuple[str]:
-    """
-    shrug emoji.
+def _sorted_rank_score_rows(
+    rank_score_data: dict[tuple, dict[str, int | None]], vcf: VCF, vcf2: VCF
+) -> Generator:
+    unique_keys = sorted(rank_score_data.keys(), key=lambda x: (x[0], int(x[1]), x[2], x[3]))
 
-    use namedtuple. move out of this module.
-    maybe convert pos to int already here.
-    """
-    vcf_row = vcf_row.split("\t")
-    return (vcf_row[0], vcf_row[1], vcf_row[3], vcf_row[4])
+    for key in unique_keys:
+        score1 = rank_score_data[key].get(vcf.vcf_file, "NA")
+        score2 = rank_score_data[key].get(vcf2.vcf_file, "NA")
+        yield key, score1, score2
 
 
-def reduce_vcf_to_rankscores(vcf: VCF) -> dict[tuple, int]:
+def reduce_vcf_to_rankscores(
+    vcf: VCF, cache: bool = False, cache_dir: str | None = None
+) -> dict[tuple, int]:
     scores = {}
 
-    for line in vcf.variants():
-        rank = _rankscore(line)
-        key = get_id_fields(line)
+    for key, rank in rank_score_records(vcf, cache, cache_dir):
         scores[key] = rank
 
     return scores
 
 
-def _rankscore(line: str) -> int | None:
-    rank_score_idx = line.find(INFO_FIELDS.RANK_SCORE)
+def rank_score_records(vcf: VCF, cache: bool = False, cache_dir: str | None = None) -> Generator:
+    """
+    (CHROM, POS, REF, ALT), rank score of every variant. Optionally via the column cache.
+    """
+    if not cache:
+        for variant in vcf.variants(as_variants=True, as_bytes=True):
+            yield variant.id_fields, _parse_rankscore(variant.info_value(INFO_FIELDS.RANK_SCORE))
+        return
+
+    columns = vcf.load_arrays(RANK_SCORE_COLUMNS, cache_dir)
+    rank_scores = columns[INFO_FIELDS.RANK_SCORE]
+    rank_scores = np.where(rank_scores == MISSING_INT, None, rank_scores).tolist()
+
+    variant_ids = zip(
+        columns["CHROM"].tolist(),
+        columns["POS"].astype(str).tolist(),
+        columns["REF"].tolist(),
+        columns["ALT"].tolist(),
+    )
+
+    yield from zip(variant_ids, rank_scores)
 
+
+def _parse_rankscore(rank_score: str | None) -> int | None:
     # TODO: should this return "missing"?
     #       instead of None/NA later on
     #       which would be synonymous w/
     #       variant not existing in one of
     #       compared files. dunno.
-    if rank_score_idx < 0:
+    if rank_score is None:
         return None
 
-    score = (
-        line[line.find(INFO_FIELDS.RANK_SCORE) + RANK_SCORE_KEY_LEN :].split(":")[1].split(";")[0]
-    )
+    score = rank_score.split(":")[1]
     return int(score)
 
 
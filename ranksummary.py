@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Summary statistics of RankResult components, accumulated chunk by chunk.
+
+Per component: how many records have it, mean, sd, min, median, max, how
+often it is non-zero, its share of the summed RankResult and its value
+distribution, for all records with a RankResult and optionally per CLNSIG.
+Only counts and sums are kept, so summaries of many VCFs merge exactly:
+
+    python rankresult.py sample1.vcf.gz --summary json -o sample1.json
+    python rankresult.py sample2.vcf.gz --summary json -o sample2.json
+    python ranksummary.py sample1.json sample2.json
+"""
+import json
+from collections import Counter
+
+import click
+import numpy as np
+import prettytable
+
+from columns import MISSING_INT
+from constants import INFO_FIELDS
+from output import open_output
+
+SUMMARY_FORMAT = "rankresult-summary"
+SUMMARY_VERSION = 1
+ALL_RECORDS = "all"
+NO_CLNSIG = "."
+RANK_RESULT_SUM = "RankResult sum"
+# Most common values shown per component in reports
+TOP_VALUES = 4
+
+
+class ColumnStats:
+    """
+    Counts, sums and value counts of integer columns, MISSING_INT = missing
+    """
+
+    def __init__(self, n_columns: int):
+        self.records = 0
+        self.n = np.zeros(n_columns, dtype=np.int64)
+        self.sum = np.zeros(n_columns, dtype=np.int64)
+        self.sum_squares = np.zeros(n_columns, dtype=np.int64)
+        self.nonzero = np.zeros(n_columns, dtype=np.int64)
+        self.values = [Counter() for _ in range(n_columns)]
+
+    def add(self, values: np.ndarray) -> None:
+        """
+        Count a records x columns array
+        """
+        if not len(values):
+            return
+
+        valid = values != MISSING_INT
+        present = np.where(valid, values, 0).astype(np.int64)
+
+        self.records += len(values)
+        self.n += valid.sum(axis=0)
+        self.sum += present.sum(axis=0)
+        self.sum_squares += (present * present).sum(axis=0)
+        self.nonzero += (present != 0).sum(axis=0)
+
+        for column, counter in enumerate(self.values):
+            column_values = values[valid[:, column], column]
+            if len(column_values):
+                unique, counts = np.unique(column_values, return_counts=True)
+                counter.update(dict(zip(unique.tolist(), counts.tolist())))
+
+    def merge(self, other: "ColumnStats") -> None:
+        self.records += other.records
+        self.n += other.n
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        self.nonzero += other.nonzero
+
+        for counter, other_counter in zip(self.values, other.values):
+            counter.update(other_counter)
+
+    def mean(self, column: int) -> float | None:
+        n = int(self.n[column])
+        return int(self.sum[column]) / n if n else None
+
+    def sd(self, column: int) -> float | None:
+        n = int(self.n[column])
+        if n < 2:
+            return None
+
+        # Exact integer sums, no cancellation until the final division
+        variance = (n * int(self.sum_squares[column]) - int(self.sum[column]) ** 2) / (n * (n - 1))
+        return max(variance, 0) ** 0.5
+
+    def minimum(self, column: int) -> int | None:
+        return min(self.values[column]) if self.values[column] else None
+
+    def maximum(self, column: int) -> int | None:
+        return max(self.values[column]) if self.values[column] else None
+
+    def median(self, column: int) -> int | None:
+        counter = self.values[column]
+        seen = 0
+
+        for value in sorted(counter):
+            seen += counter[value]
+            if seen * 2 >= self.n[column]:
+                return value
+
+        return None
+
+    def to_dict(self, names: list[str]) -> dict:
+        return {
+            "records": self.records,
+            "columns": {
+                name: {
+                    "n": int(self.n[column]),
+                    "sum": int(self.sum[column]),
+                    "sum_squares": int(self.sum_squares[column]),
+                    "nonzero": int(self.nonzero[column]),
+                    "values": {str(value): count for value, count in sorted(counter.items())},
+                }
+                for column, (name, counter) in enumerate(zip(names, self.values))
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, names: list[str]) -> "ColumnStats":
+        stats = cls(len(names))
+        stats.records = data["records"]
+
+        for column, name in enumerate(names):
+            column_data = data["columns"][name]
+            stats.n[column] = column_data["n"]
+            stats.sum[column] = column_data["sum"]
+            stats.sum_squares[column] = column_data["sum_squares"]
+            stats.nonzero[column] = column_data["nonzero"]
+            stats.values[column] = Counter(
+                {int(value): count for value, count in column_data["values"].items()}
+            )
+
+        return stats
+
+
+class RankResultSummary:
+    """
+    ColumnStats of the RankResult components, their sum and RankScore, for
+    all records with a RankResult and (by_clnsig) per CLNSIG value
+    """
+
+    def __init__(self, components: list[str], by_clnsig: bool = False):
+        self.components = list(components)
+        self.by_clnsig = by_clnsig
+        self.files: list[str] = []
+        self.records = 0
+        self.groups: dict[str, ColumnStats] = {ALL_RECORDS: ColumnStats(len(self.columns))}
+
+    @property
+    def columns(self) -> list[str]:
+        return self.components + [RANK_RESULT_SUM, INFO_FIELDS.RANK_SCORE]
+
+    @property
+    def fields(self) -> list[str]:
+        """
+        VCF.to_arrays() fields add_chunk() needs
+        """
+        fields = [INFO_FIELDS.RANK_RESULT, INFO_FIELDS.RANK_SCORE]
+        if self.by_clnsig:
+            fields.append(INFO_FIELDS.CLINVAR_SIGNIFICANCE)
+
+        return fields
+
+    def add_chunk(self, chunk: dict[str, np.ndarray]) -> None:
+        """
+        Count a chunk of VCF.to_arrays() columns: RankResult, RankScore (and CLNSIG)
+        """
+        rank_results = chunk[INFO_FIELDS.RANK_RESULT]
+        self.records += len(rank_results)
+
+        has_rank_result = (rank_results != MISSING_INT).any(axis=1)
+        rank_results = rank_results[has_rank_result]
+        totals = np.where(rank_results != MISSING_INT, rank_results, 0).sum(axis=1)
+        values = np.column_stack(
+            [rank_results, totals, chunk[INFO_FIELDS.RANK_SCORE][has_rank_result]]
+        )
+
+        self.groups[ALL_RECORDS].add(values)
+
+        if not self.by_clnsig:
+            return
+
+        clnsig = chunk[INFO_FIELDS.CLINVAR_SIGNIFICANCE][has_rank_result]
+        # Missing is None, an empty "CLNSIG=" entry is ""
+        clnsig = np.array([value or NO_CLNSIG for value in clnsig])
+
+        for value in np.unique(clnsig).tolist():
+            self._group(value).add(values[clnsig == value])
+
+    def merge(self, other: "RankResultSummary") -> None:
+        if other.components != self.components:
+            raise ValueError(
+                f"RankResult components differ: {'|'.join(self.components)} "
+                f"vs {'|'.join(other.components)}"
+            )
+
+        if other.by_clnsig != self.by_clnsig:
+            raise ValueError("Can't merge summaries split by CLNSIG with summaries that aren't")
+
+        self.files += other.files
+        self.records += other.records
+
+        for name, stats in other.groups.items():
+            self._group(name).merge(stats)
+
+    def to_dict(self) -> dict:
+        return {
+            "format": SUMMARY_FORMAT,
+            "version": SUMMARY_VERSION,
+            "components": self.components,
+            "by_clnsig": self.by_clnsig,
+            "files": self.files,
+            "records": self.records,
+            "groups": {name: stats.to_dict(self.columns) for name, stats in self.groups.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RankResultSummary":
+        if data.get("format") != SUMMARY_FORMAT or data.get("version") != SUMMARY_VERSION:
+            raise ValueError(f"Not a version {SUMMARY_VERSION} RankResult summary")
+
+        summary = cls(data["components"], data["by_clnsig"])
+        summary.files = list(data["files"])
+        summary.records = data["records"]
+        summary.groups = {
+            name: ColumnStats.from_dict(stats, summary.columns)
+            for name, stats in data["groups"].items()
+        }
+
+        return summary
+
+    @classmethod
+    def load(cls, path: str) -> "RankResultSummary":
+        with open(path) as summary_file:
+            try:
+                return cls.from_dict(json.load(summary_file))
+            except (ValueError, KeyError) as e:
+                raise ValueError(f"{path}: {e}") from e
+
+    def write_json(self, output) -> None:
+        json.dump(self.to_dict(), output, indent=1)
+        output.write("\n")
+
+    def write_report(self, output) -> None:
+        files = ", ".join(self.files)
+        output.write(f"RankResult summary of {len(self.files)} file(s): {files}\n")
+        output.write(f"Records: {self.records}\n")
+
+        for name, stats in sorted(self.groups.items(), key=_report_order):
+            title = "All records" if name == ALL_RECORDS else f"CLNSIG={name}"
+            output.write(f"\n{title}, {stats.records} with a RankResult\n")
+            output.write(f"{self.get_table(stats)}\n")
+
+    def get_table(self, stats: ColumnStats):
+        table = prettytable.PrettyTable(
+            ["component", "n", "mean", "sd", "min", "median", "max", "nonzero", "share", "values"]
+        )
+        table.align = "r"
+        table.align["component"] = "l"
+        table.align["values"] = "l"
+
+        total_column = self.columns.index(RANK_RESULT_SUM)
+        total = int(stats.sum[total_column])
+
+        for column, name in enumerate(self.columns):
+            # Share of the summed RankResult, for the components
+            share = _pct(int(stats.sum[column]), total) if column < total_column else ""
+
+            table.add_row(
+                [
+                    name,
+                    int(stats.n[column]),
+                    _round(stats.mean(column)),
+                    _round(stats.sd(column)),
+                    _na(stats.minimum(column)),
+                    _na(stats.median(column)),
+                    _na(stats.maximum(column)),
+                    _pct(int(stats.nonzero[column]), int(stats.n[column])),
+                    share,
+                    _top_values(stats.values[column], int(stats.n[column])),
+                ]
+            )
+
+        return table
+
+    def _group(self, name: str) -> ColumnStats:
+        if name not in self.groups:
+            self.groups[name] = ColumnStats(len(self.columns))
+
+        return self.groups[name]
+
+
+@click.command(help="Merge RankResult summaries (rankresult.py --summary json) into one report")
+@click.argument(
+    "summary_files", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False)
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Output the merged summary as JSON, to merge further.",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    default="-",
+    help="Output file (default: stdout).",
+)
+def merge_summaries(summary_files, as_json, output):
+    try:
+        summaries = [RankResultSummary.load(path) for path in summary_files]
+        merged = summaries[0]
+        for summary in summaries[1:]:
+            merged.merge(summary)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    with open_output(output, "none") as out:
+        if as_json:
+            merged.write_json(out)
+        else:
+            merged.write_report(out)
+
+
+def _report_order(group: tuple[str, ColumnStats]) -> tuple[bool, int]:
+    # All records first, then CLNSIG values by number of records
+    name, stats = group
+    return name != ALL_RECORDS, -stats.records
+
+
+def _top_values(counter: Counter, n: int) -> str:
+    return " ".join(f"{value}:{_pct(count, n)}" for value, count in counter.most_common(TOP_VALUES))
+
+
+def _round(value: float | None) -> str:
+    return "NA" if value is None else f"{value:.2f}"
+
+
+def _na(value: int | None) -> str:
+    return "NA" if value is None else str(value)
+
+
+def _pct(count: int, total: int) -> str:
+    return f"{count / total:.1%}" if total else "NA"
+
+
+if __name__ == "__main__":
+    merge_summaries()
@@ -0,0 +1,127 @@
+"""
+Genomic regions: parsing chrom:start-end strings and BED files, and
+merging overlapping regions into sorted, disjoint intervals.
+
+All coordinates are 1-based and inclusive, like VCF POS.
+"""
+from bisect import bisect_right
+from typing import NamedTuple
+
+MAX_POSITION = 2**31 - 1
+
+
+class Region(NamedTuple):
+    chrom: str
+    start: int
+    end: int
+    name: str
+
+
+class MergedRegion(NamedTuple):
+    chrom: str
+    start: int
+    end: int
+    members: list[Region]
+
+    def names_at(self, position: int) -> list[str]:
+        return [r.name for r in self.members if r.start <= position <= r.end]
+
+
+def parse_region(text: str) -> Region:
+    """
+    "chrom", "chrom:pos" or "chrom:start-end" (commas allowed in numbers)
+    """
+    chrom, sep, span = text.strip().rpartition(":")
+
+    if not sep:
+        return Region(span, 1, MAX_POSITION, text)
+
+    start, _, end = span.replace(",", "").partition("-")
+
+    try:
+        start = int(start)
+        end = int(end) if end else start
+    except ValueError:
+        raise ValueError(f"Can't parse region: {text!r}") from None
+
+    if start > end:
+        raise ValueError(f"Region start after end: {text!r}")
+
+    return Region(chrom, start, end, text)
+
+
+def read_bed(path: str) -> list[Region]:
+    """
+    Regions from a BED file. The name column is used as region name when present.
+    """
+    regions = []
+
+    with open(path) as bed:
+        for line in bed:
+            if not line.strip() or line.startswith(("#", "track", "browser")):
+                continue
+
+            fields = line.rstrip("\n").split("\t")
+            chrom, start, end = fields[0], int(fields[1]) + 1, int(fields[2])
+            name = fields[3] if len(fields) > 3 and fields[3] else f"{chrom}:{start}-{end}"
+
+            regions.append(Region(chrom, start, end, name))
+
+    return regions
+
+
+def merge_regions(
+    regions: list[Region], contig_order: list[str] | None = None
+) -> list[MergedRegion]:
+    """
+    Sort regions (by contig_order, then name for unknown contigs) and merge overlapping ones
+    """
+    contig_rank = {contig: idx for idx, contig in enumerate(contig_order or [])}
+
+    def sort_key(region: Region):
+        return (contig_rank.get(region.chrom, len(contig_rank)), region.chrom, region.start)
+
+    merged = []
+
+    for region in sorted(regions, key=sort_key):
+        last = merged[-1] if merged else None
+
+        if last is not None and last.chrom == region.chrom and region.start <= last.end:
+            merged[-1] = last._replace(end=max(last.end, region.end))
+            last.members.append(region)
+            continue
+
+        merged.append(MergedRegion(region.chrom, region.start, region.end, [region]))
+
+    return merged
+
+
+class RegionLookup:
+    """
+    Find the merged region containing a position, by binary search per contig
+    """
+
+    def __init__(self, regions: list[MergedRegion]):
+        self._regions: dict[str, list[MergedRegion]] = {}
+
+        for region in regions:
+            self._regions.setdefault(region.chrom, []).append(region)
+
+        self._starts = {
+            chrom: [region.start for region in chrom_regions]
+            for chrom, chrom_regions in self._regions.items()
+        }
+
+    def find(self, chrom: str, position: int) -> MergedRegion | None:
+        starts = self._starts.get(chrom)
+
+        if starts is None:
+            return None
+
+        idx = bisect_right(starts, position) - 1
+
+        if idx < 0:
+            return None
+
+        region = self._regions[chrom][idx]
+        return region if position <= region.end else None
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Query server keeping VCFs open, for callers that would otherwise start a
+process (e.g. infofield.py) per lookup.
+
+    python server.py cohort/*.vcf.gz --port 8765
+    python server.py --manifest vcfs.txt --socket /tmp/vcf.sock
+
+Headers and indexes (tabix, or line indexes of plain VCFs) are loaded at
+startup. Requests are answered concurrently, one thread each. Query results
+and inflated BGZF blocks share one LRU cache of --cache-size MB.
+
+GET endpoints, all answering JSON (see client.py):
+
+    /files                                     served files and their contigs
+    /range?file=F&region=CHR:START-END         records in a region
+    /position?file=F&chrom=CHR&pos=POS         records at a position
+    /stats                                     request and cache counters
+
+/range and /position take info=KEY1,KEY2 (info=* for all keys) to include
+INFO values and filter=EXPR to only return matching records (filterexpr).
+Files are assumed not to change while served.
+"""
+import json
+import logging
+import os
+import signal
+import socketserver
+import threading
+import time
+from collections import Counter
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import click
+
+from constants import VCF_FIELDS
+from filterexpr import FilterExpressionError, compile_filter
+from lrucache import LRUCache
+from regions import parse_region
+from util import expand_vcf_paths
+from variants import Variant
+from vcffile import VCF
+
+logging.basicConfig(level=logging.INFO, format="[%(asctime)s][%(levelname)s]: %(message)s")
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE_MB = 256
+ALL_INFO = "*"
+
+
+class QueryError(Exception):
+    def __init__(self, message: str, status: HTTPStatus = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+@click.command(help="Serve region and INFO queries on VCF files over HTTP")
+@click.argument("vcf_files", nargs=-1, type=str)
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="File listing VCF paths, one per line.",
+)
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to listen on.")
+@click.option("--port", default=DEFAULT_PORT, show_default=True, type=int)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Listen on this Unix socket instead of --host/--port.",
+)
+@click.option(
+    "--cache-size",
+    default=DEFAULT_CACHE_SIZE_MB,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Memory budget in MB for cached query results and inflated blocks.",
+)
+def serve(vcf_files, manifest, host, port, socket_path, cache_size):
+    try:
+        vcf_files = expand_vcf_paths(vcf_files, manifest)
+    except FileNotFoundError as e:
+        raise click.BadParameter(str(e), param_hint="VCF_FILES") from e
+
+    if not vcf_files:
+        raise click.UsageError("Give at least one VCF file or --manifest")
+
+    queries = VCFQueries(vcf_files, cache_size * 1024**2)
+
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, UnixQueryHandler)
+        address = socket_path
+    else:
+        server = ThreadingHTTPServer((host, port), QueryHandler)
+        address = f"http://{host}:{server.server_port}"
+
+    server.queries = queries
+    LOG.info("Serving %s files on %s", len(vcf_files), address)
+
+    # Shut down (and remove the socket file) on SIGTERM as on Ctrl-C
+    signal.signal(signal.SIGTERM, _terminate)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+class VCFQueries:
+    """
+    The open VCFs and the shared cache, answering queries as encoded JSON
+    """
+
+    def __init__(self, vcf_files: list[str], cache_bytes: int):
+        self.cache = LRUCache(cache_bytes)
+        self.vcfs: dict[str, VCF] = {}
+        self.requests = Counter()
+        self._started = time.time()
+        self._lock = threading.Lock()
+
+        for name, path in zip(_file_names(vcf_files), vcf_files):
+            self.vcfs[name] = _load_vcf(path, self.cache)
+
+    def count(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def files(self, params: dict) -> bytes:
+        files = {
+            name: {
+                "path": vcf.vcf_file,
+                "indexed": vcf.tabix_index_file_exists or vcf.get_line_index() is not None,
+                "contigs": vcf.header.contig_lengths(),
+            }
+            for name, vcf in self.vcfs.items()
+        }
+        return _encode({"files": files})
+
+    def range(self, params: dict) -> bytes:
+        region = _param(params, "region")
+
+        try:
+            region = parse_region(region)
+        except ValueError as e:
+            raise QueryError(str(e)) from e
+
+        return self._records(params, region.chrom, region.start, region.end)
+
+    def position(self, params: dict) -> bytes:
+        chrom = _param(params, "chrom")
+        pos = _int_param(params, "pos")
+
+        return self._records(params, chrom, pos, pos)
+
+    def stats(self, params: dict) -> bytes:
+        with self._lock:
+            requests = dict(self.requests)
+
+        return _encode(
+            {
+                "uptime_seconds": round(time.time() - self._started, 1),
+                "requests": requests,
+                "cache": self.cache.stats(),
+            }
+        )
+
+    def _records(self, params: dict, chrom: str, start: int, end: int) -> bytes:
+        name = _param(params, "file")
+        vcf = self.vcfs.get(name)
+
+        if vcf is None:
+            raise QueryError(f"Not a served file: {name}", HTTPStatus.NOT_FOUND)
+
+        info_keys = _optional_param(params, "info")
+        expression = _optional_param(params, "filter")
+
+        cache_key = ("result", name, chrom, start, end, info_keys, expression)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Compiled per request, compiled filters keep (unsynchronized) statistics
+        try:
+            row_filter = compile_filter(expression) if expression else None
+        except FilterExpressionError as e:
+            raise QueryError(str(e)) from e
+
+        keys = None if info_keys in (None, ALL_INFO) else info_keys.split(",")
+        info_types = vcf.get_info_types()
+        records = []
+
+        for line in vcf.get_range(chrom, start, end, _skip_progress=True):
+            if row_filter is not None and not row_filter(line):
+                continue
+
+            records.append(_record(Variant(line, info_types), info_keys, keys))
+
+        body = _encode({"file": name, "region": f"{chrom}:{start}-{end}", "records": records})
+        self.cache.put(cache_key, body)
+
+        return body
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes, don't let Nagle hold the body back
+    # on kept-alive TCP connections
+    disable_nagle_algorithm = True
+
+    ROUTES = {
+        "/files": VCFQueries.files,
+        "/range": VCFQueries.range,
+        "/position": VCFQueries.position,
+        "/stats": VCFQueries.stats,
+    }
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        route = self.ROUTES.get(url.path)
+
+        if route is None:
+            self._send(HTTPStatus.NOT_FOUND, _encode({"error": f"No such endpoint: {url.path}"}))
+            return
+
+        queries = self.server.queries
+        queries.count(url.path)
+
+        try:
+            body = route(queries, parse_qs(url.query))
+        except QueryError as e:
+            self._send(e.status, _encode({"error": str(e)}))
+            return
+        except Exception as e:
+            LOG.exception("Failed: %s", self.path)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, _encode({"error": str(e)}))
+            return
+
+        self._send(HTTPStatus.OK, body)
+
+    def _send(self, status: HTTPStatus, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        LOG.debug("%s %s", self.address_string(), format % args)
+
+
+class UnixQueryHandler(QueryHandler):
+    # TCP_NODELAY doesn't apply to Unix sockets
+    disable_nagle_algorithm = False
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _terminate(signum, frame) -> None:
+    raise KeyboardInterrupt
+
+
+def _load_vcf(path: str, cache: LRUCache) -> VCF:
+    vcf = VCF(path, block_cache=cache)
+
+    # Load everything queries need up front, not in concurrent first requests
+    vcf.get_info_types()
+    if vcf.get_index() is None and vcf.get_line_index() is None:
+        LOG.warning("%s has no index, every query scans the whole file", path)
+
+    return vcf
+
+
+def _file_names(paths: list[str]) -> list[str]:
+    """
+    File names to address files by, paths where names are ambiguous
+    """
+    names = Counter(os.path.basename(path) for path in paths)
+    return [path if names[os.path.basename(path)] > 1 else os.path.basename(path) for path in paths]
+
+
+def _record(variant: Variant, info_keys: str | None, keys: list[str] | None) -> dict:
+    record = {
+        "chrom": variant.chrom,
+        "pos": variant.pos,
+        "id": variant.column(VCF_FIELDS.ID),
+        "ref": variant.ref,
+        "alt": variant.alt,
+        "qual": variant.column(VCF_FIELDS.QUAL),
+        "filter": variant.column(VCF_FIELDS.FILTER),
+    }
+
+    if info_keys == ALL_INFO:
+        record["info"] = dict(variant.info)
+    elif keys is not None:
+        record["info"] = {key: variant.info.get(key) for key in keys}
+
+    return record
+
+
+def _param(params: dict, name: str) -> str:
+    value = _optional_param(params, name)
+
+    if value is None:
+        raise QueryError(f"Missing parameter: {name}")
+
+    return value
+
+
+def _optional_param(params: dict, name: str) -> str | None:
+    values = params.get(name)
+    return values[-1] if values else None
+
+
+def _int_param(params: dict, name: str) -> int:
+    value = _param(params, name)
+
+    try:
+        return int(value.replace(",", ""))
+    except ValueError:
+        raise QueryError(f"{name} is not an integer: {value!r}") from None
+
+
+def _encode(data: dict) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+if __name__ == "__main__":
+    serve()
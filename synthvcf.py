@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Synthetic VCF generator, for benchmarks and trying things out.
+
+Writes <prefix>.vcf and a bgzipped <prefix>.vcf.gz with a tabix index.
+Output is fully determined by the options (and --seed).
+"""
+import random
+from contextlib import ExitStack
+from typing import Generator
+
+import click
+
+from bgzf import BgzfWriter
+from tabixindex import TabixIndexBuilder
+
+# GRCh38
+CONTIG_LENGTHS = {
+    "1": 248956422,
+    "2": 242193529,
+    "3": 198295559,
+    "4": 190214555,
+    "5": 181538259,
+    "6": 170805979,
+    "7": 159345973,
+    "8": 145138636,
+    "9": 138394717,
+    "10": 133797422,
+    "11": 135086622,
+    "12": 133275309,
+    "13": 114364328,
+    "14": 107043718,
+    "15": 101991189,
+    "16": 90338345,
+    "17": 83257441,
+    "18": 80373285,
+    "19": 58617616,
+    "20": 64444167,
+    "21": 46709983,
+    "22": 50818468,
+    "X": 156040895,
+    "Y": 57227415,
+    "MT": 16569,
+}
+DEFAULT_RANK_COMPONENTS = "Gnomad,Clinvar,Conservation,Consequence,CADD,Inheritance,Model"
+CSQ_BASE_FIELDS = ["Allele", "Consequence", "IMPACT", "SYMBOL", "Gene", "Feature", "BIOTYPE"]
+CONSEQUENCES = [
+    ("missense_variant", "MODERATE"),
+    ("synonymous_variant", "LOW"),
+    ("stop_gained", "HIGH"),
+    ("intron_variant", "MODIFIER"),
+    ("splice_region_variant", "LOW"),
+    ("frameshift_variant", "HIGH"),
+    ("3_prime_UTR_variant", "MODIFIER"),
+    ("upstream_gene_variant", "MODIFIER"),
+]
+CLNSIG_VALUES = ["Pathogenic", "Likely_pathogenic", "Benign", "Uncertain_significance"]
+GENOTYPES = ["0/0", "0/1", "1/1", "./.", "0|1", "1|0"]
+BASES = "ACGT"
+
+
+@click.command(help="Write a synthetic VCF (plain, and bgzipped + tabix indexed)")
+@click.argument("prefix", type=click.Path(dir_okay=False))
+@click.option("--records", "-n", default=100_000, show_default=True, type=click.IntRange(min=0))
+@click.option(
+    "--contigs",
+    default=",".join(CONTIG_LENGTHS),
+    show_default=True,
+    help="Comma separated contig names (GRCh38 lengths) or name:length pairs.",
+)
+@click.option(
+    "--info-density",
+    default=0.7,
+    show_default=True,
+    type=click.FloatRange(0, 1),
+    help="Chance of each optional INFO field being set on a record.",
+)
+@click.option(
+    "--extra-info",
+    default=0,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Number of extra optional Float INFO fields, to make INFO wider.",
+)
+@click.option(
+    "--rank-components",
+    default=DEFAULT_RANK_COMPONENTS,
+    show_default=True,
+    help="Comma separated RankResult component names.",
+)
+@click.option(
+    "--csq-transcripts",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Max CSQ transcripts per record (0: no CSQ).",
+)
+@click.option(
+    "--csq-fields",
+    default=len(CSQ_BASE_FIELDS),
+    show_default=True,
+    type=click.IntRange(min=len(CSQ_BASE_FIELDS)),
+    help="CSQ subfields per transcript (VEP output often has 80+).",
+)
+@click.option("--samples", default=3, show_default=True, type=click.IntRange(min=0))
+@click.option("--seed", default=1, show_default=True, type=int)
+@click.option("--plain/--no-plain", default=True, help="Write <prefix>.vcf.")
+@click.option("--bgzip/--no-bgzip", default=True, help="Write <prefix>.vcf.gz and .tbi.")
+def synthvcf(prefix, contigs, plain, bgzip, **options):
+    generate(prefix, contigs=parse_contigs(contigs), plain=plain, bgzip=bgzip, **options)
+
+
+def generate(
+    prefix: str,
+    records: int = 100_000,
+    contigs: dict[str, int] | None = None,
+    info_density: float = 0.7,
+    extra_info: int = 0,
+    rank_components: str = DEFAULT_RANK_COMPONENTS,
+    csq_transcripts: int = 4,
+    csq_fields: int = len(CSQ_BASE_FIELDS),
+    samples: int = 3,
+    seed: int = 1,
+    plain: bool = True,
+    bgzip: bool = True,
+) -> list[str]:
+    """
+    Write the synthetic VCF(s), returns the paths written
+    """
+    contigs = contigs or CONTIG_LENGTHS
+    generator = SyntheticVCF(
+        contigs,
+        info_density,
+        extra_info,
+        rank_components.split(","),
+        csq_transcripts,
+        csq_fields,
+        samples,
+        seed,
+    )
+
+    paths = []
+    index = TabixIndexBuilder()
+
+    with ExitStack() as stack:
+        plain_file = bgzf_writer = None
+
+        if plain:
+            paths.append(f"{prefix}.vcf")
+            plain_file = stack.enter_context(open(paths[-1], "w"))
+
+        if bgzip:
+            paths.append(f"{prefix}.vcf.gz")
+            bgzf_file = stack.enter_context(open(paths[-1], "wb"))
+            bgzf_writer = stack.enter_context(BgzfWriter(bgzf_file))
+
+        for line in generator.header():
+            if plain_file is not None:
+                plain_file.write(line)
+            if bgzf_writer is not None:
+                bgzf_writer.write(line.encode())
+
+        for chrom, pos, ref, line in generator.records(records):
+            if plain_file is not None:
+                plain_file.write(line)
+
+            if bgzf_writer is not None:
+                voffset_start = bgzf_writer.tell()
+                bgzf_writer.write(line.encode())
+                index.add(chrom, pos - 1, pos - 1 + len(ref), voffset_start, bgzf_writer.tell())
+
+    if bgzip:
+        paths.append(f"{prefix}.vcf.gz.tbi")
+        index.write(paths[-1])
+
+    return paths
+
+
+def parse_contigs(contigs: str) -> dict[str, int]:
+    lengths = {}
+
+    for contig in contigs.split(","):
+        name, _, length = contig.partition(":")
+
+        if not length and name not in CONTIG_LENGTHS:
+            raise click.BadParameter(f"Unknown contig length: {name}", param_hint="--contigs")
+
+        lengths[name] = int(length) if length else CONTIG_LENGTHS[name]
+
+    return lengths
+
+
+class SyntheticVCF:
+    def __init__(
+        self,
+        contigs: dict[str, int],
+        info_density: float,
+        extra_info: int,
+        rank_components: list[str],
+        csq_transcripts: int,
+        csq_fields: int,
+        samples: int,
+        seed: int,
+    ):
+        self.contigs = contigs
+        self.info_density = info_density
+        self.extra_info = [f"EXTRA{idx}" for idx in range(1, extra_info + 1)]
+        self.rank_components = rank_components
+        self.csq_transcripts = csq_transcripts
+        self.csq_extra_fields = [f"FIELD{idx}" for idx in range(csq_fields - len(CSQ_BASE_FIELDS))]
+        self.samples = [f"SAMPLE{idx}" for idx in range(1, samples + 1)]
+        self.rng = random.Random(seed)
+
+    def header(self) -> list[str]:
+        csq_format = "|".join(CSQ_BASE_FIELDS + self.csq_extra_fields)
+
+        lines = ["##fileformat=VCFv4.2"]
+        lines += [f"##contig=<ID={name},length={length}>" for name, length in self.contigs.items()]
+        lines += [
+            '##FILTER=<ID=LowQual,Description="Low quality">',
+            _info_meta("RankScore", ".", "String", "Rank score, family_id:rank_score"),
+            _info_meta("RankResult", ".", "String", "|".join(self.rank_components)),
+            _info_meta("CLNSIG", ".", "String", "ClinVar clinical significance"),
+            _info_meta("CADD", "1", "Float", "CADD phred score"),
+            _info_meta("GNOMADAF", "A", "Float", "gnomAD allele frequency"),
+            _info_meta("DB", "0", "Flag", "dbSNP membership"),
+            _info_meta("DP", "1", "Integer", "Total depth"),
+        ]
+        lines += [_info_meta(key, "1", "Float", "Extra field") for key in self.extra_info]
+
+        if self.csq_transcripts:
+            lines.append(_info_meta("CSQ", ".", "String", f"VEP annotations. Format: {csq_format}"))
+
+        if self.samples:
+            lines += [
+                '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+                '##FORMAT=<ID=AD,Number=R,Type=Integer,Description="Allelic depths">',
+                '##FORMAT=<ID=DP,Number=1,Type=Integer,Description="Read depth">',
+                '##FORMAT=<ID=GQ,Number=1,Type=Integer,Description="Genotype quality">',
+            ]
+
+        columns = ["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO"]
+        if self.samples:
+            columns += ["FORMAT"] + self.samples
+        lines.append("\t".join(columns))
+
+        return [line + "\n" for line in lines]
+
+    def records(self, n_records: int) -> Generator[tuple[str, int, str, str], None, None]:
+        """
+        (CHROM, POS, REF, line) of n_records sorted records, spread over contigs by length
+        """
+        total_length = sum(self.contigs.values())
+        contigs = list(self.contigs.items())
+        left = n_records
+
+        for idx, (chrom, length) in enumerate(contigs):
+            if idx == len(contigs) - 1:
+                n_contig = left
+            else:
+                n_contig = min(round(n_records * length / total_length), left)
+            left -= n_contig
+
+            if n_contig > length:
+                raise ValueError(f"{n_contig} records do not fit on {chrom} ({length} bp)")
+
+            # Distinct positions, so records sort the same on (POS) and (POS, REF, ALT)
+            for pos in sorted(self.rng.sample(range(1, length + 1), n_contig)):
+                ref, line = self.record(chrom, pos)
+                yield chrom, pos, ref, line
+
+    def record(self, chrom: str, pos: int) -> tuple[str, str]:
+        rng = self.rng
+        density = self.info_density
+
+        ref = rng.choice(BASES)
+        if rng.random() < 0.1:
+            ref += "".join(rng.choices(BASES, k=rng.randint(1, 5)))
+        alt = rng.choice([base for base in BASES if base != ref[0]])
+
+        info = []
+        if rng.random() < 0.95:
+            components = [rng.choice((-1, 0, 0, 1, 2, 3)) for _ in self.rank_components]
+            info.append(f"RankScore=fam1:{sum(components)}")
+            info.append("RankResult=" + "|".join(map(str, components)))
+        if rng.random() < density * 0.4:
+            info.append(f"CLNSIG={rng.choice(CLNSIG_VALUES)}")
+        if rng.random() < density:
+            info.append(f"CADD={rng.uniform(0, 40):.3f}")
+        if rng.random() < density:
+            info.append(f"GNOMADAF={rng.uniform(0, 0.1):.5f}")
+        if rng.random() < density * 0.4:
+            info.append("DB")
+        info.append(f"DP={rng.randint(10, 500)}")
+        info += [f"{key}={rng.random():.4f}" for key in self.extra_info if rng.random() < density]
+
+        if self.csq_transcripts:
+            info.append("CSQ=" + self._csq(alt))
+
+        columns = [chrom, str(pos), ".", ref, alt, str(rng.randint(10, 99))]
+        columns += ["PASS" if rng.random() < 0.9 else "LowQual", ";".join(info)]
+
+        if self.samples:
+            columns.append("GT:AD:DP:GQ")
+            columns += [self._sample() for _ in self.samples]
+
+        return ref, "\t".join(columns) + "\n"
+
+    def _csq(self, alt: str) -> str:
+        rng = self.rng
+        transcripts = []
+
+        for transcript in range(rng.randint(1, self.csq_transcripts)):
+            gene = f"GENE{rng.randint(1, 3)}"
+            consequence, impact = rng.choice(CONSEQUENCES)
+            subfields = [alt, consequence, impact, gene, f"ENSG{gene}", f"ENST{transcript}"]
+            subfields.append("protein_coding")
+            subfields += [
+                str(rng.randint(0, 9)) if rng.random() < 0.5 else "" for _ in self.csq_extra_fields
+            ]
+            transcripts.append("|".join(subfields))
+
+        return ",".join(transcripts)
+
+    def _sample(self) -> str:
+        rng = self.rng
+        ref_depth, alt_depth = rng.randint(0, 60), rng.randint(0, 60)
+        return (
+            f"{rng.choice(GENOTYPES)}:{ref_depth},{alt_depth}:{ref_depth + alt_depth}"
+            f":{rng.randint(0, 99)}"
+        )
+
+
+def _info_meta(key: str, number: str, info_type: str, description: str) -> str:
+    return f'##INFO=<ID={key},Number={number},Type={info_type},Description="{description}">'
+
+
+if __name__ == "__main__":
+    synthvcf()
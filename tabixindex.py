@@ -0,0 +1,310 @@
+import gzip
+import os
+import struct
+from dataclasses import dataclass, field
+
+from bgzf import BgzfWriter
+
+TBI_MAGIC = b"TBI\x01"
+CSI_MAGIC = b"CSI\x01"
+
+TBI_MIN_SHIFT = 14
+TBI_DEPTH = 5
+TBI_FORMAT_VCF = 2
+
+
+@dataclass
+class ReferenceIndex:
+    bins: dict[int, list[tuple[int, int]]] = field(default_factory=dict)
+    bin_offsets: dict[int, int] = field(default_factory=dict)
+    linear_index: list[int] = field(default_factory=list)
+    n_mapped: int | None = None
+    n_unmapped: int | None = None
+
+
+class TabixIndex:
+    """
+    Reader for tabix (.tbi) and coordinate sorted index (.csi) files.
+
+    Only what is needed to turn a region into BGZF virtual offset chunks.
+    """
+
+    def __init__(self, names: list[str], refs: list[ReferenceIndex], min_shift: int, depth: int):
+        self.names = names
+        self.min_shift = min_shift
+        self.depth = depth
+        self._refs = dict(zip(names, refs))
+
+    @classmethod
+    def from_file(cls, path: str) -> "TabixIndex":
+        with gzip.open(path, "rb") as index_file:
+            data = index_file.read()
+
+        if data.startswith(TBI_MAGIC):
+            return cls._parse_tbi(data)
+
+        if data.startswith(CSI_MAGIC):
+            return cls._parse_csi(data)
+
+        raise ValueError(f"Not a tabix/csi index: {path}")
+
+    @classmethod
+    def _parse_tbi(cls, data: bytes) -> "TabixIndex":
+        n_ref, *_, l_nm = struct.unpack_from("<8i", data, 4)
+        offset = 4 + 8 * 4
+        names = _parse_names(data[offset : offset + l_nm])
+        offset += l_nm
+
+        pseudo_bin = _pseudo_bin(TBI_DEPTH)
+        refs = []
+        for _ in range(n_ref):
+            ref = ReferenceIndex()
+            (n_bin,) = struct.unpack_from("<i", data, offset)
+            offset += 4
+
+            for _ in range(n_bin):
+                bin_id, n_chunk = struct.unpack_from("<Ii", data, offset)
+                offset += 8
+                chunks = struct.unpack_from(f"<{n_chunk * 2}Q", data, offset)
+                offset += n_chunk * 16
+                _add_bin(ref, bin_id, chunks, pseudo_bin)
+
+            (n_intv,) = struct.unpack_from("<i", data, offset)
+            offset += 4
+            ref.linear_index = list(struct.unpack_from(f"<{n_intv}Q", data, offset))
+            offset += n_intv * 8
+
+            refs.append(ref)
+
+        return cls(names, refs, TBI_MIN_SHIFT, TBI_DEPTH)
+
+    @classmethod
+    def _parse_csi(cls, data: bytes) -> "TabixIndex":
+        min_shift, depth, l_aux = struct.unpack_from("<3i", data, 4)
+        offset = 4 + 3 * 4
+        aux = data[offset : offset + l_aux]
+        offset += l_aux
+
+        if len(aux) < 28:
+            raise ValueError("CSI index without sequence names, not a tabix style index")
+
+        (l_nm,) = struct.unpack_from("<i", aux, 24)
+        names = _parse_names(aux[28 : 28 + l_nm])
+
+        (n_ref,) = struct.unpack_from("<i", data, offset)
+        offset += 4
+
+        pseudo_bin = _pseudo_bin(depth)
+        refs = []
+        for _ in range(n_ref):
+            ref = ReferenceIndex()
+            (n_bin,) = struct.unpack_from("<i", data, offset)
+            offset += 4
+
+            for _ in range(n_bin):
+                bin_id, loffset, n_chunk = struct.unpack_from("<IQi", data, offset)
+                offset += 16
+                chunks = struct.unpack_from(f"<{n_chunk * 2}Q", data, offset)
+                offset += n_chunk * 16
+                ref.bin_offsets[bin_id] = loffset
+                _add_bin(ref, bin_id, chunks, pseudo_bin)
+
+            refs.append(ref)
+
+        return cls(names, refs, min_shift, depth)
+
+    def query(self, chromosome: str, start: int, end: int) -> list[tuple[int, int]]:
+        """
+        Virtual offset chunks that may hold records overlapping chromosome:start-end
+
+        start/end are 1-based and inclusive, like VCF POS.
+        """
+        ref = self._refs.get(chromosome)
+
+        if ref is None:
+            return []
+
+        beg = max(start - 1, 0)
+        end = min(end, 1 << (self.min_shift + self.depth * 3))
+        min_offset = self._min_offset(ref, beg)
+
+        chunks = []
+        for bin_id in reg2bins(beg, end, self.min_shift, self.depth):
+            for chunk_start, chunk_end in ref.bins.get(bin_id, ()):
+                if chunk_end > min_offset:
+                    chunks.append((max(chunk_start, min_offset), chunk_end))
+
+        return _merge_chunks(chunks)
+
+    def record_counts(self) -> dict[str, int] | None:
+        """
+        Records per sequence from the index metadata pseudo-bin, if present
+        """
+        counts = {}
+
+        for name, ref in self._refs.items():
+            if ref.n_mapped is None:
+                return None
+            counts[name] = ref.n_mapped + ref.n_unmapped
+
+        return counts
+
+    def _min_offset(self, ref: ReferenceIndex, beg: int) -> int:
+        if ref.linear_index:
+            window = beg >> self.min_shift
+            window = min(window, len(ref.linear_index) - 1)
+            return ref.linear_index[window]
+
+        if ref.bin_offsets:
+            bin_id = _bin_first(self.depth) + (beg >> self.min_shift)
+            while bin_id > 0 and bin_id not in ref.bin_offsets:
+                bin_id = (bin_id - 1) >> 3
+            return ref.bin_offsets.get(bin_id, 0)
+
+        return 0
+
+
+class TabixIndexBuilder:
+    """
+    Build a .tbi for a BGZF VCF from (chrom, beg, end, virtual start, virtual end)
+    of every record, added in file order. beg/end are 0-based, half-open.
+    """
+
+    def __init__(self):
+        self.names: list[str] = []
+        self._refs: dict[str, dict] = {}
+
+    def add(self, chrom: str, beg: int, end: int, voffset_start: int, voffset_end: int) -> None:
+        ref = self._refs.get(chrom)
+
+        if ref is None:
+            self.names.append(chrom)
+            ref = self._refs[chrom] = {
+                "bins": {},
+                "linear": {},
+                "n_mapped": 0,
+                "start": voffset_start,
+            }
+
+        chunks = ref["bins"].setdefault(reg2bin(beg, end, TBI_MIN_SHIFT, TBI_DEPTH), [])
+
+        if chunks and chunks[-1][1] == voffset_start:
+            chunks[-1][1] = voffset_end
+        else:
+            chunks.append([voffset_start, voffset_end])
+
+        for window in range(beg >> TBI_MIN_SHIFT, ((max(end, beg + 1) - 1) >> TBI_MIN_SHIFT) + 1):
+            ref["linear"].setdefault(window, voffset_start)
+
+        ref["n_mapped"] += 1
+        ref["end"] = voffset_end
+
+    def to_bytes(self) -> bytes:
+        raw_names = b"".join(name.encode() + b"\0" for name in self.names)
+        header = struct.pack(
+            "<8i", len(self.names), TBI_FORMAT_VCF, 1, 2, 0, ord("#"), 0, len(raw_names)
+        )
+        data = [TBI_MAGIC, header, raw_names]
+
+        pseudo_bin = _pseudo_bin(TBI_DEPTH)
+
+        for name in self.names:
+            ref = self._refs[name]
+
+            data.append(struct.pack("<i", len(ref["bins"]) + 1))
+            for bin_id, chunks in sorted(ref["bins"].items()):
+                data.append(struct.pack("<Ii", bin_id, len(chunks)))
+                data.extend(struct.pack("<QQ", *chunk) for chunk in chunks)
+
+            data.append(struct.pack("<Ii", pseudo_bin, 2))
+            data.append(struct.pack("<4Q", ref["start"], ref["end"], ref["n_mapped"], 0))
+
+            # Windows without records start where the previous window does
+            linear = []
+            for window in range(max(ref["linear"]) + 1):
+                linear.append(ref["linear"].get(window, linear[-1] if linear else 0))
+
+            data.append(struct.pack(f"<i{len(linear)}Q", len(linear), *linear))
+
+        data.append(struct.pack("<Q", 0))
+        return b"".join(data)
+
+    def write(self, path: str) -> None:
+        with open(path, "wb") as index_file, BgzfWriter(index_file) as writer:
+            writer.write(self.to_bytes())
+
+
+def find_index(path_to_bgzipped_vcf: str) -> str | None:
+    for suffix in (".tbi", ".csi"):
+        index_should_be_here = f"{path_to_bgzipped_vcf}{suffix}"
+        if os.path.isfile(index_should_be_here):
+            return index_should_be_here
+
+    return None
+
+
+def reg2bin(beg: int, end: int, min_shift: int, depth: int) -> int:
+    """
+    Smallest bin fully containing the 0-based, half-open interval [beg, end)
+    """
+    end -= 1
+    shift = min_shift
+    first_bin = _bin_first(depth)
+
+    for level in range(depth, 0, -1):
+        if beg >> shift == end >> shift:
+            return first_bin + (beg >> shift)
+        shift += 3
+        first_bin = _bin_first(level - 1)
+
+    return 0
+
+
+def reg2bins(beg: int, end: int, min_shift: int, depth: int) -> list[int]:
+    """
+    All bins overlapping the 0-based, half-open interval [beg, end)
+    """
+    end -= 1
+    bins = []
+    shift = min_shift + depth * 3
+    first_bin = 0
+
+    for level in range(depth + 1):
+        bins.extend(range(first_bin + (beg >> shift), first_bin + (end >> shift) + 1))
+        shift -= 3
+        first_bin += 1 << (level * 3)
+
+    return bins
+
+
+def _bin_first(level: int) -> int:
+    return ((1 << (level * 3)) - 1) // 7
+
+
+def _pseudo_bin(depth: int) -> int:
+    return _bin_first(depth + 1) + 1
+
+
+def _add_bin(ref: ReferenceIndex, bin_id: int, chunks: tuple, pseudo_bin: int) -> None:
+    if bin_id == pseudo_bin:
+        # (unmapped beg, unmapped end), (n_mapped, n_unmapped)
+        ref.n_mapped, ref.n_unmapped = chunks[2], chunks[3]
+        return
+
+    ref.bins[bin_id] = list(zip(chunks[0::2], chunks[1::2]))
+
+
+def _parse_names(raw_names: bytes) -> list[str]:
+    return [name.decode() for name in raw_names.split(b"\0") if name]
+
+
+def _merge_chunks(chunks: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged = []
+
+    for chunk_start, chunk_end in sorted(chunks):
+        if merged and chunk_start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], chunk_end))
+            continue
+        merged.append((chunk_start, chunk_end))
+
+    return merged
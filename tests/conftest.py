@@ -0,0 +1,68 @@
+import pytest
+
+from synthvcf import generate
+
+CONTIGS = {"1": 300_000, "2": 200_000, "X": 100_000}
+
+
+@pytest.fixture(scope="session")
+def synthetic_vcfs(tmp_path_factory) -> tuple[str, str]:
+    """
+    (plain, bgzipped + tabix indexed) paths of the same small synthetic VCF
+    """
+    prefix = str(tmp_path_factory.mktemp("synthetic") / "synthetic")
+    plain, bgzipped, _ = generate(prefix, records=3000, contigs=CONTIGS, samples=2)
+
+    return plain, bgzipped
+
+
+HEADER = [
+    "##fileformat=VCFv4.2",
+    '##INFO=<ID=RankScore,Number=.,Type=String,Description="Rank score, family_id:rank_score">',
+    '##INFO=<ID=CLNSIG,Number=.,Type=String,Description="ClinVar clinical significance">',
+    '##INFO=<ID=DB,Number=0,Type=Flag,Description="dbSNP membership">',
+    '##INFO=<ID=DP,Number=1,Type=Integer,Description="Total depth">',
+]
+
+
+@pytest.fixture
+def write_vcf(tmp_path):
+    """
+    write_vcf(name, records, header_lines=(), samples=()) -> path of a small plain
+    VCF, records being tab separated lines (or lists of columns)
+    """
+
+    def _write(name: str, records: list, header_lines=(), samples=()) -> str:
+        columns = ["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO"]
+        if samples:
+            columns += ["FORMAT", *samples]
+
+        lines = HEADER + list(header_lines) + ["\t".join(columns)]
+        lines += [record if isinstance(record, str) else "\t".join(record) for record in records]
+
+        path = tmp_path / name
+        path.write_text("\n".join(lines) + "\n")
+        return str(path)
+
+    return _write
+
+
+@pytest.fixture
+def scan():
+    """
+    scan(path, chromosome=None, start, end) -> record lines of a plain VCF (within
+    the range), read without the VCF class
+    """
+
+    def _scan(path: str, chromosome: str | None = None, start: int = 1, end: int = 2**31) -> list:
+        with open(path) as vcf:
+            records = [line for line in vcf if line.strip() and not line.startswith("#")]
+
+        return [
+            record
+            for record in records
+            if chromosome is None
+            or (record.split("\t")[0] == chromosome and start <= int(record.split("\t")[1]) <= end)
+        ]
+
+    return _scan
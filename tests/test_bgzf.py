@@ -0,0 +1,44 @@
+import gzip
+import os
+
+import pytest
+
+from bgzf import ThreadedBgzfReader
+from vcffile import VCF
+
+
+@pytest.mark.parametrize("mode", ["rt", "rb"])
+@pytest.mark.parametrize("threads", [2, 3])
+def test_threaded_reader_matches_gzip(synthetic_vcfs, mode, threads):
+    bgzipped = synthetic_vcfs[1]
+
+    with gzip.open(bgzipped, mode) as expected:
+        lines = list(expected)
+
+    with ThreadedBgzfReader(bgzipped, mode, threads=threads) as reader:
+        assert list(reader) == lines
+
+
+def test_threaded_reader_offset(synthetic_vcfs):
+    bgzipped = synthetic_vcfs[1]
+
+    with ThreadedBgzfReader(bgzipped, "rb", threads=2) as reader:
+        for _ in reader:
+            pass
+
+        assert reader.compressed_offset == os.path.getsize(bgzipped)
+
+
+def test_threaded_rows_match_serial(synthetic_vcfs):
+    bgzipped = synthetic_vcfs[1]
+    serial, threaded = VCF(bgzipped), VCF(bgzipped, threads=2)
+
+    for vcf in (serial, threaded):
+        vcf.add_filter("RankScore>=2")
+
+    assert list(threaded.get_rows(_skip_progress=True)) == list(
+        serial.get_rows(_skip_progress=True)
+    )
+    assert list(threaded.get_rows(_skip_progress=True, as_bytes=True)) == list(
+        serial.get_rows(_skip_progress=True, as_bytes=True)
+    )
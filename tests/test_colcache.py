@@ -0,0 +1,151 @@
+import os
+from functools import partial
+
+import numpy as np
+import pytest
+
+from colcache import META_FILE, cache_key, evict, load_columns
+from columns import MISSING_INT, concat_arrays, iter_arrays
+from vcffile import VCF
+
+FIELDS = ["CHROM", "POS", "REF", "CLNSIG", "CADD", "DP", "DB", "RankScore", "RankResult"]
+
+
+def extracted(vcf: VCF, fields: list[str]) -> dict[str, np.ndarray]:
+    return concat_arrays(iter_arrays(vcf, fields), fields)
+
+
+def assert_same_columns(columns: dict, expected: dict) -> None:
+    assert list(columns) == list(expected)
+
+    for field, column in expected.items():
+        if column.dtype == object:
+            assert columns[field].tolist() == column.tolist(), field
+        else:
+            np.testing.assert_array_equal(columns[field], column, err_msg=field)
+
+
+def entries(cache_dir) -> list[str]:
+    return [name for name in os.listdir(cache_dir) if not name.startswith(".")]
+
+
+def test_round_trip(synthetic_vcfs, tmp_path):
+    vcf = VCF(synthetic_vcfs[0])
+    expected = extracted(vcf, FIELDS)
+
+    stored = load_columns(vcf, FIELDS, str(tmp_path))
+    cached = load_columns(vcf, FIELDS, str(tmp_path))
+
+    assert len(entries(tmp_path)) == 1
+    assert_same_columns(stored, expected)
+    assert_same_columns(cached, expected)
+    # Fixed width (memory-mapped) columns are loaded as such
+    assert isinstance(cached["CHROM"], np.memmap)
+    assert isinstance(cached["POS"], np.memmap)
+
+
+def test_missing_values_survive(synthetic_vcfs, tmp_path):
+    vcf = VCF(synthetic_vcfs[0])
+    load_columns(vcf, FIELDS, str(tmp_path))
+    cached = load_columns(vcf, FIELDS, str(tmp_path))
+
+    clnsig = cached["CLNSIG"].tolist()
+    assert None in clnsig and "" not in clnsig
+    assert any(isinstance(value, str) for value in clnsig)
+
+    assert np.isnan(cached["CADD"]).any()
+    assert (cached["RankScore"] == MISSING_INT).any()
+    assert (cached["RankResult"] == MISSING_INT).any()
+
+
+def test_filters_key_the_cache(synthetic_vcfs, tmp_path):
+    vcf = VCF(synthetic_vcfs[0])
+    vcf.add_filter("RankScore>=3")
+    filtered = load_columns(vcf, FIELDS, str(tmp_path))
+
+    assert_same_columns(filtered, extracted(vcf, FIELDS))
+    assert (filtered["RankScore"] >= 3).all()
+
+    unfiltered = VCF(synthetic_vcfs[0])
+    assert len(load_columns(unfiltered, FIELDS, str(tmp_path))["POS"]) > len(filtered["POS"])
+    assert len(entries(tmp_path)) == 2
+
+
+def test_cache_key(synthetic_vcfs):
+    def key(*filters) -> str:
+        vcf = VCF(synthetic_vcfs[0])
+        for filter_function in filters:
+            vcf.add_filter(filter_function)
+        return cache_key(vcf, FIELDS)
+
+    def above(threshold: int):
+        return lambda row: int(row.split("\t")[1]) > threshold
+
+    def at_least(row: str, threshold: int = 0) -> bool:
+        return int(row.split("\t")[1]) >= threshold
+
+    assert key() == key()
+    assert key("RankScore>=3") == key("RankScore>=3")
+    assert key("RankScore>=3") != key("RankScore>=4")
+    assert key("RankScore>=3", "DB") != key("DB", "RankScore>=3")
+    assert key(above(10)) == key(above(10))
+    assert key(above(10)) != key(above(20))
+    assert key(partial(at_least, threshold=1)) != key(partial(at_least, threshold=2))
+    assert key() != cache_key(VCF(synthetic_vcfs[0]), FIELDS[:-1])
+
+
+def test_changed_vcf_is_not_read_from_cache(synthetic_vcfs, tmp_path):
+    path = str(tmp_path / "changing.vcf")
+    with open(synthetic_vcfs[0]) as source, open(path, "w") as out:
+        out.write(source.read())
+
+    cache_dir = str(tmp_path / "cache")
+    before = load_columns(VCF(path), ["POS"], cache_dir)
+
+    with open(path, "a") as out:
+        out.write("X\t99999\t.\tA\tC\t50\tPASS\tDP=3\tGT\t0/1\t0/0\n")
+
+    after = load_columns(VCF(path), ["POS"], cache_dir)
+    assert len(after["POS"]) == len(before["POS"]) + 1
+    assert after["POS"][-1] == 99999
+
+
+@pytest.mark.parametrize("fields", [["CLNSIG"], ["CHROM", "CLNSIG"]])
+def test_empty_filtered_columns(synthetic_vcfs, tmp_path, fields):
+    vcf = VCF(synthetic_vcfs[0])
+    vcf.add_filter("RankScore>=1000")
+
+    columns = load_columns(vcf, fields, str(tmp_path))
+    cached = load_columns(vcf, fields, str(tmp_path))
+
+    assert [len(cached[field]) for field in fields] == [len(columns[field]) for field in fields]
+    assert all(len(column) == 0 for column in cached.values())
+
+
+def test_evicted_entry_is_a_miss(synthetic_vcfs, tmp_path):
+    vcf = VCF(synthetic_vcfs[0])
+    expected = load_columns(vcf, FIELDS, str(tmp_path))
+
+    # Another process evicting the entry while it's read
+    (entry,) = entries(tmp_path)
+    os.remove(tmp_path / entry / "3.npy")
+
+    assert_same_columns(load_columns(vcf, FIELDS, str(tmp_path)), expected)
+
+
+def test_evict(synthetic_vcfs, tmp_path):
+    vcf = VCF(synthetic_vcfs[0])
+    load_columns(vcf, ["POS"], str(tmp_path))
+    load_columns(vcf, ["CHROM"], str(tmp_path))
+    old, new = sorted(entries(tmp_path), key=lambda name: os.path.getmtime(tmp_path / name))
+    os.utime(tmp_path / old / META_FILE, (1, 1))
+
+    interrupted, writing = tmp_path / ".tmpinterrupted", tmp_path / ".tmpwriting"
+    interrupted.mkdir()
+    writing.mkdir()
+    os.utime(interrupted, (1, 1))
+
+    evict(str(tmp_path), max_size=os.path.getsize(tmp_path / new / "0.npy") + 1000)
+
+    assert entries(tmp_path) == [new]
+    assert not interrupted.exists() and writing.exists()
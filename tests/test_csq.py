@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from csq import CsqParser, csq_arrays, csq_fields, iter_csq_rows, severity
+from header import Header
+
+FIELDS = ["Allele", "Consequence", "IMPACT", "SYMBOL", "Feature"]
+CSQ = ",".join(
+    [
+        "C|intron_variant|MODIFIER|GENE1|T1",
+        "C|splice_region_variant&missense_variant|MODERATE|GENE1|T2",
+        "C|stop_gained|HIGH|GENE2|T3",
+        "C|made_up_variant|MODIFIER|GENE2|T4",
+        "C|synonymous_variant|LOW|GENE1|T5",
+    ]
+)
+
+
+def test_csq_fields():
+    header = Header(
+        [
+            '##INFO=<ID=CSQ,Number=.,Type=String,Description="Consequence annotations '
+            'from Ensembl VEP. Format: Allele|Consequence|IMPACT|SYMBOL|Feature">\n'
+        ]
+    )
+
+    assert csq_fields(header) == FIELDS
+    with pytest.raises(ValueError):
+        csq_fields(header, "ANN")
+
+
+def test_severity():
+    assert severity("stop_gained") < severity("missense_variant") < severity("intron_variant")
+    assert severity("intron_variant&stop_gained") == severity("stop_gained")
+    assert severity("made_up_variant") > severity("sequence_variant")
+
+
+def test_transcripts():
+    parser = CsqParser(FIELDS, ["Feature", "IMPACT"])
+
+    assert parser.transcripts(CSQ) == [
+        ("T1", "MODIFIER"),
+        ("T2", "MODERATE"),
+        ("T3", "HIGH"),
+        ("T4", "MODIFIER"),
+        ("T5", "LOW"),
+    ]
+    assert parser.transcripts(None) == []
+    assert CsqParser(FIELDS, ["SYMBOL"]).transcripts("C|x|HIGH|GENE1|T1") == [("GENE1",)]
+
+
+def test_truncated_transcripts():
+    parser = CsqParser(FIELDS)
+
+    assert parser.transcripts("C|stop_gained,C") == [
+        ("C", "stop_gained", "", "", ""),
+        ("C", "", "", "", ""),
+    ]
+
+
+def test_unknown_fields():
+    with pytest.raises(ValueError, match="Not CSQ subfields: Gene"):
+        CsqParser(FIELDS, ["Feature", "Gene"])
+
+
+def test_most_severe_per_gene():
+    # Consequence and SYMBOL are picked to compare, but not output
+    parser = CsqParser(FIELDS, ["Feature"])
+
+    assert parser.most_severe_per_gene(CSQ) == [("T2",), ("T3",)]
+    assert parser.most_severe_per_gene("") == []
+
+
+def test_most_severe_needs_a_gene():
+    with pytest.raises(ValueError):
+        CsqParser(["Allele", "Consequence"]).most_severe_per_gene(CSQ)
+
+
+def test_rows_and_arrays():
+    variants = [
+        f"1\t10\t.\tA\tC\t50\tPASS\tDP=3;CSQ={CSQ};DB\n",
+        "1\t20\t.\tA\tG\t50\tPASS\tDP=3\n",
+        "2\t30\t.\tG\tT\t50\tPASS\tCSQ=T|stop_lost|HIGH|GENE3|T9\n",
+    ]
+    parser = CsqParser(FIELDS, ["SYMBOL", "Feature"])
+
+    rows = list(iter_csq_rows(variants, parser, most_severe=True))
+    assert rows == [
+        ["1", "10", "A", "C", "GENE1", "T2"],
+        ["1", "10", "A", "C", "GENE2", "T3"],
+        ["2", "30", "G", "T", "GENE3", "T9"],
+    ]
+
+    arrays = csq_arrays(iter(rows), parser.fields, chunk_size=2)
+    assert list(arrays) == ["CHROM", "POS", "REF", "ALT", "SYMBOL", "Feature"]
+    assert arrays["POS"].dtype == np.int64 and arrays["POS"].tolist() == [10, 10, 30]
+    assert arrays["SYMBOL"].tolist() == ["GENE1", "GENE2", "GENE3"]
+
+    empty = csq_arrays(iter([]), parser.fields)
+    assert all(len(column) == 0 for column in empty.values())
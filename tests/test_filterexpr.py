@@ -0,0 +1,111 @@
+import pytest
+
+from filterexpr import FilterExpressionError, compile_filter
+
+
+def row(info: str) -> str:
+    return f"1\t100\t.\tA\tC\t50\tPASS\t{info}\tGT\t0/1\n"
+
+
+def passes(expression: str, info: str) -> bool:
+    """
+    Result on a str row, checked to be the same on the bytes row
+    """
+    result = compile_filter(expression)(row(info))
+    assert compile_filter(expression)(row(info).encode()) == result
+
+    return result
+
+
+@pytest.mark.parametrize(
+    "expression, info, expected",
+    [
+        ("RankScore==17", "RankScore=fam1:17", True),
+        ("RankScore==17", "RankScore=fam1:170", False),
+        ("RankScore==17", "RankScore=17", True),
+        ("RankScore!=17", "RankScore=fam1:17", False),
+        ("RankScore!=17", "RankScore=fam1:16", True),
+        ("RankScore>=5", "RankScore=fam1:5", True),
+        ("RankScore>=5", "RankScore=fam1:4", False),
+        ("RankScore<0", "RankScore=fam1:-2", True),
+        ("CADD==20", "CADD=20.0", True),
+        ("CADD==20", "CADD=20.5", False),
+        ("CADD!=20", "CADD=20.0", False),
+        ("CADD>20", "CADD=25.1,3", True),
+        ("CADD>20", "CADD=3,25.1", False),
+    ],
+)
+def test_numbers(expression, info, expected):
+    assert passes(expression, f"DP=10;{info};DB") is expected
+
+
+@pytest.mark.parametrize(
+    "expression, info, expected",
+    [
+        ("CLNSIG==Pathogenic", "CLNSIG=Pathogenic", True),
+        ("CLNSIG==Pathogenic", "CLNSIG=Likely_pathogenic", False),
+        ("CLNSIG==Pathogenic", "CLNSIG=Pathogenic_low", False),
+        ("CLNSIG=='Pathogenic'", "CLNSIG=Pathogenic", True),
+        ("CLNSIG!=Benign", "CLNSIG=Pathogenic", True),
+        ("CLNSIG!=Benign", "CLNSIG=Benign", False),
+        ("DP==5", "ADP=5", False),
+    ],
+)
+def test_strings(expression, info, expected):
+    assert passes(expression, info) is expected
+
+
+@pytest.mark.parametrize(
+    "expression, info, expected",
+    [
+        ("DB", "DP=10;DB", True),
+        ("DB", "DP=10;DBSNP=rs1", False),
+        ("!DB", "DP=10;DBSNP=rs1", True),
+        ("!DB", "DB;DP=10", False),
+        ("DP", "DP=10", True),
+    ],
+)
+def test_presence(expression, info, expected):
+    assert passes(expression, info) is expected
+
+
+@pytest.mark.parametrize("expression", ["RankScore>=5", "RankScore==5", "CLNSIG==Benign", "DB"])
+def test_missing_keys_reject(expression):
+    assert not passes(expression, "DP=10")
+
+
+@pytest.mark.parametrize("expression", ["RankScore!=5", "CLNSIG!=Benign", "!DB"])
+def test_missing_keys_differ(expression):
+    assert passes(expression, "DP=10")
+
+
+def test_clauses_all_hold():
+    expression = "CLNSIG==Pathogenic && RankScore>=10 && GNOMADAF<0.01"
+
+    assert passes(expression, "RankScore=fam1:12;CLNSIG=Pathogenic;GNOMADAF=0.001")
+    assert not passes(expression, "RankScore=fam1:9;CLNSIG=Pathogenic;GNOMADAF=0.001")
+    assert not passes(expression, "RankScore=fam1:12;CLNSIG=Benign;GNOMADAF=0.001")
+    assert not passes(expression, "RankScore=fam1:12;CLNSIG=Pathogenic")
+
+
+def test_reordering_keeps_results():
+    filter_function = compile_filter("DP>=20 && CLNSIG==Pathogenic")
+    infos = [
+        "DP=30;CLNSIG=Benign",
+        "DP=40;CLNSIG=Benign",
+        "DP=10;CLNSIG=Pathogenic",
+        "DP=25;CLNSIG=Pathogenic",
+    ]
+
+    before = [filter_function(row(info)) for info in infos]
+    # CLNSIG rejected more rows
+    filter_function.reorder()
+    assert repr(filter_function.clauses[0]) == "CLNSIG==Pathogenic"
+
+    assert [filter_function(row(info)) for info in infos] == before == [False, False, False, True]
+
+
+@pytest.mark.parametrize("expression", ["RankScore>=high", "!DB==1", "DP=>5", "1DP>5"])
+def test_invalid_expressions(expression):
+    with pytest.raises(FilterExpressionError):
+        compile_filter(expression)
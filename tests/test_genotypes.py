@@ -0,0 +1,169 @@
+import numpy as np
+import pytest
+
+from columns import MISSING_INT
+from genotypes import MISSING_GT, SampleQC, iter_genotypes
+from vcffile import VCF
+
+FORMAT_HEADER = [
+    '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">',
+    '##FORMAT=<ID=DP,Number=1,Type=Integer,Description="Read depth">',
+    '##FORMAT=<ID=GQ,Number=1,Type=Integer,Description="Genotype quality">',
+    '##FORMAT=<ID=AD,Number=R,Type=Integer,Description="Allelic depths">',
+    '##FORMAT=<ID=AF,Number=A,Type=Float,Description="Allele fractions">',
+    '##FORMAT=<ID=PL,Number=G,Type=Integer,Description="Genotype likelihoods">',
+    '##FORMAT=<ID=FT,Number=1,Type=String,Description="Sample filter">',
+]
+SAMPLES = ["child", "mother", "father"]
+
+
+def site(pos: int, alt: str = "C", info: str = "DP=10") -> list[str]:
+    return ["1", str(pos), ".", "A", alt, "50", "PASS", info]
+
+
+def genotypes(path: str, keys: list[str], **kwargs) -> dict[str, np.ndarray]:
+    vcf = VCF(path)
+    chunks = list(iter_genotypes(vcf, keys, **kwargs))
+    return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_genotype_codes(write_vcf, chunk_size):
+    path = write_vcf(
+        "gt.vcf",
+        [
+            site(1) + ["GT", "0/0", "0/1", "1/1"],
+            site(2, "C,G") + ["GT", "1|2", "0|1", "./."],
+            site(3) + ["GT:DP", "1", "0", ".:5"],
+            site(4) + ["GT", "0/.", "1/1", "0/0"],
+        ],
+        FORMAT_HEADER,
+        SAMPLES,
+    )
+
+    assert genotypes(path, ["GT"], chunk_size=chunk_size)["GT"].tolist() == [
+        [0, 1, 2],
+        [2, 1, MISSING_GT],
+        [1, 0, MISSING_GT],
+        [MISSING_GT, 2, 0],
+    ]
+
+
+def test_samples_and_missing_keys(write_vcf):
+    path = write_vcf(
+        "keys.vcf",
+        [
+            site(1) + ["GT:DP:GQ", "0/1:12:99", "0/0:8:.", "1/1:3:20"],
+            # Trailing keys dropped, and records without DP
+            site(2) + ["GT:DP:GQ", "0/1:7", "0/0", "./."],
+            site(3) + ["GT:GQ", "0/1:30", "0/0:40", "0/0:50"],
+        ],
+        FORMAT_HEADER,
+        SAMPLES,
+    )
+
+    chunk = genotypes(path, ["DP", "GQ", "FT"], samples=["father", "child"])
+    assert chunk["DP"].dtype == np.int32
+    assert chunk["DP"].tolist() == [[3, 12], [MISSING_INT, 7], [MISSING_INT, MISSING_INT]]
+    assert chunk["GQ"].tolist() == [[20, 99], [MISSING_INT, MISSING_INT], [50, 30]]
+    assert chunk["FT"].tolist() == [[".", "."]] * 3
+
+    with pytest.raises(ValueError, match="brother"):
+        genotypes(path, ["GT"], samples=["brother"])
+
+
+def test_values_per_allele_are_padded(write_vcf):
+    path = write_vcf(
+        "alleles.vcf",
+        [
+            site(1) + ["GT:AD:AF:PL", "0/1:10,5:0.33:20,0,30", "0/0:8,0:0:0,30,60"],
+            # Multiallelic: extra values dropped
+            site(2, "C,G") + ["GT:AD:AF:PL", "1/2:0,4,6:0.4,0.6:90,50,40,30,0,20", "./.:.:.:."],
+            site(3) + ["GT:AD", "0/1:7", "0/0"],
+        ],
+        FORMAT_HEADER,
+        SAMPLES[:2],
+    )
+
+    chunk = genotypes(path, ["AD", "AF", "PL"])
+    assert chunk["AD"].shape == (3, 2, 2) and chunk["PL"].shape == (3, 2, 3)
+    assert chunk["AD"].tolist() == [
+        [[10, 5], [8, 0]],
+        [[0, 4], [MISSING_INT, MISSING_INT]],
+        [[7, MISSING_INT], [MISSING_INT, MISSING_INT]],
+    ]
+    assert chunk["PL"][:2].tolist() == [
+        [[20, 0, 30], [0, 30, 60]],
+        [[90, 50, 40], [MISSING_INT] * 3],
+    ]
+
+    # Number=A of biallelic records, one value per sample
+    assert chunk["AF"].dtype == np.float32 and chunk["AF"].shape == (3, 2)
+    np.testing.assert_allclose(chunk["AF"][:2, 0], [0.33, 0.4], rtol=1e-6)
+    assert np.isnan(chunk["AF"][1:, 1]).all() and np.isnan(chunk["AF"][2, 0])
+
+    three_alleles = genotypes(path, ["AD"], max_alleles=3)["AD"]
+    assert three_alleles[1, 0].tolist() == [0, 4, 6]
+
+
+def test_fields(write_vcf):
+    records = [
+        site(10, info="DP=10;DB") + ["GT", "0/1", "0/0"],
+        site(20, info="DP=3") + ["GT", "1/1", "0/1"],
+    ]
+    path = write_vcf("fields.vcf", records, FORMAT_HEADER, SAMPLES[:2])
+
+    chunk = genotypes(path, ["GT"], fields=["POS", "DP", "DB"])
+    assert chunk["POS"].tolist() == [10, 20]
+    assert chunk["DP"].tolist() == [10, 3]
+    assert chunk["DB"].tolist() == [True, False]
+    assert chunk["GT"].tolist() == [[1, 0], [2, 1]]
+
+
+def test_sites_only(write_vcf):
+    path = write_vcf("sites.vcf", [site(10, info="DP=10;DB"), site(20, info="DP=3")])
+
+    chunk = genotypes(path, ["GT"], fields=["POS", "DP", "DB"])
+    assert chunk["GT"].shape == (2, 0)
+    assert chunk["POS"].tolist() == [10, 20]
+    assert chunk["DP"].tolist() == [10, 3]
+    assert chunk["DB"].tolist() == [True, False]
+
+
+def test_sample_qc(write_vcf):
+    path = write_vcf(
+        "qc.vcf",
+        [
+            site(1) + ["GT:DP:GQ", "0/1:10:99", "0/0:20:10"],
+            site(2) + ["GT:DP:GQ", "1/1:30:50", "./.:.:."],
+            site(3) + ["GT:DP:GQ", "0/1:20:60", "0/1:10:30"],
+        ],
+        FORMAT_HEADER,
+        SAMPLES[:2],
+    )
+
+    qc = SampleQC(2)
+    for chunk in VCF(path).to_genotypes(["GT", "DP", "GQ"], chunk_size=2):
+        qc.add(chunk, min_gq=20)
+
+    assert qc.records == 3
+    assert qc.called.tolist() == [3, 1]
+    assert qc.genotypes.tolist() == [[0, 2, 1], [0, 1, 0]]
+    assert qc.dp_sum.tolist() == [60, 30] and qc.dp_n.tolist() == [3, 2]
+
+
+def test_reordered_samples_of_short_records(write_vcf):
+    path = write_vcf(
+        "short.vcf",
+        [
+            site(1) + ["GT:DP", "0/1:12", "0/0:8", "1/1:3"],
+            # No father column
+            site(2) + ["GT:DP", "0/1:7", "0/0:9"],
+        ],
+        FORMAT_HEADER,
+        SAMPLES,
+    )
+
+    chunk = genotypes(path, ["GT", "DP"], samples=["father", "child"])
+    assert chunk["GT"].tolist() == [[2, 1], [MISSING_GT, 1]]
+    assert chunk["DP"].tolist() == [[3, 12], [MISSING_INT, 7]]
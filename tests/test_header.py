@@ -0,0 +1,51 @@
+import pytest
+
+from header import Header, parse_structured_value
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("<ID=DP,Number=1,Type=Integer>", {"ID": "DP", "Number": "1", "Type": "Integer"}),
+        (
+            '<ID=CSQ,Number=.,Type=String,Description="Format: Allele|Consequence, x=y">',
+            {
+                "ID": "CSQ",
+                "Number": ".",
+                "Type": "String",
+                "Description": "Format: Allele|Consequence, x=y",
+            },
+        ),
+        ('<ID=A,Description="say \\"hi\\", \\\\ok">', {"ID": "A", "Description": 'say "hi", \\ok'}),
+        ("<ID=chr1,length=248956422>\n", {"ID": "chr1", "length": "248956422"}),
+        ('<ID=B,Description="">', {"ID": "B", "Description": ""}),
+        ("<ID=URL,Source=http://a.b/c?d=e>", {"ID": "URL", "Source": "http://a.b/c?d=e"}),
+    ],
+)
+def test_parse_structured_value(value, expected):
+    assert parse_structured_value(value) == expected
+
+
+def test_header():
+    header = Header(
+        [
+            "##fileformat=VCFv4.2\n",
+            '##INFO=<ID=DB,Number=0,Type=Flag,Description="dbSNP, build 151">\n',
+            '##INFO=<ID=AF,Number=A,Type=Float,Description="Allele frequency">\n',
+            '##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">\n',
+            '##FILTER=<ID=LowQual,Description="Low quality">\n',
+            "##contig=<ID=1,length=1000>\n",
+            "##contig=<ID=MT>\n",
+            "##source=caller\n",
+            "##source=annotator\n",
+            "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tchild\tmother\n",
+        ]
+    )
+
+    assert header.info["DB"]["Description"] == "dbSNP, build 151"
+    assert header.info_types() == {"DB": ("0", "Flag"), "AF": ("A", "Float")}
+    assert list(header.format) == ["GT"]
+    assert list(header.filter) == ["LowQual"]
+    assert header.contig_lengths() == {"1": 1000, "MT": None}
+    assert header.meta == {"fileformat": ["VCFv4.2"], "source": ["caller", "annotator"]}
+    assert header.samples == ["child", "mother"]
@@ -0,0 +1,103 @@
+import os
+import shutil
+
+import pytest
+
+from lineindex import LineIndex, find_line_index
+from vcffile import VCF
+
+RANGES = [
+    ("1", 1, 300_000),
+    ("1", 1000, 60_000),
+    ("2", 150_000, 150_000),
+    ("2", 42, 41_000),
+    ("X", 99_000, 100_000),
+    ("3", 1, 1000),
+]
+
+
+@pytest.fixture
+def plain_vcf(synthetic_vcfs, tmp_path) -> str:
+    path = str(tmp_path / "indexed.vcf")
+    shutil.copy(synthetic_vcfs[0], path)
+
+    return path
+
+
+def test_ranges_match_scan(plain_vcf, scan):
+    VCF(plain_vcf).build_line_index()
+    vcf = VCF(plain_vcf)
+    assert vcf._sorted_line_index() is not None
+
+    records = scan(plain_vcf)
+    first, last, single = (records[idx].split("\t") for idx in (10, 25, 100))
+    ranges = RANGES + [
+        (first[0], int(first[1]), int(last[1])),
+        (single[0], int(single[1]), int(single[1])),
+    ]
+
+    for chromosome, start, end in ranges:
+        found = list(vcf.get_range(chromosome, start, end, _skip_progress=True))
+        assert found == scan(plain_vcf, chromosome, start, end)
+
+
+def test_blank_lines(plain_vcf, scan, tmp_path):
+    path = str(tmp_path / "blank.vcf")
+    with open(plain_vcf) as vcf, open(path, "w") as out:
+        for n, line in enumerate(vcf):
+            out.write(line)
+            if n % 500 == 499:
+                out.write("\n")
+
+    VCF(path).build_line_index()
+    vcf = VCF(path)
+
+    assert vcf.get_line_index().n_records == len(scan(path))
+    for chromosome, start, end in RANGES:
+        found = list(vcf.get_range(chromosome, start, end, _skip_progress=True))
+        assert found == scan(path, chromosome, start, end)
+
+
+def test_file_round_trip(plain_vcf, scan):
+    built = VCF(plain_vcf).build_line_index()
+    loaded = LineIndex.from_file(find_line_index(plain_vcf))
+
+    assert loaded.to_bytes() == built.to_bytes()
+    assert loaded.is_current(plain_vcf)
+    assert loaded.record_counts() == {"1": 1500, "2": 1000, "X": 500}
+    assert sum(loaded.record_counts().values()) == len(scan(plain_vcf))
+
+
+def test_split_on_record_boundaries(plain_vcf, scan):
+    line_index = VCF(plain_vcf).build_line_index(write=False)
+    ranges = line_index.split(7)
+
+    with open(plain_vcf, "rb") as vcf:
+        data = vcf.read()
+
+    chunks = [data[start:end].decode() for start, end in ranges]
+    assert "".join(chunks) == "".join(scan(plain_vcf))
+    assert all(chunk.endswith("\n") for chunk in chunks)
+
+
+def test_stale_index_is_ignored(plain_vcf):
+    VCF(plain_vcf).build_line_index()
+
+    with open(plain_vcf, "a") as vcf:
+        vcf.write("X\t99999\t.\tA\tC\t50\tPASS\tDP=3\tGT\t0/1\t0/0\n")
+
+    vcf = VCF(plain_vcf)
+    assert vcf.get_line_index() is None
+    assert len(list(vcf.get_range("X", 99999, 99999, _skip_progress=True))) == 1
+
+
+def test_unsorted(write_vcf):
+    path = write_vcf(
+        "unsorted.vcf", ["1\t20\t.\tA\tC\t50\tPASS\tDP=1", "1\t10\t.\tA\tC\t50\tPASS\tDP=1"]
+    )
+    line_index = LineIndex.build(path)
+
+    assert not line_index.is_sorted and line_index.record_counts() is None
+    with pytest.raises(ValueError):
+        line_index.record_range("1", 1, 100)
+    assert os.path.getsize(path) == line_index.offsets[-1]
@@ -0,0 +1,75 @@
+import pytest
+
+from vcffile import UnsortedVCFError, merge_join, merge_join_variants
+
+
+def test_merge_join_outer():
+    left = [(1, "a1"), (3, "a3"), (4, "a4")]
+    right = [(2, "b2"), (3, "b3"), (5, "b5")]
+
+    assert list(merge_join(left, right)) == [
+        ((1, "a1"), None),
+        (None, (2, "b2")),
+        ((3, "a3"), (3, "b3")),
+        ((4, "a4"), None),
+        (None, (5, "b5")),
+    ]
+
+
+def test_merge_join_unsorted():
+    with pytest.raises(UnsortedVCFError):
+        list(merge_join([(1, "a"), (3, "b"), (2, "c")], [(1, "x")]))
+
+
+def test_variants_at_one_position_in_any_order():
+    left = [
+        ((0, 100), ("A", "C"), "left A>C"),
+        ((0, 100), ("A", "G"), "left A>G"),
+        ((0, 100), ("AT", "A"), "left AT>A"),
+    ]
+    right = [
+        ((0, 100), ("AT", "A"), "right AT>A"),
+        ((0, 100), ("A", "T"), "right A>T"),
+        ((0, 100), ("A", "C"), "right A>C"),
+    ]
+
+    assert list(merge_join_variants(left, right)) == [
+        ("left A>C", "right A>C"),
+        ("left A>G", None),
+        ("left AT>A", "right AT>A"),
+        (None, "right A>T"),
+    ]
+
+
+def test_repeated_variants_pair_up():
+    left = [((0, 5), ("A", "C"), "l1"), ((0, 5), ("A", "C"), "l2"), ((0, 5), ("A", "C"), "l3")]
+    right = [((0, 5), ("A", "C"), "r1")]
+
+    assert list(merge_join_variants(left, right)) == [("l1", "r1"), ("l2", None), ("l3", None)]
+
+
+def test_positions_on_either_side():
+    left = [((0, 1), ("A", "C"), "l1"), ((0, 3), ("G", "T"), "l3"), ((1, 1), ("C", "A"), "l4")]
+    right = [((0, 2), ("A", "C"), "r2"), ((0, 3), ("G", "T"), "r3"), ((1, 1), ("C", "G"), "r4")]
+
+    assert list(merge_join_variants(left, right)) == [
+        ("l1", None),
+        (None, "r2"),
+        ("l3", "r3"),
+        ("l4", None),
+        (None, "r4"),
+    ]
+
+
+def test_empty_side():
+    left = [((0, 1), ("A", "C"), "l1"), ((0, 1), ("A", "G"), "l2")]
+
+    assert list(merge_join_variants(left, [])) == [("l1", None), ("l2", None)]
+    assert list(merge_join_variants([], left)) == [(None, "l1"), (None, "l2")]
+
+
+def test_variants_unsorted_positions():
+    left = [((0, 5), ("A", "C"), "l1"), ((0, 4), ("A", "C"), "l2")]
+
+    with pytest.raises(UnsortedVCFError):
+        list(merge_join_variants(left, []))
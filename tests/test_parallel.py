@@ -0,0 +1,46 @@
+import pytest
+
+from vcffile import VCF
+
+
+def high_depth(row: str) -> bool:
+    # Module level, so it pickles to the workers
+    return "DP=4" in row or "DP=3" in row
+
+
+@pytest.fixture(params=["plain", "bgzipped"])
+def path(request, synthetic_vcfs) -> str:
+    return synthetic_vcfs[0] if request.param == "plain" else synthetic_vcfs[1]
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_rows_in_file_order(path, workers):
+    vcf = VCF(path)
+    serial = list(vcf.get_rows(_skip_progress=True))
+
+    assert len(vcf.plan_chunks(workers * 2)) > 1
+    assert list(vcf.get_rows(_skip_progress=True, workers=workers)) == serial
+
+
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_filtered_rows_in_file_order(path, as_bytes):
+    vcf = VCF(path)
+    vcf.add_filter("RankScore>=2 && CADD>10")
+    vcf.add_filter(high_depth)
+
+    serial = list(vcf.get_rows(_skip_progress=True, as_bytes=as_bytes))
+    parallel = list(vcf.get_rows(_skip_progress=True, workers=2, as_bytes=as_bytes))
+
+    assert parallel == serial
+    assert 0 < len(serial) < VCF(path).nbr_variants()
+
+
+def test_skip_mito(write_vcf):
+    records = [
+        f"{chrom}\t{pos}\t.\tA\tC\t50\tPASS\tDP=5" for chrom in "1M2" for pos in range(1, 400)
+    ]
+    vcf = VCF(write_vcf("mito.vcf", records))
+
+    serial = list(vcf.get_rows(skip_mito=True, _skip_progress=True))
+    assert len(serial) == 2 * 399
+    assert list(vcf.get_rows(skip_mito=True, _skip_progress=True, workers=2)) == serial
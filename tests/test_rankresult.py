@@ -0,0 +1,30 @@
+from click.testing import CliRunner
+
+from rankresult import parse_rank_result
+
+RANK_RESULT = '##INFO=<ID=RankResult,Number=.,Type=String,Description="Gnomad|Clinvar|CADD">'
+
+
+def test_short_rank_result(write_vcf, tmp_path):
+    vcf = write_vcf(
+        "short.vcf",
+        [
+            "1\t10\t.\tA\tC\t50\tPASS\tRankScore=fam1:3;RankResult=1|2",
+            "1\t20\t.\tA\tG\t50\tPASS\tRankScore=fam1:6;RankResult=1|2|3;CLNSIG=Benign",
+            "1\t30\t.\tA\tT\t50\tPASS\tDP=10",
+        ],
+        [RANK_RESULT],
+    )
+    output = tmp_path / "out.tsv"
+
+    result = CliRunner().invoke(parse_rank_result, [vcf, "-o", str(output)])
+    assert result.exit_code == 0, result.output
+
+    header, *rows = [line.split("\t") for line in output.read_text().splitlines()]
+    assert header[3:7] == ["ALT", "Gnomad", "Clinvar", "CADD"]
+    assert header[-2:] == ["rank_result_sum", "info_field_rank_score"]
+
+    assert rows == [
+        ["1", "10", "A", "C", "1", "2", "NA", "", "", "", "3", "3"],
+        ["1", "20", "A", "G", "1", "2", "3", "Benign", "", "", "6", "6"],
+    ]
@@ -0,0 +1,58 @@
+from rankscore import stream_rank_scores
+from vcffile import VCF
+
+
+def record(chrom: str, pos: int, rank_score: int, ref: str = "A", alt: str = "C") -> str:
+    return f"{chrom}\t{pos}\t.\t{ref}\t{alt}\t50\tPASS\tRankScore=fam1:{rank_score}"
+
+
+def joined(path1: str, path2: str) -> list:
+    return list(stream_rank_scores(VCF(path1), VCF(path2)))
+
+
+def test_contigs_missing_from_headers(write_vcf):
+    vcf1 = write_vcf("a.vcf", [record("1", 10, 1), record("3", 10, 3)])
+    vcf2 = write_vcf("b.vcf", [record("1", 10, 1), record("2", 10, 2), record("3", 10, 4)])
+
+    assert joined(vcf1, vcf2) == [
+        (("1", "10", "A", "C"), 1, 1),
+        (("2", "10", "A", "C"), "NA", 2),
+        (("3", "10", "A", "C"), 3, 4),
+    ]
+    assert joined(vcf2, vcf1) == [
+        (("1", "10", "A", "C"), 1, 1),
+        (("2", "10", "A", "C"), 2, "NA"),
+        (("3", "10", "A", "C"), 4, 3),
+    ]
+
+
+def test_contigs_in_natural_order(write_vcf):
+    vcf1 = write_vcf("a.vcf", [record("chr2", 5, 1), record("chr10", 5, 2), record("chrX", 5, 3)])
+    vcf2 = write_vcf("b.vcf", [record("chr10", 5, 2), record("chrX", 1, 7)])
+
+    assert [(variant[:2], score1, score2) for variant, score1, score2 in joined(vcf1, vcf2)] == [
+        (("chr2", "5"), 1, "NA"),
+        (("chr10", "5"), 2, 2),
+        (("chrX", "1"), "NA", 7),
+        (("chrX", "5"), 3, "NA"),
+    ]
+
+
+def test_header_contig_order(write_vcf):
+    # Header order wins over natural order
+    contigs = ["##contig=<ID=X>", "##contig=<ID=2>", "##contig=<ID=1>"]
+    vcf1 = write_vcf("a.vcf", [record("X", 5, 1), record("1", 5, 2)], contigs)
+    vcf2 = write_vcf("b.vcf", [record("X", 5, 1), record("2", 5, 3), record("1", 5, 2)])
+
+    assert [variant[0] for variant, _, _ in joined(vcf1, vcf2)] == ["X", "2", "1"]
+
+
+def test_variants_at_one_position(write_vcf):
+    vcf1 = write_vcf("a.vcf", [record("1", 10, 1, alt="C"), record("1", 10, 2, alt="G")])
+    vcf2 = write_vcf("b.vcf", [record("1", 10, 5, alt="G"), record("1", 10, 6, alt="T")])
+
+    assert joined(vcf1, vcf2) == [
+        (("1", "10", "A", "C"), 1, "NA"),
+        (("1", "10", "A", "G"), 2, 5),
+        (("1", "10", "A", "T"), "NA", 6),
+    ]
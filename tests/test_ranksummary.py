@@ -0,0 +1,156 @@
+import json
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from columns import MISSING_INT
+from constants import INFO_FIELDS
+from ranksummary import ALL_RECORDS, NO_CLNSIG, RankResultSummary, merge_summaries
+from vcffile import VCF
+
+COMPONENTS = ["Gnomad", "Clinvar", "CADD"]
+RANK_RESULT = '##INFO=<ID=RankResult,Number=.,Type=String,Description="Gnomad|Clinvar|CADD">'
+RECORDS = [
+    "RankScore=fam1:3;RankResult=1|2|0;CLNSIG=Benign",
+    "RankScore=fam1:9;RankResult=4|0|5;CLNSIG=Pathogenic",
+    "RankScore=fam1:-1;RankResult=-1|0|0",
+    "RankScore=fam1:6;RankResult=1|2|3;CLNSIG=Benign",
+    "DP=10",
+    "RankScore=fam1:2;RankResult=2|0",
+]
+
+
+def summarize(path: str, chunk_size: int = 1000, by_clnsig: bool = True) -> RankResultSummary:
+    summary = RankResultSummary(COMPONENTS, by_clnsig)
+    summary.files.append(path)
+
+    for chunk in VCF(path).to_arrays(summary.fields, chunk_size=chunk_size):
+        summary.add_chunk(chunk)
+
+    return summary
+
+
+@pytest.fixture
+def rank_vcf(write_vcf):
+    def _rank_vcf(name: str, infos: list[str]) -> str:
+        records = [
+            f"1\t{10 * idx + 10}\t.\tA\tC\t50\tPASS\t{info}" for idx, info in enumerate(infos)
+        ]
+        return write_vcf(name, records, [RANK_RESULT])
+
+    return _rank_vcf
+
+
+def test_add_chunk(rank_vcf):
+    summary = summarize(rank_vcf("ranks.vcf", RECORDS))
+    stats = summary.groups[ALL_RECORDS]
+
+    assert summary.records == 6 and stats.records == 5
+    # Gnomad, Clinvar, CADD, their sum and RankScore
+    assert stats.n.tolist() == [5, 5, 4, 5, 5]
+    assert stats.sum.tolist() == [7, 4, 8, 19, 19]
+    assert stats.nonzero.tolist() == [5, 2, 2, 5, 5]
+    assert stats.mean(0) == 1.4 and stats.mean(2) == 2.0
+    assert stats.sd(1) == pytest.approx(np.std([2, 0, 0, 2, 0], ddof=1))
+    assert (stats.minimum(0), stats.median(0), stats.maximum(0)) == (-1, 1, 4)
+    assert stats.values[1] == {0: 3, 2: 2}
+
+    assert sorted(summary.groups) == sorted([ALL_RECORDS, "Benign", "Pathogenic", NO_CLNSIG])
+    assert summary.groups["Benign"].sum.tolist() == [2, 4, 3, 9, 9]
+    assert summary.groups[NO_CLNSIG].records == 2
+
+
+def test_no_clnsig_groups(rank_vcf):
+    summary = summarize(rank_vcf("ranks.vcf", RECORDS), by_clnsig=False)
+
+    assert list(summary.groups) == [ALL_RECORDS]
+    assert INFO_FIELDS.CLINVAR_SIGNIFICANCE not in summary.fields
+
+
+def test_missing_values_are_not_counted():
+    summary = RankResultSummary(COMPONENTS)
+    summary.add_chunk(
+        {
+            INFO_FIELDS.RANK_RESULT: np.array([[1, MISSING_INT, 3], [MISSING_INT] * 3]),
+            INFO_FIELDS.RANK_SCORE: np.array([MISSING_INT, 5]),
+        }
+    )
+    stats = summary.groups[ALL_RECORDS]
+
+    assert stats.records == 1
+    assert stats.n.tolist() == [1, 0, 1, 1, 0]
+    assert (stats.mean(1), stats.sd(1), stats.median(1)) == (None, None, None)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 4])
+def test_merge_equals_one_summary(rank_vcf, chunk_size):
+    whole = summarize(rank_vcf("whole.vcf", RECORDS + RECORDS[:3]))
+
+    merged = summarize(rank_vcf("part1.vcf", RECORDS), chunk_size)
+    merged.merge(summarize(rank_vcf("part2.vcf", RECORDS[:3]), chunk_size))
+
+    expected, found = whole.to_dict(), merged.to_dict()
+    assert found["files"] == [merged.files[0], merged.files[1]]
+    assert found["records"] == expected["records"] == 9
+    assert found["groups"] == expected["groups"]
+
+
+def test_dict_round_trip(rank_vcf):
+    summary = summarize(rank_vcf("ranks.vcf", RECORDS))
+    data = json.loads(json.dumps(summary.to_dict()))
+
+    assert RankResultSummary.from_dict(data).to_dict() == summary.to_dict()
+
+    with pytest.raises(ValueError):
+        RankResultSummary.from_dict({**data, "version": 0})
+
+
+def test_merge_errors(rank_vcf):
+    summary = summarize(rank_vcf("ranks.vcf", RECORDS))
+
+    with pytest.raises(ValueError, match="components differ"):
+        summary.merge(RankResultSummary(COMPONENTS[:2], by_clnsig=True))
+    with pytest.raises(ValueError, match="CLNSIG"):
+        summary.merge(RankResultSummary(COMPONENTS, by_clnsig=False))
+
+
+def test_merge_summaries(rank_vcf, tmp_path):
+    paths = []
+    for name, infos in [("a", RECORDS), ("b", RECORDS[:3])]:
+        path = tmp_path / f"{name}.json"
+        with open(path, "w") as out:
+            summarize(rank_vcf(f"{name}.vcf", infos)).write_json(out)
+        paths.append(str(path))
+
+    output = tmp_path / "merged.json"
+    result = CliRunner().invoke(merge_summaries, paths + ["--json", "-o", str(output)])
+    assert result.exit_code == 0, result.output
+
+    merged = RankResultSummary.load(str(output))
+    assert merged.records == 9
+    assert merged.groups["Pathogenic"].records == 2
+
+    report = CliRunner().invoke(merge_summaries, paths)
+    assert report.exit_code == 0, report.output
+    assert "CLNSIG=Benign, 3 with a RankResult" in report.output
+
+    (tmp_path / "other.json").write_text('{"format": "other"}')
+    result = CliRunner().invoke(merge_summaries, [paths[0], str(tmp_path / "other.json")])
+    assert result.exit_code != 0 and "other.json" in result.output
+
+
+def test_empty_clnsig_is_missing(rank_vcf):
+    summary = summarize(
+        rank_vcf(
+            "empty.vcf",
+            [
+                "RankScore=fam1:3;RankResult=1|2|0;CLNSIG=",
+                "RankScore=fam1:1;RankResult=1|0|0",
+                "RankScore=fam1:9;RankResult=4|0|5;CLNSIG=Pathogenic",
+            ],
+        )
+    )
+
+    assert sorted(summary.groups) == sorted([ALL_RECORDS, "Pathogenic", NO_CLNSIG])
+    assert summary.groups[NO_CLNSIG].records == 2
@@ -0,0 +1,145 @@
+import shutil
+
+import pytest
+from click.testing import CliRunner
+
+from infofield import get_info_fields
+from regions import (
+    MAX_POSITION,
+    Region,
+    RegionLookup,
+    merge_regions,
+    parse_region,
+    read_bed,
+)
+from vcffile import VCF
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("chr1:1,000-2,000", Region("chr1", 1000, 2000, "chr1:1,000-2,000")),
+        ("2:500", Region("2", 500, 500, "2:500")),
+        ("X", Region("X", 1, MAX_POSITION, "X")),
+    ],
+)
+def test_parse_region(text, expected):
+    assert parse_region(text) == expected
+
+
+@pytest.mark.parametrize("text", ["1:a-b", "1:20-10"])
+def test_parse_region_errors(text):
+    with pytest.raises(ValueError):
+        parse_region(text)
+
+
+def test_read_bed(tmp_path):
+    bed = tmp_path / "regions.bed"
+    bed.write_text(
+        "track name=test\n#comment\n\nchr1\t99\t200\tGENE1\nchr2\t0\t10\nchr2\t10\t20\t\n"
+    )
+
+    # BED starts are 0-based, ends exclusive: 1-based inclusive regions
+    assert read_bed(str(bed)) == [
+        Region("chr1", 100, 200, "GENE1"),
+        Region("chr2", 1, 10, "chr2:1-10"),
+        Region("chr2", 11, 20, "chr2:11-20"),
+    ]
+
+
+def test_merge_regions():
+    a, b, c = Region("1", 100, 200, "a"), Region("1", 150, 300, "b"), Region("1", 250, 260, "c")
+    adjacent = Region("1", 301, 400, "adjacent")
+    x, y = Region("X", 5, 10, "x"), Region("Y", 1, 2, "y")
+    unknown = Region("chrUn", 1, 2, "unknown")
+
+    merged = merge_regions([y, unknown, adjacent, c, x, b, a], ["1", "X", "Y"])
+
+    assert [(region.chrom, region.start, region.end) for region in merged] == [
+        ("1", 100, 300),
+        ("1", 301, 400),
+        ("X", 5, 10),
+        ("Y", 1, 2),
+        ("chrUn", 1, 2),
+    ]
+    assert merged[0].members == [a, b, c]
+    assert merged[0].names_at(255) == ["b", "c"]
+    assert merged[0].names_at(120) == ["a"]
+
+
+def test_region_lookup():
+    merged = merge_regions([Region("1", 10, 20, "a"), Region("1", 30, 40, "b")])
+    lookup = RegionLookup(merged)
+
+    assert [lookup.find("1", pos) for pos in (9, 10, 20, 25, 30, 40, 41)] == [
+        None,
+        merged[0],
+        merged[0],
+        None,
+        merged[1],
+        merged[1],
+        None,
+    ]
+    assert lookup.find("2", 15) is None
+
+
+@pytest.fixture
+def line_indexed_vcf(synthetic_vcfs, tmp_path) -> str:
+    path = str(tmp_path / "indexed.vcf")
+    shutil.copy(synthetic_vcfs[0], path)
+    VCF(path).build_line_index()
+
+    return path
+
+
+@pytest.mark.parametrize("indexed", ["tabix", "line index", "none"])
+def test_regions_match_scan(synthetic_vcfs, line_indexed_vcf, scan, indexed):
+    path = {"tabix": synthetic_vcfs[1], "line index": line_indexed_vcf}.get(indexed)
+    vcf = VCF(path or synthetic_vcfs[0])
+
+    regions = [
+        Region("1", 5000, 40_000, "a"),
+        Region("1", 30_000, 80_000, "b"),
+        Region("X", 1, 50_000, "c"),
+        Region("2", 190_000, 200_000, "d"),
+    ]
+    merged = merge_regions(regions, vcf.get_contigs())
+
+    found = [
+        (region.chrom, region.start, variant)
+        for region, variant in vcf.get_regions(merged, _skip_progress=True)
+    ]
+    expected = [
+        (region.chrom, region.start, record)
+        for region in merged
+        for record in scan(synthetic_vcfs[0], region.chrom, region.start, region.end)
+    ]
+    assert found == expected
+
+
+def test_info_fields(write_vcf, tmp_path):
+    vcf = write_vcf(
+        "info.vcf",
+        [
+            "1\t10\t.\tA\tC\t50\tPASS\tDB;DP=3",
+            "1\t20\t.\tA\tG\t50\tPASS\tDB=;DP=4",
+            "1\t30\t.\tA\tT\t50\tPASS\tDB=rs1;DP=5",
+            "1\t40\t.\tA\tT\t50\tPASS\tDP=6",
+        ],
+    )
+    bed = tmp_path / "regions.bed"
+    bed.write_text("1\t14\t35\tlate\n")
+    output = tmp_path / "out.tsv"
+
+    result = CliRunner().invoke(
+        get_info_fields, [vcf, "1:5-25", "DB", "--bed", str(bed), "-o", str(output)]
+    )
+    assert result.exit_code == 0, result.output
+
+    rows = [line.split("\t")[1:] for line in output.read_text().splitlines()[1:]]
+    # Flags and empty values are NA, like absent keys
+    assert rows == [
+        ["1:5-25", "1", "10", "A", "C", "NA"],
+        ["1:5-25,late", "1", "20", "A", "G", "NA"],
+        ["late", "1", "30", "A", "T", "rs1"],
+    ]
@@ -0,0 +1,35 @@
+from vcffile import VCF
+
+RANGES = [
+    ("1", 1, 300_000),
+    ("1", 1000, 60_000),
+    ("2", 150_000, 150_000),
+    ("2", 42, 41_000),
+    ("X", 99_000, 100_000),
+    ("3", 1, 1000),
+]
+
+
+def test_ranges_match_scan(synthetic_vcfs, scan):
+    plain, bgzipped = synthetic_vcfs
+    vcf = VCF(bgzipped)
+    assert vcf.tabix_index_file_exists
+
+    records = scan(plain)
+    first, last, single = (records[idx].split("\t") for idx in (10, 25, 100))
+    ranges = RANGES + [
+        (first[0], int(first[1]), int(last[1])),
+        (single[0], int(single[1]), int(single[1])),
+    ]
+
+    for chromosome, start, end in ranges:
+        found = list(vcf.get_range(chromosome, start, end, _skip_progress=True))
+        assert found == scan(plain, chromosome, start, end)
+
+
+def test_position(synthetic_vcfs, scan):
+    plain, bgzipped = synthetic_vcfs
+    chromosome, pos = scan(plain)[42].split("\t")[:2]
+
+    found = list(VCF(bgzipped).get_position(chromosome, int(pos)))
+    assert found == scan(plain, chromosome, int(pos), int(pos)) and len(found) == 1
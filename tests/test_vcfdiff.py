@@ -0,0 +1,148 @@
+from vcfdiff import RecordDiff, diff_vcfs
+from vcffile import VCF
+
+
+def record(chrom: str, pos: int, info: str = "DP=10", alt: str = "C") -> str:
+    return f"{chrom}\t{pos}\t.\tA\t{alt}\t50\tPASS\t{info}"
+
+
+def differences(path1: str, path2: str) -> list[list]:
+    vcf1, vcf2 = VCF(path1), VCF(path2)
+    differ = RecordDiff(vcf1.header.samples, vcf2.header.samples, set())
+
+    return list(diff_vcfs(vcf1, vcf2, differ))
+
+
+def test_contigs_missing_from_headers(write_vcf):
+    vcf1 = write_vcf("a.vcf", [record("1", 10), record("3", 10, "DP=5")])
+    vcf2 = write_vcf("b.vcf", [record("1", 10), record("2", 10), record("3", 10, "DP=6")])
+
+    assert differences(vcf1, vcf2) == [
+        ["2", 10, "A", "C", "RECORD", "absent", "present"],
+        ["3", 10, "A", "C", "INFO/DP", "5", "6"],
+    ]
+
+
+def line(*columns: str) -> bytes:
+    return "\t".join(["1", "10", ".", "A", "C", *columns]).encode() + b"\n"
+
+
+def test_identical_records():
+    differ = RecordDiff(["child"], ["child"], set())
+    same = line("50", "PASS", "DP=10;DB", "GT", "0/1")
+
+    assert differ.compare(same, same) == []
+    assert (differ.shared, differ.identical) == (1, 1)
+
+
+def test_fixed_columns_and_format():
+    differ = RecordDiff(["child"], ["child"], set())
+
+    assert differ.compare(
+        line("50", "PASS", "DP=10", "GT", "0/1"),
+        line("60", "LowQual", "DP=10", "GT:DP", "0/1:10"),
+    ) == [
+        ["QUAL", "50", "60"],
+        ["FILTER", "PASS", "LowQual"],
+        ["FORMAT", "GT", "GT:DP"],
+        ["SAMPLE/child", "0/1", "0/1:10"],
+    ]
+    assert differ.identical == 0
+
+
+def test_info_keys():
+    differ = RecordDiff([], [], set())
+
+    assert differ.compare(
+        line("50", "PASS", "DP=10;DB;CLNSIG=Benign;AF=0.5"),
+        line("50", "PASS", "AF=0.5;CLNSIG=Pathogenic;DP=10;CADD=20"),
+    ) == [
+        ["INFO/CADD", ".", "20"],
+        ["INFO/CLNSIG", "Benign", "Pathogenic"],
+        ["INFO/DB", "true", "."],
+    ]
+    # Same entries in another order
+    assert differ.compare(line("50", "PASS", "DP=10;DB"), line("50", "PASS", "DB;DP=10")) == []
+    assert differ.compare(line("50", "PASS", "."), line("50", "PASS", "DP=1")) == [
+        ["INFO/DP", ".", "1"]
+    ]
+
+
+def test_ignored_info_keys():
+    differ = RecordDiff([], [], {b"Annotation", b"DB"})
+
+    assert (
+        differ.compare(line("50", "PASS", "DP=10;Annotation=GENE1"), line("50", "PASS", "DP=10;DB"))
+        == []
+    )
+    assert differ.compare(
+        line("50", "PASS", "DP=10;Annotation=GENE1"), line("50", "PASS", "DP=9")
+    ) == [["INFO/DP", "10", "9"]]
+    assert (differ.shared, differ.identical) == (2, 1)
+
+
+def test_samples_by_name():
+    differ = RecordDiff(["child", "mother", "father"], ["father", "child"], set())
+
+    assert (
+        differ.compare(
+            line("50", "PASS", "DP=10", "GT", "0/1", "0/0", "1/1"),
+            line("50", "PASS", "DP=10", "GT", "1/1", "0/1"),
+        )
+        == []
+    )
+    assert differ.compare(
+        line("50", "PASS", "DP=10", "GT", "0/1", "0/0", "1/1"),
+        line("50", "PASS", "DP=10", "GT", "0/1", "0/0"),
+    ) == [["SAMPLE/child", "0/1", "0/0"], ["SAMPLE/father", "1/1", "0/1"]]
+
+
+def test_summary_counts():
+    differ = RecordDiff([], [], set())
+    same = line("50", "PASS", "DP=10")
+
+    assert differ.missing(0) == ["RECORD", "present", "absent"]
+    assert differ.missing(1) == ["RECORD", "absent", "present"]
+    differ.compare(same, same)
+    differ.compare(same, line("50", "PASS", "DP=9"))
+    differ.compare(same, line("60", "PASS", "DP=9"))
+
+    assert (differ.shared, differ.identical, differ.only_in) == (3, 1, [1, 1])
+    assert differ.fields == {"RECORD": 2, "INFO/DP": 2, "QUAL": 1}
+
+    rows = {row[0]: row[1:] for row in differ.get_summary_table("a.vcf", "b.vcf").rows}
+    assert rows["records"] == [5, "100.0%"]
+    assert rows["identical"] == [1, "20.0%"]
+    assert rows["only in a.vcf"] == [1, "20.0%"]
+    # Fields per record in both files
+    assert rows["INFO/DP"] == [2, "66.7%"]
+    assert rows["QUAL"] == [1, "33.3%"]
+    assert "RECORD" not in rows
+
+
+def test_diff_vcfs(write_vcf):
+    samples = ["child", "mother"]
+    vcf1 = write_vcf(
+        "a.vcf",
+        [
+            record("1", 10) + "\tGT\t0/1\t0/0",
+            record("1", 20) + "\tGT\t0/1\t0/0",
+            record("1", 20, alt="G") + "\tGT\t1/1\t0/1",
+        ],
+        samples=samples,
+    )
+    vcf2 = write_vcf(
+        "b.vcf",
+        [
+            record("1", 10) + "\tGT\t0/1\t0/0",
+            record("1", 20, alt="G") + "\tGT\t1/1\t0/0",
+            record("1", 30) + "\tGT\t0/1\t0/0",
+        ],
+        samples=samples,
+    )
+
+    assert differences(vcf1, vcf2) == [
+        ["1", 20, "A", "C", "RECORD", "present", "absent"],
+        ["1", 20, "A", "G", "SAMPLE/mother", "0/1", "0/0"],
+        ["1", 30, "A", "C", "RECORD", "absent", "present"],
+    ]
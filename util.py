@@ -1,3 +1,5 @@
+import glob
+import os
 import sys
 
 
@@ -29,3 +31,33 @@ def print_percent_done(index, total, bar_len=None, title="Please wait", suffix="
 
     if index == total:
         print("\t✅", file=sys.stderr)
+
+
+def expand_vcf_paths(patterns: list[str], manifest: str | None = None) -> list[str]:
+    """
+    Paths from file names/glob patterns and a manifest (one path per line), in given order.
+
+    Raises FileNotFoundError for paths or patterns matching nothing.
+    """
+    patterns = list(patterns)
+
+    if manifest is not None:
+        manifest_dir = os.path.dirname(manifest)
+        with open(manifest) as manifest_file:
+            for line in manifest_file:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    path = line.split("\t")[0]
+                    patterns.append(os.path.join(manifest_dir, path))
+
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        matches = [path for path in matches if os.path.isfile(path)]
+
+        if not matches:
+            raise FileNotFoundError(f"No such VCF file(s): {pattern}")
+
+        paths += [path for path in matches if path not in paths]
+
+    return paths
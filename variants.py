@@ -1,14 +1,330 @@
-import re
+from collections.abc import Mapping
 
+from constants import VCF_FIELDS
 
-def get_info_field(variant: str, key: str) -> dict | None:
-    match = re.search(_info_match_pattern(key), variant)
+INFO_TYPE_CASTS = {"Integer": int, "Float": float}
 
-    if match:
-        return match.group(2)
 
-    return None
+class Info(Mapping):
+    """
+    Lazy key -> raw value view of a variant's INFO column.
 
+    The column is only split (once) on first lookup. Flags map to True.
+    types maps INFO keys to (Number, Type) from the header, used by typed().
+    """
 
-def _info_match_pattern(key: str):
-    return rf"({key})=([^;=]+)"
+    __slots__ = ("_raw", "_fields", "_types")
+
+    def __init__(self, raw_info: str, types: dict[str, tuple[str, str]] | None = None):
+        self._raw = raw_info
+        self._fields = None
+        self._types = types or {}
+
+    @classmethod
+    def from_variant(
+        cls, variant: str | bytes, types: dict[str, tuple[str, str]] | None = None
+    ) -> "Info":
+        return cls(info_column(variant), types)
+
+    def _parsed(self) -> dict:
+        if self._fields is None:
+            self._fields = {}
+
+            if self._raw and self._raw != ".":
+                for entry in self._raw.split(";"):
+                    key, sep, value = entry.partition("=")
+                    self._fields[key] = value if sep else True
+
+        return self._fields
+
+    def __getitem__(self, key: str) -> str | bool:
+        return self._parsed()[key]
+
+    def get(self, key: str, default=None):
+        return self._parsed().get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._parsed()
+
+    def __iter__(self):
+        return iter(self._parsed())
+
+    def __len__(self) -> int:
+        return len(self._parsed())
+
+    def typed(self, key: str, default=None):
+        """
+        Value decoded according to the header's Number/Type for key.
+
+        Number=1 (and flags) give a scalar, everything else a list. "." -> None
+        """
+        value = self._parsed().get(key)
+
+        if value is None:
+            return default
+
+        number, info_type = self._types.get(key, ("1", "String"))
+        return decode_info_value(value, number, info_type)
+
+
+class RawInfo:
+    """
+    Info.get() straight on an unsplit (str or bytes) INFO column.
+
+    For looking up a few keys per record: each lookup is a substring search,
+    and only the value found is decoded.
+    """
+
+    __slots__ = ("_raw",)
+
+    def __init__(self, raw_info: str | bytes):
+        self._raw = raw_info
+
+    def get(self, key: str, default=None) -> str | bool | None:
+        raw_info = self._raw
+        value = find_info_value(raw_info, key)
+
+        if value is not None:
+            return value
+
+        if isinstance(raw_info, bytes):
+            key, sep = key.encode(), b";"
+        else:
+            sep = ";"
+
+        is_flag = (
+            raw_info == key
+            or raw_info.startswith(key + sep)
+            or raw_info.endswith(sep + key)
+            or sep + key + sep in raw_info
+        )
+        return True if is_flag else default
+
+
+class Variant:
+    """
+    A VCF record line, split into columns lazily.
+
+    The line is split once, on first column access, into CHROM ... INFO and
+    the unsplit rest (FORMAT and samples). POS is cached as an int and INFO
+    as a lazy Info mapping.
+    """
+
+    __slots__ = ("line", "_types", "_columns", "_pos", "_info")
+
+    def __init__(self, line: str | bytes, types: dict[str, tuple[str, str]] | None = None):
+        self.line = line
+        self._types = types
+        self._columns = None
+        self._pos = None
+        self._info = None
+
+    def __repr__(self) -> str:
+        return f"Variant({self.line[:60]!r})"
+
+    def __str__(self) -> str:
+        return self.line
+
+    def _split(self) -> list[str]:
+        columns = self._columns
+
+        if columns is None:
+            columns = self._columns = self.line.split("\t", VCF_FIELDS.FORMAT)
+            columns[-1] = columns[-1].rstrip("\n")
+
+        return columns
+
+    def column(self, idx: int) -> str:
+        """
+        Column idx (0 = CHROM ... 7 = INFO, 8 = FORMAT and samples unsplit)
+        """
+        columns = self._split()
+        return columns[idx] if idx < len(columns) else ""
+
+    @property
+    def chrom(self) -> str:
+        return self.column(VCF_FIELDS.CHROM)
+
+    @property
+    def pos(self) -> int:
+        if self._pos is None:
+            self._pos = int(self.column(VCF_FIELDS.POS))
+        return self._pos
+
+    @property
+    def ref(self) -> str:
+        return self.column(VCF_FIELDS.REF)
+
+    @property
+    def alt(self) -> str:
+        return self.column(VCF_FIELDS.ALT)
+
+    @property
+    def info(self) -> Info:
+        if self._info is None:
+            self._info = Info(self.column(VCF_FIELDS.INFO), self._types)
+        return self._info
+
+    @property
+    def id_fields(self) -> tuple[str, str, str, str]:
+        """
+        (CHROM, POS, REF, ALT), POS as in the file
+        """
+        columns = self._split()
+        return (
+            columns[VCF_FIELDS.CHROM],
+            columns[VCF_FIELDS.POS],
+            columns[VCF_FIELDS.REF],
+            columns[VCF_FIELDS.ALT],
+        )
+
+    def info_value(self, key: str) -> str | None:
+        """
+        Raw value of one INFO key, without splitting the rest of INFO. Flags give None
+        """
+        if self._info is not None:
+            value = self._info.get(key)
+            return None if value is True else value
+
+        columns = self._split()
+        if len(columns) <= VCF_FIELDS.INFO:
+            return None
+
+        return find_info_value(columns[VCF_FIELDS.INFO], key)
+
+
+class BytesVariant(Variant):
+    """
+    Variant of an undecoded record line, from VCF.get_rows(as_bytes=True).
+
+    Columns are only decoded when accessed, and info_value() only decodes
+    the value asked for.
+    """
+
+    __slots__ = ()
+
+    def __str__(self) -> str:
+        return self.line.decode()
+
+    def _split(self) -> list[bytes]:
+        columns = self._columns
+
+        if columns is None:
+            columns = self._columns = self.line.split(b"\t", VCF_FIELDS.FORMAT)
+            columns[-1] = columns[-1].rstrip(b"\n")
+
+        return columns
+
+    def column(self, idx: int) -> str:
+        columns = self._split()
+        return columns[idx].decode() if idx < len(columns) else ""
+
+    @property
+    def id_fields(self) -> tuple[str, str, str, str]:
+        columns = self._split()
+        return (
+            columns[VCF_FIELDS.CHROM].decode(),
+            columns[VCF_FIELDS.POS].decode(),
+            columns[VCF_FIELDS.REF].decode(),
+            columns[VCF_FIELDS.ALT].decode(),
+        )
+
+
+def get_id_fields(variant: str | Variant) -> tuple[str, str, str, str]:
+    """
+    (CHROM, POS, REF, ALT) of a record
+    """
+    if isinstance(variant, Variant):
+        return variant.id_fields
+
+    fields = variant.split("\t", VCF_FIELDS.ALT + 1)
+    return (
+        fields[VCF_FIELDS.CHROM],
+        fields[VCF_FIELDS.POS],
+        fields[VCF_FIELDS.REF],
+        fields[VCF_FIELDS.ALT],
+    )
+
+
+def decode_info_value(value: str | bool, number: str, info_type: str):
+    if info_type == "Flag" or value is True:
+        return True
+
+    cast = INFO_TYPE_CASTS.get(info_type, str)
+
+    if number == "1":
+        return None if value == "." else cast(value)
+
+    return [None if x == "." else cast(x) for x in value.split(",")]
+
+
+def info_column(variant: str | bytes) -> str:
+    """
+    INFO column of a record line. Of a bytes line, only this column is decoded
+    """
+    raw_info = raw_info_column(variant)
+
+    if isinstance(raw_info, bytes):
+        return raw_info.decode()
+
+    return raw_info
+
+
+def info_keys(variant: str | bytes) -> set:
+    """
+    Keys set in the INFO column of a record line, str or bytes like the line
+    """
+    raw_info = raw_info_column(variant)
+    sep, assign, missing = (b";", b"=", b".") if isinstance(raw_info, bytes) else (";", "=", ".")
+
+    if not raw_info or raw_info == missing:
+        return set()
+
+    return {entry.partition(assign)[0] for entry in raw_info.split(sep)}
+
+
+def find_info_value(raw_info: str | bytes, key: str) -> str | None:
+    """
+    Value of key in a raw INFO column, found without splitting the column.
+
+    Missing keys and flags give None. Of a bytes column only the value is decoded.
+    """
+    needle, sep = f"{key}=", ";"
+
+    if isinstance(raw_info, bytes):
+        needle, sep = needle.encode(), b";"
+
+    if raw_info.startswith(needle):
+        start = len(needle)
+    else:
+        start = raw_info.find(sep + needle)
+        if start < 0:
+            return None
+        start += len(needle) + 1
+
+    end = raw_info.find(sep, start)
+    value = raw_info[start:] if end < 0 else raw_info[start:end]
+
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def raw_info_column(variant: str | bytes) -> str | bytes:
+    """
+    INFO column of a record line, undecoded for bytes lines
+    """
+    tab, newline = (b"\t", b"\n") if isinstance(variant, bytes) else ("\t", "\n")
+    fields = variant.split(tab, VCF_FIELDS.INFO + 1)
+
+    if len(fields) <= VCF_FIELDS.INFO:
+        return fields[0][:0]
+
+    return fields[VCF_FIELDS.INFO].rstrip(newline)
+
+
+def get_info_field(variant: str, key: str) -> str | None:
+    value = Info.from_variant(variant).get(key)
+
+    if value is True:
+        return None
+
+    return value
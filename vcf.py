@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 
-import click
 import sys
 
+import click
+import numpy as np
+
+from csq import CsqParser, csq_arrays, iter_csq_rows, split_header
+from output import open_output, tsv_writer
+from vcffile import VCF
+
 
 class VCF_FIELDS:
     CHROM = 0
@@ -27,30 +33,92 @@ def cli():
 
 
 @cli.command()
-@click.argument("file", type=click.File("r"), default=sys.stdin)
-def csq(file):
+@click.argument("file", type=click.Path(exists=True, allow_dash=True), default="-")
+@click.option(
+    "--fields",
+    "-f",
+    default=None,
+    help="Comma separated CSQ subfields to output (default: all).",
+)
+@click.option(
+    "--most-severe",
+    is_flag=True,
+    default=False,
+    help="Only output the most severe consequence per gene.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["tsv", "npz"]),
+    default="tsv",
+    help="TSV rows, or NumPy columns saved with numpy.savez (needs --output).",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    default="-",
+    help="Output file (default: stdout). TSV paths ending in .gz are BGZF compressed.",
+)
+@click.option(
+    "--list-fields",
+    is_flag=True,
+    default=False,
+    help="Only print the CSQ subfields declared in the header.",
+)
+def csq(file, fields, most_severe, output_format, output, list_fields):
     """Process VEP CSQ annotations in a VCF file."""
-    ...
-    if file.name == "<stdin>":
-        # Process from standard input
-        for line in file:
-            pass
+    if file == "-":
+        header, variants = split_header(sys.stdin)
     else:
-        # Process from file
-        with file as f:
-            for line in f:
-                if line.startswith("##INFO=<ID=CSQ"):
-                    # Extract the description part
-                    description_start = line.find("Format:") + len("Format: ")
-                    description_end = line.rfind('"')
-                    description = line[description_start:description_end]
+        vcf = VCF(file)
+        header, variants = vcf.header, vcf.get_rows(_skip_progress=True)
+
+    try:
+        parser = CsqParser.from_header(header, fields.split(",") if fields else None)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    if list_fields:
+        click.echo("\n".join(parser.all_fields))
+        return
+
+    try:
+        rows = iter_csq_rows(variants, parser, most_severe)
 
-                    # TODO:
-                    fields = description.split("|")
-                    print(fields)
-                    break
+        if output_format == "npz":
+            if output == "-":
+                raise click.UsageError("--format npz needs an --output file")
+            np.savez(output, **csq_arrays(rows, parser.fields))
+            return
 
-    click.echo("VEP CSQ annotation processing complete.")
+        with open_output(output) as out:
+            writer = tsv_writer(out)
+            writer.writerow(["CHROM", "POS", "REF", "ALT"] + parser.fields)
+            writer.writerows(rows)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+
+@cli.command()
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+def index(file):
+    """Build a line index (FILE.lidx) of an uncompressed VCF, for region queries."""
+    vcf = VCF(file)
+
+    try:
+        line_index = vcf.build_line_index()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    click.echo(
+        f"Indexed {line_index.n_records} records on {len(line_index.contigs)} contigs "
+        f"in {vcf.line_index_file}",
+        err=True,
+    )
+
+    if not line_index.is_sorted:
+        click.echo("Not coordinate sorted: usable for splitting, not region queries", err=True)
 
 
 @cli.command()
@@ -96,8 +164,5 @@ def _get_info_field(variant_line: str, info_field_name: str):
     return variant_line.split(";").pop(0)
 
 
-def _parse_csq(file): ...
-
-
 if __name__ == "__main__":
     cli()
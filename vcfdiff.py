@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Differences between two runs of a pipeline, record by record.
+
+    python vcfdiff.py old.vcf.gz new.vcf.gz > differences.tsv
+    python vcfdiff.py old.vcf.gz new.vcf.gz --summary --ignore-info Annotation
+
+Both files are streamed in coordinate order, holding only the records of one
+position at a time. Records are matched on CHROM, POS, REF and ALT.
+Identical lines are skipped with a single comparison of the undecoded
+lines. Other records are compared on ID, QUAL, FILTER, FORMAT, each shared
+sample and each INFO key. INFO columns are compared as sets of key=value
+entries, so only the keys that changed are decoded.
+
+One TSV row per difference: CHROM POS REF ALT FIELD VALUE1 VALUE2, FIELD
+being RECORD (present/absent), ID/QUAL/FILTER/FORMAT, INFO/<key> or
+SAMPLE/<name>, "." for missing INFO keys. A count per FIELD of differing
+records follows on stderr (or, with --summary, replaces the rows).
+"""
+from collections import Counter
+from typing import Generator
+
+import click
+import prettytable
+
+from constants import VCF_FIELDS
+from filters import filter_expressions_option
+from output import COMPRESSIONS, open_output, tsv_writer
+from vcffile import VCF, ContigOrder, UnsortedVCFError, merge_join_variants
+
+RECORD = "RECORD"
+PRESENT, ABSENT = "present", "absent"
+MISSING = "."
+FLAG = "true"
+FIXED_COLUMNS = {"ID": VCF_FIELDS.ID, "QUAL": VCF_FIELDS.QUAL, "FILTER": VCF_FIELDS.FILTER}
+
+
+@click.command(help="Per INFO key (and column) differences of records in two VCFs")
+@click.argument("vcf_file1", type=click.Path(exists=True))
+@click.argument("vcf_file2", type=click.Path(exists=True))
+@click.option(
+    "--filter",
+    "filter_expressions",
+    multiple=True,
+    callback=filter_expressions_option,
+    help="Only records matching an INFO expression, applied to each file.",
+)
+@click.option(
+    "--ignore-info",
+    default=None,
+    help="Comma separated INFO keys not to compare.",
+)
+@click.option(
+    "--summary",
+    is_flag=True,
+    default=False,
+    help="Only print the counts per field, not the differences.",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    default="-",
+    help="Output file (default: stdout). Paths ending in .gz are BGZF compressed.",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(COMPRESSIONS),
+    default=None,
+    help="Output compression (default: from the output file name).",
+)
+def vcfdiff(
+    vcf_file1: str,
+    vcf_file2: str,
+    filter_expressions: list | None = None,
+    ignore_info: str | None = None,
+    summary: bool = False,
+    output: str = "-",
+    compression: str | None = None,
+) -> None:
+    vcf1, vcf2 = VCF(vcf_file1), VCF(vcf_file2)
+
+    for filter_function in filter_expressions or []:
+        vcf1.add_filter(filter_function)
+        vcf2.add_filter(filter_function)
+
+    ignore = {key.encode() for key in ignore_info.split(",")} if ignore_info else set()
+    differ = RecordDiff(vcf1.header.samples, vcf2.header.samples, ignore)
+
+    try:
+        if summary:
+            for _ in diff_vcfs(vcf1, vcf2, differ):
+                pass
+        else:
+            with open_output(output, compression) as out:
+                writer = tsv_writer(out)
+                writer.writerow(["CHROM", "POS", "REF", "ALT", "FIELD", "VALUE1", "VALUE2"])
+                writer.writerows(diff_vcfs(vcf1, vcf2, differ))
+    except UnsortedVCFError as e:
+        raise click.ClickException(f"{e}. Sort both files (e.g. bcftools sort) first.")
+
+    click.echo(differ.get_summary_table(vcf_file1, vcf_file2), err=not summary)
+
+
+class RecordDiff:
+    """
+    Differences of matched records, and counts of records per differing field
+    """
+
+    def __init__(self, samples1: list[str], samples2: list[str], ignore_info: set[bytes]):
+        self.ignore_info = ignore_info
+        # Shared samples, by name, and their columns in each file
+        self.samples = [
+            (sample, VCF_FIELDS.FORMAT + 1 + idx, VCF_FIELDS.FORMAT + 1 + samples2.index(sample))
+            for idx, sample in enumerate(samples1)
+            if sample in samples2
+        ]
+
+        self.shared = 0
+        self.identical = 0
+        self.only_in = [0, 0]
+        self.fields = Counter()
+
+    def missing(self, file_idx: int) -> list[str]:
+        """
+        (FIELD, VALUE1, VALUE2) of a record only in file file_idx (0 or 1)
+        """
+        self.only_in[file_idx] += 1
+        self.fields[RECORD] += 1
+
+        return [RECORD, PRESENT, ABSENT] if file_idx == 0 else [RECORD, ABSENT, PRESENT]
+
+    def compare(self, line1: bytes, line2: bytes) -> list[list[str]]:
+        """
+        (FIELD, VALUE1, VALUE2) of every difference between two records
+        """
+        self.shared += 1
+
+        if line1 == line2:
+            self.identical += 1
+            return []
+
+        columns1 = line1.rstrip(b"\r\n").split(b"\t")
+        columns2 = line2.rstrip(b"\r\n").split(b"\t")
+        differences = []
+
+        for name, idx in FIXED_COLUMNS.items():
+            value1, value2 = _column(columns1, idx), _column(columns2, idx)
+            if value1 != value2:
+                differences.append([name, value1.decode(), value2.decode()])
+
+        info1, info2 = _column(columns1, VCF_FIELDS.INFO), _column(columns2, VCF_FIELDS.INFO)
+        if info1 != info2:
+            differences += self._info_differences(info1, info2)
+
+        if columns1[VCF_FIELDS.FORMAT :] != columns2[VCF_FIELDS.FORMAT :]:
+            differences += self._sample_differences(columns1, columns2)
+
+        if not differences:
+            # Only ignored keys differ
+            self.identical += 1
+
+        self.fields.update(field for field, _, _ in differences)
+        return differences
+
+    def _info_differences(self, info1: bytes, info2: bytes) -> list[list[str]]:
+        entries1, entries2 = _info_entries(info1), _info_entries(info2)
+
+        # Unchanged key=value entries are set members of both, only the rest is decoded
+        changed1 = dict(_info_entry(entry) for entry in entries1 - entries2)
+        changed2 = dict(_info_entry(entry) for entry in entries2 - entries1)
+
+        return [
+            [
+                f"INFO/{key.decode()}",
+                changed1.get(key, MISSING),
+                changed2.get(key, MISSING),
+            ]
+            for key in sorted(changed1.keys() | changed2.keys())
+            if key not in self.ignore_info
+        ]
+
+    def _sample_differences(self, columns1: list[bytes], columns2: list[bytes]) -> list[list[str]]:
+        differences = []
+
+        format1 = _column(columns1, VCF_FIELDS.FORMAT)
+        format2 = _column(columns2, VCF_FIELDS.FORMAT)
+        if format1 != format2:
+            differences.append(["FORMAT", format1.decode(), format2.decode()])
+
+        for sample, idx1, idx2 in self.samples:
+            value1, value2 = _column(columns1, idx1), _column(columns2, idx2)
+            if value1 != value2:
+                differences.append([f"SAMPLE/{sample}", value1.decode(), value2.decode()])
+
+        return differences
+
+    def get_summary_table(self, vcf_file1: str, vcf_file2: str):
+        records = self.shared + sum(self.only_in)
+        table = prettytable.PrettyTable(["field", "records", "pct"])
+        table.align["field"] = "l"
+        table.align["records"] = "r"
+        table.align["pct"] = "r"
+
+        table.add_row(["records", records, _pct(records, records)])
+        table.add_row(["in both", self.shared, _pct(self.shared, records)])
+        table.add_row(["identical", self.identical, _pct(self.identical, records)])
+        table.add_row([f"only in {vcf_file1}", self.only_in[0], _pct(self.only_in[0], records)])
+        table.add_row([f"only in {vcf_file2}", self.only_in[1], _pct(self.only_in[1], records)])
+
+        # Fields, by differing records (in both files)
+        for field, count in self.fields.most_common():
+            if field != RECORD:
+                table.add_row([field, count, _pct(count, self.shared)])
+
+        return table
+
+
+def diff_vcfs(vcf1: VCF, vcf2: VCF, differ: RecordDiff) -> Generator:
+    """
+    [CHROM, POS, REF, ALT, FIELD, VALUE1, VALUE2] of every difference, in
+    coordinate order. Raises UnsortedVCFError if either file is not sorted.
+    """
+    contig_order = ContigOrder(vcf1.get_contigs() + vcf2.get_contigs())
+
+    records1 = keyed_records(vcf1, contig_order)
+    records2 = keyed_records(vcf2, contig_order)
+
+    for line1, line2 in merge_join_variants(records1, records2):
+        if line2 is None:
+            differences = [differ.missing(0)]
+        elif line1 is None:
+            differences = [differ.missing(1)]
+        else:
+            differences = differ.compare(line1, line2)
+
+        if differences:
+            row = _variant_row(line1 or line2)
+            for difference in differences:
+                yield row + difference
+
+
+def keyed_records(vcf: VCF, contig_order: ContigOrder) -> Generator:
+    """
+    ((contig rank, POS), (REF, ALT), line) of each record, for merge_join_variants
+    """
+    for line in vcf.variants(_skip_progress=True, as_bytes=True):
+        columns = line.split(b"\t", VCF_FIELDS.ALT + 1)
+        position = (contig_order.rank(columns[VCF_FIELDS.CHROM]), int(columns[VCF_FIELDS.POS]))
+
+        yield position, (columns[VCF_FIELDS.REF], columns[VCF_FIELDS.ALT]), line
+
+
+def _variant_row(line: bytes) -> list:
+    columns = line.split(b"\t", VCF_FIELDS.ALT + 1)
+    return [
+        columns[VCF_FIELDS.CHROM].decode(),
+        int(columns[VCF_FIELDS.POS]),
+        columns[VCF_FIELDS.REF].decode(),
+        columns[VCF_FIELDS.ALT].decode(),
+    ]
+
+
+def _column(columns: list[bytes], idx: int) -> bytes:
+    return columns[idx] if idx < len(columns) else MISSING.encode()
+
+
+def _info_entries(info: bytes) -> set[bytes]:
+    return set() if info == b"." else set(info.split(b";"))
+
+
+def _info_entry(entry: bytes) -> tuple[bytes, str]:
+    key, sep, value = entry.partition(b"=")
+    return key, value.decode() if sep else FLAG
+
+
+def _pct(count: int, total: int) -> str:
+    return f"{count / total:.1%}" if total else "NA"
+
+
+if __name__ == "__main__":
+    vcfdiff()
@@ -1,28 +1,64 @@
 import gzip
+import json
 import logging
 import os
-from typing import Callable, Generator
-
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, wraps
+from itertools import zip_longest
+from typing import Callable, Generator, Iterable, Iterator
+
+from bgzf import (
+    BgzfReader,
+    ThreadedBgzfReader,
+    TimedGzipReader,
+    is_bgzf,
+    open_timed_gzip,
+)
+from chunks import Chunk, plan_chunks, read_chunk
+from filterexpr import compile_filter
+from header import Header
+from lineindex import LineIndex, MmapReader, find_line_index, line_index_path
+from metrics import PROGRESS_CHECK_EVERY, Progress, start_read
+from regions import MergedRegion, RegionLookup
+from tabixindex import TabixIndex, find_index
 from util import print_percent_done
-
-# import tabix
-
+from variants import BytesVariant, Info, Variant
 
 logging.basicConfig(level=logging.INFO)
 
 LOG = logging.getLogger(__name__)
 
+CHUNKS_PER_WORKER = 8
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+
+class UnsortedVCFError(Exception):
+    pass
+
 
 class VCF:
-    def __init__(self, path: str | None = None):
+    def __init__(self, path: str | None = None, threads: int = 1, block_cache=None):
         self.vcf_file = None
+        self.threads = threads
+        # Inflated BGZF blocks for index queries, see BgzfReader
+        self.block_cache = block_cache
         self.tabix_index_file_exists = False
+        self.index_file = None
+        self._index = None
+        self.line_index_file = None
+        self._line_index = None
 
         self._active_filters = []
         self._open_func = open
 
         self._nbr_records = None
         self._header_stop = None
+        self._file_size = None
+        self._header = None
+        self._info_types = None
 
         if path is not None:
             self.open_file(path)
@@ -30,10 +66,14 @@ class VCF:
     def open_file(self, vcf_file: str):
         self._open_func = open
         self.vcf_file = vcf_file
+        self._file_size = os.path.getsize(vcf_file)
+        self._header = None
+        self._info_types = None
         if vcf_file.endswith(".gz"):
-            self._open_func = gzip.open
+            self._open_func = _gzip_open_func(vcf_file, self.threads)
             self.set_tabix(vcf_file)
-            self._total_nbr_records = sum(1 for _ in self._get_rows())
+        else:
+            self.set_line_index(vcf_file)
 
     def _get_rows(self) -> Generator:
         with self._open_func(self.vcf_file, "rt") as f:
@@ -42,11 +82,18 @@ class VCF:
                     continue
                 yield line
 
-    def add_filter(self, filter_function: Callable[[str], bool]) -> None:
+    def add_filter(self, filter_function: Callable[[str], bool] | str) -> None:
+        """
+        Add a row predicate, or a filter expression such as
+        "CLNSIG==Pathogenic && RankScore>=17" (see filterexpr)
+        """
+        if isinstance(filter_function, str):
+            filter_function = compile_filter(filter_function)
+
         self._active_filters.append(filter_function)
 
-    def active_filters() -> list:
-        ...
+    def active_filters(self) -> list:
+        return list(self._active_filters)
 
     def _passes_filters(self, row) -> bool:
         if not self._active_filters:
@@ -58,35 +105,187 @@ class VCF:
 
         return True
 
-    def get_rows(self, skip_mito: bool = False, _skip_progress=False) -> Generator:
-        def _vcf_generator():
-            with self._open_func(self.vcf_file, "rt") as vcf:
-                hits = 0
-                for idx, variant in enumerate(vcf):
-                    if not _skip_progress:
-                        print_percent_done(
-                            idx,
-                            self._total_nbr_records,
-                            title=" Processing records",
-                        )
+    def _row_filters(self, as_bytes: bool = False) -> list[Callable]:
+        """
+        Active filters. In bytes mode, filters not marked with filterexpr.accepts_bytes
+        are wrapped to get decoded rows.
+        """
+        if not as_bytes:
+            return self._active_filters
+
+        return [
+            f if getattr(f, "accepts_bytes", False) else _decoding_filter(f)
+            for f in self._active_filters
+        ]
+
+    def get_rows(
+        self,
+        skip_mito: bool = False,
+        _skip_progress=False,
+        workers: int = 1,
+        as_variants: bool = False,
+        as_bytes: bool = False,
+    ) -> Generator:
+        """
+        Yield (filtered) records.
+
+        With workers > 1, chunks of the file are filtered in a process pool and
+        surviving records yielded in file order. Filters must then be picklable,
+        i.e. module level functions.
+
+        With as_variants=True, records are yielded as lazily split Variant objects
+        instead of raw lines. Filters still see the raw lines.
+
+        With as_bytes=True, lines are not decoded: records are bytes (BytesVariant
+        with as_variants), and so are the rows filters see (see _row_filters).
+        """
+        if as_variants:
+            info_types = self.get_info_types()
+            variant_class = BytesVariant if as_bytes else Variant
+            rows = self.get_rows(skip_mito, _skip_progress, workers, as_bytes=as_bytes)
+            return (variant_class(line, info_types) for line in rows)
+
+        if workers > 1:
+            chunks = self.plan_chunks(
+                max(workers * CHUNKS_PER_WORKER, self._file_size // MAX_CHUNK_SIZE)
+            )
+            if len(chunks) > 1:
+                return self._get_rows_parallel(chunks, skip_mito, workers, _skip_progress, as_bytes)
+
+        comment, mito = (b"#", b"M") if as_bytes else ("#", "M")
 
-                    if variant.startswith("#"):
+        def _vcf_generator():
+            progress = None if _skip_progress else Progress(self._file_size, " Processing records")
+            metrics = start_read(self.vcf_file)
+            filters = self._row_filters(as_bytes)
+
+            open_func = self._open_func
+            if metrics is not None and open_func is gzip.open:
+                # Same reads, with the inflating timed apart from splitting lines
+                open_func = open_timed_gzip
+
+            with open_func(self.vcf_file, "rb" if as_bytes else "rt") as vcf:
+                if metrics is None:
+                    lines, passes_filters = vcf, _filter_checker(filters)
+                else:
+                    lines = metrics.timed_lines(vcf)
+                    passes_filters = metrics.filter_checker(filters)
+
+                for n_lines, variant in enumerate(lines):
+                    if progress is not None and not n_lines % PROGRESS_CHECK_EVERY:
+                        progress.update(_bytes_read(vcf))
+
+                    if variant.startswith(comment):
                         continue
 
-                    if skip_mito and variant.startswith("M"):
+                    if skip_mito and variant.startswith(mito):
                         continue
 
-                    if not self._passes_filters(variant):
+                    if not passes_filters(variant):
                         continue
 
-                    hits += 1
+                    if metrics is not None:
+                        metrics.records_yielded += 1
+
                     yield variant
 
+                if metrics is not None:
+                    metrics.finish(_bytes_read(vcf), _inflate_seconds(vcf))
+
+            if progress is not None:
+                progress.finish()
+
         return _vcf_generator()
 
     variants = get_rows
 
-    def get_header(self) -> list:
+    def _get_rows_parallel(
+        self,
+        chunks: list[Chunk],
+        skip_mito: bool,
+        workers: int,
+        _skip_progress=False,
+        as_bytes: bool = False,
+    ) -> Generator:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        pending = deque()
+        chunks_left = iter(chunks)
+        # Filters run in the workers, only totals are known here
+        metrics = start_read(self.vcf_file, kind=f"parallel ({workers} workers)")
+
+        def _submit_next() -> None:
+            chunk = next(chunks_left, None)
+            if chunk is not None:
+                pending.append(
+                    executor.submit(
+                        _filter_chunk,
+                        self.vcf_file,
+                        chunk,
+                        self._active_filters,
+                        skip_mito,
+                        as_bytes,
+                    )
+                )
+
+        try:
+            for _ in range(workers * CHUNKS_IN_FLIGHT_PER_WORKER):
+                _submit_next()
+
+            idx = 0
+            while pending:
+                variants = pending.popleft().result()
+                _submit_next()
+
+                if not _skip_progress:
+                    print_percent_done(idx, len(chunks), title=" Processing chunks")
+                idx += 1
+
+                if metrics is not None:
+                    metrics.records_yielded += len(variants)
+                    metrics.decompressed_bytes += sum(map(len, variants))
+
+                yield from variants
+
+            if metrics is not None:
+                metrics.finish(self._file_size)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def plan_chunks(self, n_chunks: int) -> list[Chunk]:
+        return plan_chunks(self.vcf_file, n_chunks, self.get_line_index())
+
+    def get_chunk_rows(
+        self, chunk: Chunk, skip_mito: bool = False, as_bytes: bool = False
+    ) -> Generator:
+        """
+        Like get_rows, but only for records starting within chunk (see plan_chunks)
+        """
+        comment, mito = (b"#", b"M") if as_bytes else ("#", "M")
+        passes_filters = _filter_checker(self._row_filters(as_bytes))
+
+        for variant in read_chunk(self.vcf_file, chunk, as_bytes):
+            if variant.startswith(comment):
+                continue
+
+            if skip_mito and variant.startswith(mito):
+                continue
+
+            if not passes_filters(variant):
+                continue
+
+            yield variant
+
+    @property
+    def header(self) -> Header:
+        """
+        Parsed header, read once per file
+        """
+        if self._header is None:
+            self._header = Header(self._read_header_lines())
+
+        return self._header
+
+    def _read_header_lines(self) -> list[str]:
         header = []
 
         with self._open_func(self.vcf_file, "rt") as vcf:
@@ -97,66 +296,469 @@ class VCF:
 
         return header
 
-    def get_info_meta(self, id: str):
-        header = self.get_header()
+    def get_header(self) -> list:
+        return list(self.header.lines)
+
+    def get_info_meta(self, id: str) -> dict[str, str]:
+        return self.header.info.get(id, {})
+
+    def get_info_types(self) -> dict[str, tuple[str, str]]:
+        if self._info_types is None:
+            self._info_types = self.header.info_types()
+
+        return self._info_types
+
+    def to_arrays(self, fields: list[str], chunk_size: int | None = None) -> Generator:
+        """
+        Yield {field: NumPy column} for every chunk_size (filtered) records.
+
+        See columns.py for how fields are typed.
+        """
+        # numpy is only needed here, keep it out of plain iteration startup
+        from columns import DEFAULT_CHUNK_SIZE, iter_arrays
 
-        query = f"##INFO=<ID={id}"
+        return iter_arrays(self, fields, chunk_size or DEFAULT_CHUNK_SIZE)
 
-        for header_row in header:
-            if header_row.startswith(query):
-                header = header_row
+    def to_genotypes(
+        self,
+        keys: list[str],
+        samples: list[str] | None = None,
+        fields: list[str] | None = None,
+        chunk_size: int | None = None,
+    ) -> Generator:
+        """
+        Yield {FORMAT key: NumPy records x samples array} for every chunk_size
+        (filtered) records, and columns of fields.
 
-        header = header.split(">")[0]
-        header = header.removeprefix("##INFO=<")
-        header = header.split(",")
+        See genotypes.py for how keys are typed.
+        """
+        from columns import DEFAULT_CHUNK_SIZE
+        from genotypes import iter_genotypes
 
-        info_meta = [x.split("=") for x in header]
+        return iter_genotypes(self, keys, samples, fields, chunk_size or DEFAULT_CHUNK_SIZE)
 
-        return {x[0]: x[1] for x in info_meta}
+    def load_arrays(
+        self, fields: list[str], cache_dir: str | None = None, max_cache_size: int | None = None
+    ) -> dict:
+        """
+        Whole-file columns for fields, through the on-disk column cache (colcache.py)
+        """
+        from colcache import DEFAULT_MAX_CACHE_SIZE, load_columns
+
+        return load_columns(self, fields, cache_dir, max_cache_size or DEFAULT_MAX_CACHE_SIZE)
+
+    def get_contigs(self) -> list[str]:
+        return list(self.header.contigs)
+
+    def get_info(self, variant: str) -> Info:
+        return Info.from_variant(variant, self.get_info_types())
 
     def set_tabix(self, path_to_bgzipped_vcf: str):
-        tbi_should_be_here = f"{path_to_bgzipped_vcf}.tbi"
-        self.tabix_index_file_exists = os.path.isfile(tbi_should_be_here)
+        self.index_file = find_index(path_to_bgzipped_vcf)
+        self.tabix_index_file_exists = self.index_file is not None
+        self._index = None
+
+    def get_index(self) -> TabixIndex | None:
+        if not self.tabix_index_file_exists:
+            return None
+
+        if self._index is None:
+            LOG.debug("Loading index %s", self.index_file)
+            self._index = TabixIndex.from_file(self.index_file)
+
+        return self._index
+
+    def set_line_index(self, path_to_vcf: str) -> None:
+        self.line_index_file = find_line_index(path_to_vcf)
+        self._line_index = None
+
+    def get_line_index(self) -> LineIndex | None:
+        """
+        Line index of a plain VCF (see lineindex.py), if there is a current one
+        """
+        if self._line_index is None:
+            if self.line_index_file is None:
+                return None
+
+            LOG.debug("Loading line index %s", self.line_index_file)
+            line_index = LineIndex.from_file(self.line_index_file)
+
+            if not line_index.is_current(self.vcf_file):
+                LOG.warning("Ignoring %s, the VCF changed since indexing", self.line_index_file)
+                self.line_index_file = None
+                return None
+
+            self._line_index = line_index
+
+        return self._line_index
+
+    def build_line_index(self, write: bool = True) -> LineIndex:
+        """
+        Index record offsets of a plain VCF, stored next to it with write=True
+        """
+        if self.vcf_file.endswith(".gz"):
+            raise ValueError("Line indexes are for uncompressed VCFs, use tabix for .gz")
+
+        line_index = LineIndex.build(self.vcf_file)
+
+        if write:
+            path = line_index_path(self.vcf_file)
+            line_index.write(path)
+            self.line_index_file = path
+
+        self._line_index = line_index
+        return line_index
+
+    def _sorted_line_index(self) -> LineIndex | None:
+        line_index = self.get_line_index()
+        return line_index if line_index is not None and line_index.is_sorted else None
 
     def get_position(self, chromosome: str, position: int):
         return self.get_range(chromosome, start=position, end=position, _skip_progress=True)
 
     def get_range(self, chromosome: str, start: int, end: int, _skip_progress=False):
-        variants = self.get_rows(_skip_progress=_skip_progress)
-        #         if self.tabix_index_file_exists:
-        #             variants =
-        #             LOG.info("Tabix!")
-        #             tb = tabix.open(self.vcf_file)
-        #             variants = tb.query(chromosome, start, end)
-        # )
-        #         else:
-        #             variants = self.get_rows()
+        if self.tabix_index_file_exists:
+            yield from self._query_index(chromosome, start, end)
+            return
+
+        if self._sorted_line_index() is not None:
+            yield from self._query_line_index(chromosome, start, end)
+            return
+
+        for variant in self.get_rows(_skip_progress=_skip_progress):
+            fields = variant.split("\t", 2)
+
+            if fields[0] == chromosome and start <= int(fields[1]) <= end:
+                yield variant
+
+    def get_regions(
+        self, regions: list[MergedRegion], _skip_progress=False
+    ) -> Generator[tuple[MergedRegion, str], None, None]:
+        """
+        Yield (region, variant) for all variants within the (merged, sorted) regions.
+
+        With an index (tabix, or a line index of a sorted plain VCF), seeks once
+        per region. Without, makes a single pass over the file.
+        """
+        if self.tabix_index_file_exists or self._sorted_line_index() is not None:
+            query = self._query_index if self.tabix_index_file_exists else self._query_line_index
+
+            for region in regions:
+                for variant in query(region.chrom, region.start, region.end):
+                    yield region, variant
+
+            return
+
+        lookup = RegionLookup(regions)
+
+        for variant in self.get_rows(_skip_progress=_skip_progress):
+            fields = variant.split("\t", 2)
+            region = lookup.find(fields[0], int(fields[1]))
+
+            if region is not None:
+                yield region, variant
+
+    def _query_index(self, chromosome: str, start: int, end: int) -> Generator:
+        """
+        Seek straight to the BGZF blocks the index lists for the region,
+        yielding only records within it
+        """
+        chunks = self.get_index().query(chromosome, start, end)
+
+        with BgzfReader(self.vcf_file, self.block_cache) as reader:
+            for chunk_start, chunk_end in chunks:
+                reader.seek(chunk_start)
+
+                while reader.tell() < chunk_end:
+                    variant = reader.readline().decode()
+
+                    if not variant:
+                        break
+
+                    if variant.startswith("#"):
+                        continue
+
+                    fields = variant.split("\t", 2)
+                    if fields[0] != chromosome:
+                        continue
+
+                    position = int(fields[1])
+                    if position > end:
+                        return
+
+                    if position < start:
+                        continue
+
+                    if not self._passes_filters(variant):
+                        continue
+
+                    yield variant
+
+    def _query_line_index(self, chromosome: str, start: int, end: int) -> Generator:
+        """
+        Binary search the line index for the region, read its records from the mapped file
+        """
+        range_start, range_end = self.get_line_index().byte_range(chromosome, start, end)
+
+        if range_start == range_end:
+            return
+
+        with MmapReader(self.vcf_file) as reader:
+            for line in reader.lines(range_start, range_end):
+                if line.isspace():
+                    continue
+
+                variant = line.decode()
+
+                if self._passes_filters(variant):
+                    yield variant
+
+    def nbr_variants(self, skip_mito: bool = False, cache: bool = False) -> int:
+        """
+        Count records, using index metadata when possible.
+
+        With cache=True an exact count from a full pass is stored in a
+        sidecar file next to the VCF and reused while the VCF is unchanged.
+        """
+        if not self._active_filters:
+            index_counts = self._index_record_counts()
+            if index_counts is not None:
+                return sum(
+                    n
+                    for chrom, n in index_counts.items()
+                    if not (skip_mito and chrom.startswith("M"))
+                )
+
+        cache_key = "skip_mito" if skip_mito else "all"
+        use_cache = cache and not self._active_filters
+
+        if use_cache:
+            cached = self._read_count_cache().get(cache_key)
+            if cached is not None:
+                return cached
+
+        nbr_variants = sum(1 for _ in self.get_rows(skip_mito=skip_mito, as_bytes=True))
+
+        if use_cache:
+            self._write_count_cache(cache_key, nbr_variants)
+
+        return nbr_variants
+
+    def _index_record_counts(self) -> dict[str, int] | None:
+        index = self.get_index() or self.get_line_index()
+
+        if index is None:
+            return None
+
+        return index.record_counts()
+
+    def _count_cache_path(self) -> str:
+        return f"{self.vcf_file}.nvariants"
+
+    def _count_cache_stamp(self) -> dict:
+        stat = os.stat(self.vcf_file)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def _read_count_cache(self) -> dict:
+        try:
+            with open(self._count_cache_path()) as cache_file:
+                cached = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+        if cached.get("stamp") != self._count_cache_stamp():
+            return {}
+
+        return cached.get("counts", {})
+
+    def _write_count_cache(self, key: str, nbr_variants: int) -> None:
+        counts = self._read_count_cache()
+        counts[key] = nbr_variants
+
+        try:
+            with open(self._count_cache_path(), "w") as cache_file:
+                json.dump({"stamp": self._count_cache_stamp(), "counts": counts}, cache_file)
+        except OSError as e:
+            LOG.warning("Could not write variant count cache: %s", e)
+
+
+class ContigOrder:
+    """
+    Sort ranks of contigs, the same for every stream of a join: header
+    (##contig) order, then contigs not in the headers in natural order
+    (chr2 before chr10). Ranking on first sight instead would depend on which
+    stream reaches a contig first.
+    """
+
+    def __init__(self, contigs: Iterable[str]):
+        self._ranks = {}
+
+        for idx, contig in enumerate(dict.fromkeys(contigs)):
+            # str and bytes (as_bytes rows) names
+            self._ranks[contig] = self._ranks[contig.encode()] = (0, idx)
+
+    def rank(self, contig: str | bytes) -> tuple:
+        rank = self._ranks.get(contig)
+
+        if rank is None:
+            name = contig.decode() if isinstance(contig, bytes) else contig
+            rank = self._ranks[contig] = (1, _natural_key(name))
+
+        return rank
+
+
+def _natural_key(name: str) -> tuple:
+    parts = re.split(r"(\d+)", name)
+    return tuple((0, int(part)) if part.isdigit() else (1, part) for part in parts if part)
+
+
+def merge_join(left: Iterable[tuple], right: Iterable[tuple]) -> Generator:
+    """
+    Full outer sort-merge join of two streams of (sort key, value) sorted on key
+
+    Yields (left item, right item) pairs, with None for the side missing a key.
+    Raises UnsortedVCFError as soon as either stream goes backwards.
+    """
+    left, right = iter(left), iter(right)
+    left_item, right_item = next(left, None), next(right, None)
+
+    while left_item is not None or right_item is not None:
+        if right_item is None or (left_item is not None and left_item[0] < right_item[0]):
+            yield left_item, None
+            left_item = _next_sorted(left, left_item)
+
+        elif left_item is None or right_item[0] < left_item[0]:
+            yield None, right_item
+            right_item = _next_sorted(right, right_item)
+
+        else:
+            yield left_item, right_item
+            left_item = _next_sorted(left, left_item)
+            right_item = _next_sorted(right, right_item)
+
+
+def merge_join_variants(left: Iterable[tuple], right: Iterable[tuple]) -> Generator:
+    """
+    Full outer join of two streams of (position, variant, value), sorted on position
 
+    position is e.g. (contig rank, POS), variant e.g. (REF, ALT). Records at
+    one position may come in any variant order, they are matched on variant
+    within the position (repeated variants pairwise). Yields (left value,
+    right value) pairs, None for the missing side, in left order and then
+    variants only in right. Raises UnsortedVCFError if positions go backwards.
+    """
+    for left_group, right_group in merge_join(_position_groups(left), _position_groups(right)):
+        left_values = left_group[1] if left_group else {}
+        right_values = right_group[1] if right_group else {}
+
+        variants = list(left_values) + [key for key in right_values if key not in left_values]
         for variant in variants:
-            if not variant.split("\t")[0] == chromosome:
-                continue
+            yield from zip_longest(left_values.get(variant, []), right_values.get(variant, []))
 
-            position = int(variant.split("\t")[1])
 
-            if position < start:
-                continue
+def _position_groups(items: Iterable[tuple]) -> Generator:
+    """
+    (position, {variant: [values]}) of consecutive items at each position
+    """
+    position, values = None, {}
 
-            if position > end:
-                continue
+    for item_position, variant, value in items:
+        if item_position != position:
+            if values:
+                yield position, values
+            position, values = item_position, {}
 
-            yield variant
+        values.setdefault(variant, []).append(value)
+
+    if values:
+        yield position, values
+
+
+def _next_sorted(items: Iterator[tuple], previous: tuple) -> tuple | None:
+    item = next(items, None)
+
+    if item is not None and item[0] < previous[0]:
+        raise UnsortedVCFError(f"Input not sorted: {item[0]} after {previous[0]}")
+
+    return item
+
+
+def _filter_chunk(
+    vcf_file: str,
+    chunk: Chunk,
+    filters: list[Callable[[str], bool]],
+    skip_mito: bool,
+    as_bytes: bool = False,
+) -> list[str] | list[bytes]:
+    vcf = VCF(vcf_file)
+
+    for filter_function in filters:
+        vcf.add_filter(filter_function)
+
+    return list(vcf.get_chunk_rows(chunk, skip_mito=skip_mito, as_bytes=as_bytes))
+
+
+def _filter_checker(filters: list[Callable]) -> Callable[[str | bytes], bool]:
+    if not filters:
+        return lambda row: True
+
+    def _passes(row) -> bool:
+        for filter_function in filters:
+            if not filter_function(row):
+                return False
+
+        return True
+
+    return _passes
+
+
+def _decoding_filter(filter_function: Callable[[str], bool]) -> Callable[[bytes], bool]:
+    @wraps(filter_function)
+    def _decoded(row: bytes) -> bool:
+        return filter_function(row.decode())
+
+    return _decoded
+
+
+def _gzip_open_func(path_to_vcf: str, threads: int = 1) -> Callable:
+    if threads > 1:
+        if is_bgzf(path_to_vcf):
+            return partial(ThreadedBgzfReader, threads=threads)
+
+        LOG.warning("%s is not BGZF compressed, reading with a single thread", path_to_vcf)
 
-    def nbr_variants(self, skip_mito: bool = False) -> int:
-        return sum(1 for _ in self.get_rows(skip_mito=skip_mito))
+    return gzip.open
+
+
+def _bytes_read(handle) -> int:
+    """
+    Position in the underlying (possibly compressed) file of a text or binary handle
+    """
+    if isinstance(handle, ThreadedBgzfReader):
+        return handle.compressed_offset
+
+    raw = getattr(handle, "buffer", handle)
+    if isinstance(getattr(raw, "raw", None), TimedGzipReader):
+        raw = raw.raw
+
+    return getattr(raw, "fileobj", raw).tell()
+
+
+def _inflate_seconds(handle) -> float:
+    """
+    Time spent inflating, of handles that keep count
+    """
+    raw = getattr(handle, "buffer", handle)
+    return getattr(getattr(raw, "raw", raw), "inflate_seconds", 0.0)
 
 
-def open_vcf(path_to_vcf: str) -> Generator:
+def open_vcf(path_to_vcf: str, threads: int = 1) -> Generator:
     """
     Open compressed/uncompressed vcf
     """
 
     def _vcf_file_generator():
-        open_func = gzip.open if path_to_vcf.endswith(".gz") else open
+        open_func = _gzip_open_func(path_to_vcf, threads) if path_to_vcf.endswith(".gz") else open
         with open_func(path_to_vcf, "rt") as vcf_handle:
             for line in vcf_handle:
                 yield line